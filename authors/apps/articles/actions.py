@@ -0,0 +1,479 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save, pre_delete, pre_save)
+from fluent_comments.models import FluentComment
+from threadedcomments.models import ThreadedComment
+
+from . import cache, models, search_index, tags, text
+from ..core.hyperloglog import HyperLogLog
+
+
+# counts the favorites, comments and ratings of the articles with the
+# given ids or slugs that have no counters
+COUNT_ARTICLE_STATS = """
+INSERT INTO {stats} (article_id, favorites_count, readers_sketch,
+                     comments_count, rating_sum, rating_count)
+SELECT article.id,
+       (SELECT count(*) FROM {favorites} WHERE article_id = article.id),
+       '',
+       (SELECT count(*) FROM {comments} WHERE object_pk = article.slug),
+       (SELECT coalesce(sum(rating), 0) FROM {ratings}
+        WHERE article_id = article.id),
+       (SELECT count(*) FROM {ratings} WHERE article_id = article.id)
+FROM {articles} article
+WHERE article.{column} = ANY(%s) AND NOT EXISTS (
+    SELECT 1 FROM {stats} WHERE article_id = article.id)
+ON CONFLICT (article_id) DO NOTHING
+"""
+
+
+def count_article_stats(field, values):
+    """
+    Create the missing counters of the articles whose id or slug field
+    has one of the given values, counting what they have so far, and
+    return the number created
+    """
+
+    tables = {name: connection.ops.quote_name(model._meta.db_table)
+              for (name, model) in (
+                  ('stats', models.ArticleStatsModel),
+                  ('favorites', models.FavoriteArticleModel),
+                  ('comments',
+                   ThreadedComment._meta.get_field('object_pk').model),
+                  ('ratings', apps.get_model('ratings', 'Ratings')),
+                  ('articles', models.ArticleModel))}
+
+    with connection.cursor() as cursor:
+        cursor.execute(COUNT_ARTICLE_STATS.format(column=field, **tables),
+                       [list(values)])
+
+        return cursor.rowcount
+
+
+def update_article_stats(counters, count_missing=True, **lookup):
+    """
+    Add the given increments to the counters of the article found by
+    its id or slug in a single UPDATE. An article without counters,
+    such as one older than them, gets them counted instead, which
+    includes the change being counted, unless count_missing is off for
+    deletions that may be part of deleting the article.
+    """
+
+    (field, value), = lookup.items()
+    stats = models.ArticleStatsModel.objects.filter(
+        **{'article__' + field: value})
+    changes = {name: F(name) + value for (name, value) in counters.items()}
+
+    if stats.update(**changes) or not count_missing or \
+            count_article_stats(field, [value]):
+
+        return
+
+    # counted by another transaction meanwhile, which missed this change
+    stats.update(**changes)
+
+
+def article_text(article):
+    """
+    Return the indexed text fields of an article that are loaded
+    """
+
+    return tuple(article.__dict__.get(field)
+                 for (field, _) in search_index.FIELD_WEIGHTS)
+
+
+def remember_article_text(sender, **kwargs):
+    """
+    Keep the stored text of an article so that saves which leave it
+    unchanged do not reindex it
+    """
+
+    kwargs['instance'].indexed_text = article_text(kwargs['instance'])
+
+
+def index_article(sender, **kwargs):
+    """
+    Add a new or edited article to the search index once the save is
+    committed
+    """
+
+    article = kwargs['instance']
+    text = article_text(article)
+
+    if search_index.index_enabled() and (
+            kwargs['created'] or text != article.indexed_text):
+
+        document = {
+            'id': article.id,
+            'title': article.title,
+            'description': article.description,
+            'body': article.body,
+        }
+
+        transaction.on_commit(
+            lambda: search_index.get_index().add([document]))
+
+    article.indexed_text = text
+
+
+def unindex_article(sender, **kwargs):
+    """
+    Remove a deleted article from the search index once the deletion is
+    committed
+    """
+
+    if search_index.index_enabled():
+
+        article_id = kwargs['instance'].id
+
+        transaction.on_commit(
+            lambda: search_index.get_index().delete([article_id]))
+
+
+def measure_article(sender, **kwargs):
+    """
+    Store the reading metrics of an article whose body changed
+    """
+
+    article = kwargs['instance']
+    update_fields = kwargs['update_fields']
+
+    if 'body' not in article.__dict__ or (
+            update_fields is not None and 'body' not in update_fields):
+        return
+
+    if text.body_hash(article.body) != article.body_hash:
+
+        for (field, value) in text.measure_text(article.body).items():
+            setattr(article, field, value)
+
+
+def fingerprint_article(sender, **kwargs):
+    """
+    Store the content fingerprint of an article whose text is saved
+    """
+
+    article = kwargs['instance']
+    update_fields = kwargs['update_fields']
+
+    if 'title' not in article.__dict__ or 'body' not in article.__dict__:
+        return
+
+    if update_fields is None or {'title', 'body'} & set(update_fields):
+
+        article.fingerprint = text.content_fingerprint(
+            article.title, article.body)
+
+
+def create_article_stats(sender, **kwargs):
+    """
+    Create the counters of a new article
+    """
+
+    if kwargs['created']:
+
+        models.ArticleStatsModel.objects.create(article=kwargs['instance'])
+
+
+def count_favorite(sender, **kwargs):
+    """
+    Count a new favorite of an article
+    """
+
+    if kwargs['created']:
+
+        update_article_stats({'favorites_count': 1},
+                             id=kwargs['instance'].article_id)
+
+
+def uncount_favorite(sender, **kwargs):
+    """
+    Discount a removed favorite of an article
+    """
+
+    update_article_stats({'favorites_count': -1}, count_missing=False,
+                         id=kwargs['instance'].article_id)
+
+
+def add_readers(reads):
+    """
+    Add (user id, article id) reads to the reader sketches of their
+    articles, locking the counters of each article while it is updated,
+    and counting those of articles that have none first
+    """
+
+    readers = defaultdict(set)
+    for (user_id, article_id) in reads:
+        readers[article_id].add(user_id)
+
+    counters = models.ArticleStatsModel.objects.select_for_update().filter(
+        article_id__in=list(readers)).only(
+        'article_id', 'readers_sketch').order_by('article_id')
+
+    with transaction.atomic():
+        stats = list(counters)
+
+        if len(stats) < len(readers) and \
+                count_article_stats('id', readers):
+
+            stats = list(counters.all())
+
+        for article_stats in stats:
+            sketch = HyperLogLog(article_stats.readers_sketch)
+            for user_id in readers[article_stats.article_id]:
+                sketch.add(user_id)
+            article_stats.readers_sketch = bytes(sketch)
+
+        models.ArticleStatsModel.objects.bulk_update(
+            stats, ['readers_sketch'])
+
+
+def count_read(sender, **kwargs):
+    """
+    Count a new reader of an article. Readers are not discounted, as
+    they cannot be removed from a sketch.
+    """
+
+    if kwargs['created']:
+
+        read = kwargs['instance']
+        add_readers([(read.user_id, read.article_id)])
+
+
+def remember_rating(sender, **kwargs):
+    """
+    Keep the stored value of a rating so that updates can be
+    applied to the running sum as a difference
+    """
+
+    kwargs['instance'].saved_rating = kwargs['instance'].rating
+
+
+def count_rating(sender, **kwargs):
+    """
+    Add a new or changed rating to the running sum and count
+    """
+
+    rating = kwargs['instance']
+
+    if kwargs['created']:
+
+        update_article_stats({'rating_sum': rating.rating, 'rating_count': 1},
+                             id=rating.article_id)
+
+    elif rating.rating != rating.saved_rating:
+
+        update_article_stats({'rating_sum': rating.rating - rating.saved_rating},
+                             id=rating.article_id)
+
+    rating.saved_rating = rating.rating
+
+
+def uncount_rating(sender, **kwargs):
+    """
+    Remove a deleted rating from the running sum and count
+    """
+
+    rating = kwargs['instance']
+
+    update_article_stats({'rating_sum': -rating.saved_rating,
+                          'rating_count': -1}, count_missing=False,
+                         id=rating.article_id)
+
+
+def count_comment(sender, **kwargs):
+    """
+    Count a new comment on an article
+    """
+
+    if kwargs['created']:
+
+        update_article_stats({'comments_count': 1},
+                             slug=kwargs['instance'].object_pk)
+
+
+def uncount_comment(sender, **kwargs):
+    """
+    Discount a deleted comment on an article
+    """
+
+    update_article_stats({'comments_count': -1}, count_missing=False,
+                         slug=kwargs['instance'].object_pk)
+
+
+def remember_slug(sender, **kwargs):
+    """
+    Keep the stored slug and title of an article, as the slug changes
+    with the title
+    """
+
+    kwargs['instance'].saved_slug = kwargs['instance'].__dict__.get('slug')
+    kwargs['instance'].saved_title = kwargs['instance'].__dict__.get('title')
+
+
+def invalidate_article(sender, **kwargs):
+    """
+    Drop the cached renderings of a saved or deleted article, under
+    its current and previous slug
+    """
+
+    article = kwargs['instance']
+    cache.invalidate_articles(article.slug, article.saved_slug)
+    article.saved_slug = article.slug
+
+
+def invalidate_article_tags(sender, **kwargs):
+    """
+    Drop the cached renderings of an article whose tags changed
+    """
+
+    if kwargs['action'].startswith('post_') and not kwargs['reverse']:
+
+        cache.invalidate_articles(kwargs['instance'].slug)
+
+
+def count_article_tags(sender, **kwargs):
+    """
+    Count the articles of tags as they are added to and removed from
+    articles, from either side of the relation
+    """
+
+    action, instance = kwargs['action'], kwargs['instance']
+    column = 'tagmodel_id' if kwargs['reverse'] else 'articlemodel_id'
+    other = 'articlemodel_id' if kwargs['reverse'] else 'tagmodel_id'
+
+    if action == 'pre_clear':
+        instance.cleared_links = set(sender.objects.filter(
+            **{column: instance.id}).values_list(other, flat=True))
+        return
+
+    sign = {'post_add': 1, 'post_remove': -1, 'post_clear': -1}.get(action)
+    if sign is None:
+        return
+
+    linked = kwargs['pk_set']
+    if action == 'post_clear':
+        linked = instance.__dict__.pop('cleared_links', set())
+
+    if kwargs['reverse']:
+        tags.update_tag_counts({instance.id: sign * len(linked)})
+    else:
+        tags.update_tag_counts({tag_id: sign for tag_id in linked})
+    cache.invalidate_tag_catalogue()
+
+
+def uncount_article_tags(sender, **kwargs):
+    """
+    Discount the tags of a deleted article, whose links are removed
+    without m2m_changed
+    """
+
+    tag_ids = tags.tag_links().objects.filter(
+        articlemodel_id=kwargs['instance'].id).values_list(
+        'tagmodel_id', flat=True)
+
+    tags.update_tag_counts({tag_id: -1 for tag_id in tag_ids})
+    cache.invalidate_tag_catalogue()
+
+
+def forget_tags(sender, **kwargs):
+    """
+    Drop the cached tag ids of a process and the tag catalogue when a
+    tag is renamed or deleted
+    """
+
+    tags.tag_cache.clear()
+    cache.invalidate_tag_catalogue()
+
+
+def invalidate_related_article(sender, **kwargs):
+    """
+    Drop the cached renderings of the article a favorite or rating
+    belongs to
+    """
+
+    cache.invalidate_articles(*models.ArticleModel.objects.filter(
+        id=kwargs['instance'].article_id).values_list('slug', flat=True))
+
+
+def invalidate_commented_article(sender, **kwargs):
+    """
+    Drop the cached renderings of a commented article
+    """
+
+    cache.invalidate_articles(kwargs['instance'].object_pk)
+
+
+def invalidate_comment_vote(sender, **kwargs):
+    """
+    Drop the cached renderings of the article of a voted comment
+    """
+
+    cache.invalidate_articles(*FluentComment.objects.filter(
+        id=kwargs['instance'].comment_id).values_list('object_pk', flat=True))
+
+
+def invalidate_profile_articles(sender, **kwargs):
+    """
+    Drop the cached renderings of the articles showing a changed
+    profile, as their author or as a commenter
+    """
+
+    user_id = kwargs['instance'].user_id
+
+    cache.invalidate_articles(
+        *models.ArticleModel.objects.filter(
+            author_id=user_id).values_list('slug', flat=True),
+        *FluentComment.objects.filter(
+            user_id=user_id).values_list('object_pk', flat=True).distinct())
+
+
+pre_save.connect(measure_article, sender='articles.ArticleModel')
+pre_save.connect(fingerprint_article, sender='articles.ArticleModel')
+post_save.connect(create_article_stats, sender='articles.ArticleModel')
+
+post_init.connect(remember_article_text, sender='articles.ArticleModel')
+post_save.connect(index_article, sender='articles.ArticleModel')
+post_delete.connect(unindex_article, sender='articles.ArticleModel')
+
+post_init.connect(remember_slug, sender='articles.ArticleModel')
+post_save.connect(invalidate_article, sender='articles.ArticleModel')
+post_delete.connect(invalidate_article, sender='articles.ArticleModel')
+m2m_changed.connect(invalidate_article_tags,
+                    sender='articles.ArticleModel_tag_list')
+
+m2m_changed.connect(count_article_tags,
+                    sender='articles.ArticleModel_tag_list')
+pre_delete.connect(uncount_article_tags, sender='articles.ArticleModel')
+post_save.connect(forget_tags, sender='articles.TagModel')
+post_delete.connect(forget_tags, sender='articles.TagModel')
+
+post_save.connect(invalidate_related_article,
+                  sender='articles.FavoriteArticleModel')
+post_delete.connect(invalidate_related_article,
+                    sender='articles.FavoriteArticleModel')
+post_save.connect(invalidate_related_article, sender='ratings.Ratings')
+post_delete.connect(invalidate_related_article, sender='ratings.Ratings')
+
+post_save.connect(invalidate_comment_vote, sender='articles.CommentModel')
+post_save.connect(invalidate_profile_articles, sender='profiles.UserProfile')
+
+post_save.connect(count_favorite, sender='articles.FavoriteArticleModel')
+post_delete.connect(uncount_favorite, sender='articles.FavoriteArticleModel')
+
+post_save.connect(count_read, sender='articles.ReadStatsModel')
+
+post_init.connect(remember_rating, sender='ratings.Ratings')
+post_save.connect(count_rating, sender='ratings.Ratings')
+post_delete.connect(uncount_rating, sender='ratings.Ratings')
+
+# replies removed along with their parent are deleted as ThreadedComment
+for comment_model in (FluentComment, ThreadedComment):
+    post_save.connect(count_comment, sender=comment_model)
+    post_delete.connect(uncount_comment, sender=comment_model)
+    post_save.connect(invalidate_commented_article, sender=comment_model)
+    post_delete.connect(invalidate_commented_article, sender=comment_model)
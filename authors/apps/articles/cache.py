@@ -0,0 +1,173 @@
+"""
+Versioned cache of the public article payload.
+
+The payload is the public document of an article, which readers that
+are logged in see with their own overlay applied.
+
+Every article slug has a version token in the cache, and the payload is
+stored under the slug and version. Changing anything shown in the
+payload replaces the version, so stale entries are never read again and
+simply expire. Readers take the version before loading the article from
+the database, so a payload built from data older than an invalidation
+can only ever be stored under a version that is no longer current.
+
+The pages of the tag catalogue are cached the same way, under a single
+version that changes with the tags of any article.
+
+An invalidation only reaches the processes sharing the cache it is made
+in, so nothing is cached unless the SHARED_CACHE setting says every
+process uses the same cache. With the default in-process cache every
+request renders from the database.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+
+TAG_CATALOGUE_VERSION_KEY = 'tags:version'
+
+
+def version_key(slug):
+    return 'article:{}:version'.format(slug)
+
+
+def payload_key(slug, version):
+    return 'article:{}:{}'.format(slug, version)
+
+
+def current_version(key):
+    """
+    Return the version token stored under a key, adding one if missing,
+    or None when nothing is cached
+    """
+    if not settings.SHARED_CACHE:
+        return None
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def article_version(slug):
+    """
+    Return the current version token of an article
+    """
+    return current_version(version_key(slug))
+
+
+def render_article(data):
+    """
+    Return the rendered article response body and its strong entity tag
+    """
+    content = json.dumps({"status": 200, "data": data},
+                         cls=DjangoJSONEncoder).encode()
+
+    return {'content': content,
+            'etag': quote_etag(hashlib.md5(content).hexdigest())}
+
+
+def article_document(rendered):
+    """
+    Return the public document of a rendered article
+    """
+    return json.loads(rendered['content'].decode())['data']
+
+
+def get_article(slug, version):
+    """
+    Return the cached rendering of an article version, if any
+    """
+    if version is None:
+        return None
+    return cache.get(payload_key(slug, version))
+
+
+def set_article(slug, version, data):
+    """
+    Cache the rendering of an article version, and return it
+    """
+    rendered = render_article(data)
+    if version is not None:
+        cache.set(payload_key(slug, version), rendered,
+                  settings.ARTICLE_CACHE_TIMEOUT)
+    return rendered
+
+
+def invalidate_articles(*slugs):
+    """
+    Replace the versions of articles, now and again once the current
+    transaction commits so that readers cannot cache what it replaced
+    """
+    keys = [version_key(slug) for slug in slugs if slug]
+    if not keys or not settings.SHARED_CACHE:
+        return
+
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def tag_catalogue_key(version, url):
+    return 'tags:{}:{}'.format(
+        version, hashlib.md5(url.encode()).hexdigest())
+
+
+def tag_catalogue_version():
+    """
+    Return the current version token of the tag catalogue
+    """
+    return current_version(TAG_CATALOGUE_VERSION_KEY)
+
+
+def get_tag_catalogue(version, url):
+    """
+    Return the cached tag catalogue page of a URL, if any
+    """
+    if version is None:
+        return None
+    return cache.get(tag_catalogue_key(version, url))
+
+
+def set_tag_catalogue(version, url, data):
+    """
+    Cache the tag catalogue page of a URL
+    """
+    if version is not None:
+        cache.set(tag_catalogue_key(version, url), data,
+                  settings.TAG_CATALOGUE_CACHE_TIMEOUT)
+
+
+def invalidate_tag_catalogue():
+    """
+    Replace the version of the tag catalogue, now and again once the
+    current transaction commits
+    """
+    if not settings.SHARED_CACHE:
+        return
+
+    cache.delete(TAG_CATALOGUE_VERSION_KEY)
+    transaction.on_commit(lambda: cache.delete(TAG_CATALOGUE_VERSION_KEY))
+
+
+def article_response(request, rendered):
+    """
+    Return a rendered article, or 304 if the client already has it
+    """
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+
+    if rendered['etag'] in etags or '*' in etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(rendered['content'],
+                                content_type='application/json')
+
+    response['ETag'] = rendered['etag']
+    return response
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ...models import ArticleModel
+from ...search_index import get_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the article search index from the articles table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Number of articles analyzed in memory at a time')
+
+    def handle(self, *args, **options):
+        articles = ArticleModel.objects.order_by('id').values(
+            'id', 'title', 'description', 'body').iterator(chunk_size=2000)
+        count = 0
+
+        def counted(documents):
+            nonlocal count
+            for document in documents:
+                count += 1
+                yield document
+
+        get_index().rebuild(counted(articles),
+                            batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed {} articles'.format(count)))
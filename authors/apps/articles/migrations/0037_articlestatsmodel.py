@@ -0,0 +1,83 @@
+# Generated by Django 2.2 on 2026-10-18 15:42
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+# articles counted and inserted at a time
+BATCH_SIZE = 500
+
+
+def backfill_article_stats(apps, schema_editor):
+    """
+    Compute the counters of existing articles, a batch at a time
+    """
+    ArticleModel = apps.get_model('articles', 'ArticleModel')
+    ArticleStatsModel = apps.get_model('articles', 'ArticleStatsModel')
+    FavoriteArticleModel = apps.get_model('articles', 'FavoriteArticleModel')
+    ReadStatsModel = apps.get_model('articles', 'ReadStatsModel')
+    Ratings = apps.get_model('ratings', 'Ratings')
+    ThreadedComment = apps.get_model('threadedcomments', 'ThreadedComment')
+
+    def grouped(queryset, field, **aggregate):
+        return {row[field]: row for row in
+                queryset.values(field).annotate(**aggregate).order_by()}
+
+    empty = {'count': 0, 'sum': 0}
+    last = 0
+    while True:
+        articles = list(ArticleModel.objects.filter(id__gt=last).order_by(
+            'id').values_list('id', 'slug')[:BATCH_SIZE])
+        if not articles:
+            return
+        last = articles[-1][0]
+
+        ids = [article_id for (article_id, _) in articles]
+        slugs = [slug for (_, slug) in articles]
+        favorites = grouped(FavoriteArticleModel.objects.filter(
+            article_id__in=ids), 'article_id', count=Count('id'))
+        reads = grouped(ReadStatsModel.objects.filter(article_id__in=ids),
+                        'article_id', count=Count('id'))
+        ratings = grouped(Ratings.objects.filter(article_id__in=ids),
+                          'article_id', count=Count('id'), sum=Sum('rating'))
+        comments = grouped(ThreadedComment.objects.filter(object_pk__in=slugs),
+                           'object_pk', count=Count('id'))
+
+        ArticleStatsModel.objects.bulk_create([
+            ArticleStatsModel(
+                article_id=article_id,
+                favorites_count=favorites.get(article_id, empty)['count'],
+                read_count=reads.get(article_id, empty)['count'],
+                comments_count=comments.get(slug, empty)['count'],
+                rating_sum=ratings.get(article_id, empty)['sum'],
+                rating_count=ratings.get(article_id, empty)['count'])
+            for (article_id, slug) in articles], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0036_articlemodel_is_liked'),
+        ('ratings', '0001_initial'),
+        ('threadedcomments', '0003_threadedcomment_newest_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleStatsModel',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='articles.ArticleModel')),
+                ('favorites_count', models.IntegerField(default=0)),
+                ('read_count', models.IntegerField(default=0)),
+                ('comments_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_article_stats,
+                             migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='articlemodel',
+            name='favorites_count',
+        ),
+    ]
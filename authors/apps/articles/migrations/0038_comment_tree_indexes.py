@@ -0,0 +1,29 @@
+# Generated by Django 2.2 on 2026-10-18 16:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the comment tables used to load the comment threads of an
+    article: the article a comment belongs to and the materialized tree
+    path of replies, with pattern ops so that subtrees can be selected
+    by path prefix
+    """
+
+    dependencies = [
+        ('articles', '0037_articlestatsmodel'),
+        ('django_comments', '0003_add_submit_date_index'),
+        ('threadedcomments', '0003_threadedcomment_newest_activity'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS django_comments_object_pk_idx '
+            'ON django_comments (object_pk);',
+            'DROP INDEX IF EXISTS django_comments_object_pk_idx;'),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS threadedcomments_tree_path_idx '
+            'ON threadedcomments_comment (tree_path varchar_pattern_ops);',
+            'DROP INDEX IF EXISTS threadedcomments_tree_path_idx;'),
+    ]
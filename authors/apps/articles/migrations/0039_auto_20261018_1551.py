@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0038_comment_tree_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articlemodel',
+            index=models.Index(fields=['-created_at', '-id'], name='article_created_at_idx'),
+        ),
+    ]
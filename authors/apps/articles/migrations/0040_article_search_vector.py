@@ -0,0 +1,54 @@
+# Generated by Django 2.2 on 2026-10-18 15:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# the search vector of an article weighs matches in the title above the
+# description, and the description above the body
+SEARCH_VECTOR = """
+    setweight(to_tsvector('pg_catalog.english', coalesce({0}title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({0}description, '')), 'B') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({0}body, '')), 'C')
+"""
+
+CREATE_TRIGGER = """
+CREATE FUNCTION articles_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER articles_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, body
+ON articles_articlemodel
+FOR EACH ROW EXECUTE PROCEDURE articles_search_vector_update();
+
+UPDATE articles_articlemodel SET search_vector = {};
+""".format(SEARCH_VECTOR.format('NEW.'), SEARCH_VECTOR.format(''))
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS articles_search_vector_trigger ON articles_articlemodel;
+DROP FUNCTION IF EXISTS articles_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0039_auto_20261018_1551'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlemodel',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='articlemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+        ),
+    ]
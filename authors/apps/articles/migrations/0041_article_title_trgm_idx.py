@@ -0,0 +1,19 @@
+# Generated by Django 2.2 on 2026-10-18 16:03
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0040_article_search_vector'),
+        ('authentication', '0002_user_username_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articlemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='article_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
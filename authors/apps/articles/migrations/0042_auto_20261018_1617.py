@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0041_article_title_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favoritearticlemodel',
+            index=models.Index(fields=['favoritor', 'article'], name='favorite_user_article_idx'),
+        ),
+    ]
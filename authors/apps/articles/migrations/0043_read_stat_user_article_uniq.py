@@ -0,0 +1,32 @@
+# Generated by Django 2.2 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+# reads recorded more than once by concurrent requests are removed and
+# the read counters recounted before reads are made unique
+REMOVE_DUPLICATE_READS = """
+DELETE FROM articles_readstatsmodel AS duplicate
+USING articles_readstatsmodel AS kept
+WHERE duplicate.user_id = kept.user_id
+AND duplicate.article_id = kept.article_id
+AND duplicate.id > kept.id;
+
+UPDATE articles_articlestatsmodel AS stats SET read_count = (
+    SELECT COUNT(*) FROM articles_readstatsmodel AS reads
+    WHERE reads.article_id = stats.article_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0042_auto_20261018_1617'),
+    ]
+
+    operations = [
+        migrations.RunSQL(REMOVE_DUPLICATE_READS, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='readstatsmodel',
+            constraint=models.UniqueConstraint(fields=('user', 'article'), name='read_stat_user_article_uniq'),
+        ),
+    ]
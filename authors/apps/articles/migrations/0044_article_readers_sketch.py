@@ -0,0 +1,67 @@
+# Generated by Django 2.2 on 2026-10-18 16:24
+
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import migrations, models
+import django.utils.timezone
+
+from authors.apps.core.hyperloglog import HyperLogLog
+
+# article sketches saved at a time
+BATCH_SIZE = 500
+
+
+def backfill_readers_sketches(apps, schema_editor):
+    """
+    Add the stored readers of every article to its sketch, streaming the
+    reads by article and saving the sketches a batch at a time
+    """
+    ArticleStatsModel = apps.get_model('articles', 'ArticleStatsModel')
+    ReadStatsModel = apps.get_model('articles', 'ReadStatsModel')
+
+    stats = []
+    reads = ReadStatsModel.objects.order_by('article_id').values_list(
+        'article_id', 'user_id').iterator(chunk_size=BATCH_SIZE)
+    for (article_id, article_reads) in groupby(reads, itemgetter(0)):
+        sketch = HyperLogLog()
+        for (_, user_id) in article_reads:
+            sketch.add(user_id)
+        stats.append(ArticleStatsModel(article_id=article_id,
+                                       readers_sketch=bytes(sketch)))
+
+        if len(stats) >= BATCH_SIZE:
+            ArticleStatsModel.objects.bulk_update(stats, ['readers_sketch'])
+            stats = []
+
+    ArticleStatsModel.objects.bulk_update(stats, ['readers_sketch'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0043_read_stat_user_article_uniq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlestatsmodel',
+            name='readers_sketch',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(backfill_readers_sketches,
+                             migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='articlestatsmodel',
+            name='read_count',
+        ),
+        migrations.AddField(
+            model_name='readstatsmodel',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='readstatsmodel',
+            index=models.Index(fields=['article', '-created_at', '-id'], name='read_stat_article_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2 on 2026-10-18 16:29
+
+from django.db import migrations, models
+
+from authors.apps.articles.text import measure_text
+
+# articles measured and updated at a time
+BATCH_SIZE = 500
+
+
+def backfill_text_metrics(apps, schema_editor):
+    """
+    Store the reading metrics of every article
+    """
+    ArticleModel = apps.get_model('articles', 'ArticleModel')
+
+    fields = ['body_hash', 'word_count', 'readtime', 'excerpt']
+    articles = []
+    for article in ArticleModel.objects.only('id', 'body').iterator(
+            chunk_size=BATCH_SIZE):
+        for (field, value) in measure_text(article.body).items():
+            setattr(article, field, value)
+        articles.append(article)
+
+        if len(articles) >= BATCH_SIZE:
+            ArticleModel.objects.bulk_update(articles, fields)
+            articles = []
+
+    ArticleModel.objects.bulk_update(articles, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0044_article_readers_sketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlemodel',
+            name='body_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='articlemodel',
+            name='excerpt',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='articlemodel',
+            name='word_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_text_metrics,
+                             migrations.RunPython.noop),
+    ]
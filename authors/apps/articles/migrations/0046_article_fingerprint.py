@@ -0,0 +1,48 @@
+# Generated by Django 2.2 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+from authors.apps.articles.text import content_fingerprint
+
+# articles fingerprinted and updated at a time
+BATCH_SIZE = 500
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """
+    Store the content fingerprint of every article
+    """
+    ArticleModel = apps.get_model('articles', 'ArticleModel')
+
+    articles = []
+    for article in ArticleModel.objects.only(
+            'id', 'title', 'body').iterator(chunk_size=BATCH_SIZE):
+        article.fingerprint = content_fingerprint(article.title, article.body)
+        articles.append(article)
+
+        if len(articles) >= BATCH_SIZE:
+            ArticleModel.objects.bulk_update(articles, ['fingerprint'])
+            articles = []
+
+    ArticleModel.objects.bulk_update(articles, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0045_article_text_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlemodel',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_fingerprints,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='articlemodel',
+            index=models.Index(fields=['author', 'fingerprint'], name='article_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2 on 2026-10-18 16:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0046_article_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugHistoryModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='articlemodel',
+            name='slug',
+            field=models.SlugField(blank=True, editable=False, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='articlemodel',
+            index=models.Index(fields=['slug'], name='article_slug_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddField(
+            model_name='slughistorymodel',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='old_slugs', to='articles.ArticleModel'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 2.2 on 2026-10-18 16:47
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_tag_counts(apps, schema_editor):
+    """
+    Count the articles of every tag
+    """
+    ArticleModel = apps.get_model('articles', 'ArticleModel')
+    TagStatsModel = apps.get_model('articles', 'TagStatsModel')
+
+    counts = ArticleModel.tag_list.through.objects.values(
+        'tagmodel_id').annotate(article_count=Count('id'))
+
+    TagStatsModel.objects.bulk_create(
+        [TagStatsModel(tag_id=count['tagmodel_id'],
+                       article_count=count['article_count'])
+         for count in counts.iterator()],
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0047_article_slug_allocator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStatsModel',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='articles.TagModel')),
+                ('article_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_tag_counts,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tagmodel',
+            index=models.Index(fields=['tagname'], name='tag_name_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='tagstatsmodel',
+            index=models.Index(fields=['-article_count', 'tag'], name='tag_stats_usage_idx'),
+        ),
+    ]
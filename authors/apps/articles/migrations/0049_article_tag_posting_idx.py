@@ -0,0 +1,21 @@
+# Generated by Django 2.2 on 2026-10-18 17:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the article tag links by tag, so that the articles of a tag
+    are read in order from the index alone
+    """
+
+    dependencies = [
+        ('articles', '0048_tag_stats'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS article_tag_posting_idx '
+            'ON articles_articlemodel_tag_list (tagmodel_id, articlemodel_id);',
+            'DROP INDEX IF EXISTS article_tag_posting_idx;'),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0049_article_tag_posting_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='slughistorymodel',
+            index=models.Index(fields=['slug'], name='slug_history_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
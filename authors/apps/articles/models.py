@@ -1,11 +1,15 @@
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth import get_user_model
-from autoslug import AutoSlugField
 from django.core.validators import URLValidator
 from vote.models import VoteModel
 from fluent_comments.models import FluentComment
 from authors.apps.authentication.models import User
+from authors.apps.core.hyperloglog import HyperLogLog
+from . import actions
+from .slugs import allocate_slug
 
 
 class TagModel(models.Model):
@@ -18,12 +22,41 @@ class TagModel(models.Model):
     def __str__(self):
         return self.tagname
 
+    class Meta:
+        indexes = [models.Index(fields=['tagname'],
+                                opclasses=['varchar_pattern_ops'],
+                                name='tag_name_pattern_idx')]
+
+
+class TagStatsModel(models.Model):
+    """
+    The number of articles of a tag, kept up to date as tags are added
+    to and removed from articles
+    """
+    tag = models.OneToOneField(TagModel, related_name='stats',
+                               on_delete=models.CASCADE, primary_key=True)
+    article_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['-article_count', 'tag'],
+                                name='tag_stats_usage_idx')]
+
+
+class ArticleManager(models.Manager):
+    """
+    Leaves the search vector, which is only used by the database to
+    match searches, out of loaded articles
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
 
 class ArticleModel(VoteModel, models.Model):
     """The article model."""
 
-    slug = AutoSlugField(populate_from='title',
-                         blank=True, null=True, unique=True, always_update=True)
+    slug = models.SlugField(max_length=255, blank=True, null=True,
+                            unique=True, editable=False)
     title = models.CharField(max_length=254)
     description = models.TextField(blank=False, null=False)
     body = models.TextField(blank=False, null=False)
@@ -31,7 +64,6 @@ class ArticleModel(VoteModel, models.Model):
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     updated_at = models.DateTimeField(auto_now_add=True, editable=True)
     favorited = models.BooleanField(default=False)
-    favorites_count = models.IntegerField(default=0)
     image = models.TextField(max_length=1000, validators=[
                              URLValidator], null=False, default='')
     num_vote_down = models.IntegerField(default=0)
@@ -41,7 +73,14 @@ class ArticleModel(VoteModel, models.Model):
     facebook = models.URLField(blank=True, null=True)
     mail = models.TextField(blank=False, null=False, default="")
     readtime = models.CharField(blank=False, null=False, max_length=240)
+    word_count = models.IntegerField(default=0)
+    excerpt = models.TextField(blank=True, default='')
+    body_hash = models.CharField(max_length=64, blank=True, default='',
+                                 editable=False)
+    fingerprint = models.CharField(max_length=64, blank=True, default='',
+                                   editable=False)
     is_liked = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     author = models.ForeignKey(
         get_user_model(),
@@ -52,11 +91,65 @@ class ArticleModel(VoteModel, models.Model):
         default=None
     )
 
+    objects = ArticleManager()
+
     def __str__(self):
         return "{}".format(self.title)  # pragma: no cover
 
+    def save(self, *args, **kwargs):
+        """
+        Save the article, allocating a new slug when it has none or its
+        title changed, and keeping the slug it replaces
+        """
+        update_fields = kwargs.get('update_fields')
+        previous_slug = self.saved_slug
+
+        with transaction.atomic():
+            if 'title' in self.__dict__ and (
+                    update_fields is None or 'title' in update_fields) and (
+                    not self.slug or self.title != self.saved_title):
+
+                self.slug = allocate_slug(self)
+                if update_fields is not None:
+                    kwargs['update_fields'] = set(update_fields) | {'slug'}
+
+            super().save(*args, **kwargs)
+
+            if previous_slug and previous_slug != self.slug:
+                SlugHistoryModel.objects.update_or_create(
+                    slug=previous_slug, defaults={'article': self})
+
+        self.saved_title = self.title
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=['-created_at', '-id'],
+                                name='article_created_at_idx'),
+                   GinIndex(fields=['search_vector'],
+                            name='article_search_vector_idx'),
+                   GinIndex(fields=['title'], opclasses=['gin_trgm_ops'],
+                            name='article_title_trgm_idx'),
+                   models.Index(fields=['author', 'fingerprint'],
+                                name='article_fingerprint_idx'),
+                   models.Index(fields=['slug'],
+                                opclasses=['varchar_pattern_ops'],
+                                name='article_slug_pattern_idx')]
+
+
+class SlugHistoryModel(models.Model):
+    """
+    Slugs that articles had before their title changed, so that links
+    to them keep working
+    """
+    slug = models.SlugField(max_length=255, unique=True)
+    article = models.ForeignKey(ArticleModel, related_name='old_slugs',
+                                on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['slug'],
+                                opclasses=['varchar_pattern_ops'],
+                                name='slug_history_pattern_idx')]
 
 
 class FavoriteArticleModel(models.Model):
@@ -69,6 +162,12 @@ class FavoriteArticleModel(models.Model):
         related_name='favorited_article',
         on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['favoritor', 'article'],
+                         name='favorite_user_article_idx'),
+        ]
+
 
 class BookmarkArticleModel(models.Model):
     """Bookmark article model."""
@@ -102,3 +201,44 @@ class ReadStatsModel(models.Model):
 
     article = models.ForeignKey(
         ArticleModel, related_name="read_article", on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'article'],
+                                    name='read_stat_user_article_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['article', '-created_at', '-id'],
+                         name='read_stat_article_idx'),
+        ]
+
+
+class ArticleStatsModel(models.Model):
+    """
+    Engagement counters of an article, kept up to date as favorites,
+    reads, ratings and comments are written. Distinct readers are
+    counted approximately with a HyperLogLog sketch.
+    """
+    article = models.OneToOneField(
+        ArticleModel, related_name='stats', on_delete=models.CASCADE,
+        primary_key=True)
+
+    favorites_count = models.IntegerField(default=0)
+    readers_sketch = models.BinaryField(default=b'')
+    comments_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+
+    @property
+    def read_count(self):
+        """
+        The approximate number of distinct readers
+        """
+        return HyperLogLog(self.readers_sketch).count()
+
+    @property
+    def average_rating(self):
+        if self.rating_count:
+            return float('%.2f' % (self.rating_sum / self.rating_count))
+        return 0
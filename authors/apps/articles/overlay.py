@@ -0,0 +1,105 @@
+"""
+Per-viewer fields of articles.
+
+The representation of an article is split into a public document, the
+same for every reader and safe to cache and share, and a small overlay
+of the fields that depend on who is reading it. Overlays are loaded for
+a whole page of articles with one indexed lookup per field.
+"""
+from django.contrib.contenttypes.models import ContentType
+from vote.models import UP, Vote
+
+from .models import ArticleModel, FavoriteArticleModel
+from ..core.hyperloglog import HyperLogLog
+from ..highlights.models import HighlightsModel
+from ..highlights.serializers import HighlightsSerializer
+from ..ratings.models import Ratings
+
+# the overlay of anonymous readers, which the public document carries
+PUBLIC_OVERLAY = {
+    'favorited': False,
+    'user_rating': None,
+    'is_liked': False,
+    'highlights': None,
+    'read_count': None,
+}
+
+
+def public_overlay():
+    """
+    Return the overlay of an anonymous reader
+    """
+    return dict(PUBLIC_OVERLAY)
+
+
+def article_overlays(user, slugs):
+    """
+    Return the overlays of the articles with the given slugs for a
+    reader, keyed by slug. Articles that do not exist are left out,
+    except for anonymous readers, whose overlays need no lookups.
+    """
+    slugs = list(slugs)
+
+    if user.is_anonymous:
+        return {slug: public_overlay() for slug in slugs}
+
+    return viewer_overlays(user, [
+        (article_id, slug, HyperLogLog(sketch).count())
+        for (article_id, slug, sketch) in ArticleModel.objects.filter(
+            slug__in=slugs).values_list(
+            'id', 'slug', 'stats__readers_sketch')])
+
+
+def viewer_overlays(user, articles):
+    """
+    Return the overlays of articles given as (id, slug, read count)
+    rows for a reader, keyed by slug
+    """
+    if user.is_anonymous:
+        return {article[1]: public_overlay() for article in articles}
+
+    slug_of = {}
+    overlays = {}
+    for (article_id, slug, read_count) in articles:
+        slug_of[article_id] = slug
+        overlays[slug] = dict(public_overlay(), read_count=read_count)
+
+    ids = list(slug_of)
+    if not ids:
+        return overlays
+
+    for article_id in FavoriteArticleModel.objects.filter(
+            favoritor=user, article_id__in=ids).values_list(
+            'article_id', flat=True):
+        overlays[slug_of[article_id]]['favorited'] = True
+
+    for (article_id, rating) in Ratings.objects.filter(
+            rated_by=user, article_id__in=ids).values_list(
+            'article_id', 'rating'):
+        overlays[slug_of[article_id]]['user_rating'] = rating
+
+    for article_id in Vote.objects.filter(
+            user_id=user.id, action=UP, object_id__in=ids,
+            content_type=ContentType.objects.get_for_model(
+                ArticleModel)).values_list('object_id', flat=True):
+        overlays[slug_of[article_id]]['is_liked'] = True
+
+    highlights = {}
+    for highlight in HighlightsModel.objects.filter(
+            highlighted_by=user, article_id__in=ids).select_related(
+            'article', 'highlighted_by').order_by('id'):
+        highlights.setdefault(highlight.article_id, []).append(highlight)
+
+    for (article_id, article_highlights) in highlights.items():
+        overlays[slug_of[article_id]]['highlights'] = HighlightsSerializer(
+            article_highlights, many=True).data
+
+    return overlays
+
+
+def article_overlay(user, slug):
+    """
+    Return the overlay of an article for a reader, or None if the
+    article does not exist
+    """
+    return article_overlays(user, [slug]).get(slug)
@@ -0,0 +1,135 @@
+"""
+Buffered recording of article reads.
+
+Reads are collected in memory by each process and written in batches
+from a background thread, so showing an article never waits for a
+write. A batch is flushed when it reaches ARTICLE_READ_BUFFER_SIZE
+distinct reads, ARTICLE_READ_FLUSH_INTERVAL seconds after its first
+read, and when the process exits. Every batch is a single idempotent
+upsert, and its readers are added to the sketches that count them.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from .actions import add_readers
+from .models import ArticleModel, ReadStatsModel
+from ..authentication.models import User
+
+logger = logging.getLogger(__name__)
+
+# records the reads that are not yet stored
+INSERT_READS = """
+INSERT INTO {reads} (user_id, article_id, created_at)
+SELECT reads.user_id, reads.article_id, now()
+FROM unnest(%s::integer[], %s::integer[]) AS reads(user_id, article_id)
+WHERE EXISTS (SELECT 1 FROM {articles} WHERE id = reads.article_id)
+AND EXISTS (SELECT 1 FROM {users} WHERE id = reads.user_id)
+ON CONFLICT (user_id, article_id) DO NOTHING
+""".format(reads=ReadStatsModel._meta.db_table,
+           articles=ArticleModel._meta.db_table,
+           users=User._meta.db_table)
+
+
+def store_reads(reads):
+    """
+    Store (user id, article id) reads, ignoring those already stored
+    and those of deleted users or articles, and add them to the reader
+    sketches of their articles
+    """
+    if not reads:
+        return
+
+    user_ids, article_ids = zip(*reads)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(INSERT_READS, [list(user_ids), list(article_ids)])
+
+        add_readers(reads)
+
+
+class ReadBuffer:
+    """
+    The reads of a process that are waiting to be stored
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = set()
+        self.timer = None
+
+    def add(self, user_id, article_id):
+        """
+        Buffer a read, flushing the buffer right away once it is full
+        """
+        with self.lock:
+            self.reads.add((user_id, article_id))
+
+            if len(self.reads) >= settings.ARTICLE_READ_BUFFER_SIZE:
+                self.schedule(0)
+            elif self.timer is None:
+                self.schedule(settings.ARTICLE_READ_FLUSH_INTERVAL)
+
+    def schedule(self, delay):
+        """
+        Flush the buffer from a background thread after a delay
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+
+        self.timer = threading.Timer(delay, self.flush_later)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def take(self):
+        """
+        Empty the buffer and return the reads it held
+        """
+        with self.lock:
+            reads, self.reads = self.reads, set()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return reads
+
+    def flush(self):
+        """
+        Store the buffered reads, keeping them buffered if that fails
+        """
+        reads = self.take()
+
+        try:
+            store_reads(sorted(reads))
+        except DatabaseError:
+            logger.exception('Could not store %d article reads', len(reads))
+            with self.lock:
+                self.reads.update(reads)
+            raise
+
+    def flush_later(self):
+        """
+        Flush the buffer from the timer thread
+        """
+        try:
+            self.flush()
+        except DatabaseError:
+            pass
+        finally:
+            connection.close()
+
+
+read_buffer = ReadBuffer()
+
+
+@atexit.register
+def flush_on_exit():
+    """
+    Store the buffered reads when the process shuts down
+    """
+    try:
+        read_buffer.flush()
+    except DatabaseError:
+        pass
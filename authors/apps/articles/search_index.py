@@ -0,0 +1,632 @@
+"""
+Embedded inverted index of article text, used as a search backend
+where Postgres full text search is not available.
+
+The index is a directory of immutable segment files read through mmap
+and a manifest naming the live segments and the deleted articles.
+Saving an article writes a small segment holding its new text once the
+save is committed, which shadows the article in older segments; small
+segments are merged in a background thread as they pile up so that
+queries only ever open a few files. Replaced segments are removed only
+once the manifest no longer names them, and readers open the segments
+of a manifest under a shared lock, so they never find one missing.
+
+Segment layout (little endian):
+
+    header    magic, version, doc count, term count, term table offset
+    docs      doc count x (article id int64, weighted length uint32)
+    postings  per term, df x (doc ordinal uint32, weighted tf uint16)
+    terms     per term, (length uint16, utf-8 term, df uint32,
+              postings offset uint64), sorted by term
+    table     term count x (term entry offset uint64)
+"""
+import fcntl
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+MAGIC = b'AHIX'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQ')
+DOC = struct.Struct('<qI')
+POSTING = struct.Struct('<IH')
+TERM_LENGTH = struct.Struct('<H')
+TERM_INFO = struct.Struct('<IQ')
+OFFSET = struct.Struct('<Q')
+
+# a word in the title counts as much as three in the body
+FIELD_WEIGHTS = (('title', 3), ('description', 2), ('body', 1))
+
+TOKEN = re.compile(r'\w+')
+QUERY_TOKEN = re.compile(r'\w+\*?')
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text):
+    """
+    Split text into lower case terms
+    """
+    return TOKEN.findall((text or '').lower())
+
+
+def analyze(document):
+    """
+    Return the weighted term frequencies and length of an article,
+    given as a dictionary of its text fields
+    """
+    frequencies = Counter()
+    for (field, weight) in FIELD_WEIGHTS:
+        for term in tokenize(document.get(field)):
+            frequencies[term] += weight
+
+    return frequencies, sum(frequencies.values())
+
+
+def write_segment(path, docs, postings):
+    """
+    Write a segment file from a list of (article id, length) and a
+    dictionary of term to (doc ordinal, tf) lists
+    """
+    terms = sorted(postings, key=lambda term: term.encode('utf-8'))
+
+    with open(path + '.tmp', 'wb') as segment:
+        segment.write(b'\0' * HEADER.size)
+        for (article_id, length) in docs:
+            segment.write(DOC.pack(article_id, min(length, 0xffffffff)))
+
+        postings_offsets = []
+        for term in terms:
+            postings_offsets.append(segment.tell())
+            segment.write(b''.join(
+                POSTING.pack(ordinal, min(frequency, 0xffff))
+                for (ordinal, frequency) in postings[term]))
+
+        entry_offsets = []
+        for (term, postings_offset) in zip(terms, postings_offsets):
+            encoded = term.encode('utf-8')
+            entry_offsets.append(segment.tell())
+            segment.write(TERM_LENGTH.pack(len(encoded)) + encoded +
+                          TERM_INFO.pack(len(postings[term]),
+                                         postings_offset))
+
+        table_offset = segment.tell()
+        segment.write(b''.join(OFFSET.pack(offset)
+                               for offset in entry_offsets))
+
+        segment.seek(0)
+        segment.write(HEADER.pack(MAGIC, VERSION, len(docs), len(terms),
+                                  table_offset))
+        segment.flush()
+        os.fsync(segment.fileno())
+
+    os.replace(path + '.tmp', path)
+
+
+class SegmentBuilder:
+    """
+    Collects analyzed articles in memory to be written as one segment
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.postings = defaultdict(list)
+
+    def add(self, article_id, frequencies, length):
+        ordinal = len(self.docs)
+        self.docs.append((article_id, length))
+
+        for (term, frequency) in frequencies.items():
+            self.postings[term].append((ordinal, frequency))
+
+    def write(self, path):
+        write_segment(path, self.docs, self.postings)
+
+
+class Segment:
+    """
+    A segment file opened read only through mmap
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as segment:
+            self.map = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.doc_count, self.term_count,
+         self.table_offset) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a search index segment'.format(path))
+
+    def close(self):
+        self.map.close()
+
+    def doc(self, ordinal):
+        """
+        Return the (article id, length) of a document
+        """
+        return DOC.unpack_from(self.map, HEADER.size + ordinal * DOC.size)
+
+    def docs(self):
+        for ordinal in range(self.doc_count):
+            yield self.doc(ordinal)
+
+    def term(self, index):
+        """
+        Return the (term, df, postings offset) at a position of the
+        sorted term list
+        """
+        (offset,) = OFFSET.unpack_from(
+            self.map, self.table_offset + index * OFFSET.size)
+        (length,) = TERM_LENGTH.unpack_from(self.map, offset)
+        start = offset + TERM_LENGTH.size
+        encoded = self.map[start:start + length]
+
+        return (encoded,) + TERM_INFO.unpack_from(self.map, start + length)
+
+    def lower_bound(self, encoded):
+        """
+        Return the position of the first term not below a term
+        """
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle)[0] < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def expand(self, term, prefix=False):
+        """
+        Return the (term, df, postings offset) of a term, or of every
+        term starting with it
+        """
+        encoded = term.encode('utf-8')
+        index = self.lower_bound(encoded)
+
+        while index < self.term_count:
+            entry = self.term(index)
+            if entry[0] == encoded or (prefix and
+                                       entry[0].startswith(encoded)):
+                yield (entry[0].decode('utf-8'),) + entry[1:]
+            else:
+                break
+
+            if not prefix:
+                break
+            index += 1
+
+    def postings(self, df, offset):
+        """
+        Return the (doc ordinal, tf) list of a term
+        """
+        return [POSTING.unpack_from(self.map, offset + index * POSTING.size)
+                for index in range(df)]
+
+    def terms(self):
+        for index in range(self.term_count):
+            yield self.term(index)
+
+
+class Snapshot:
+    """
+    The segments of one generation of the manifest and their live
+    documents. Refreshing the index replaces its snapshot as a whole,
+    so searches in other threads keep reading the one they started
+    with, whose files stay mapped until it is released.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, generation, segments, deleted):
+        self.generation = generation
+        self.segments = segments
+
+        # newer segments shadow older copies of the same article
+        self.owners, self.lengths = {}, {}
+        for (position, segment) in reversed(list(enumerate(segments))):
+            for (article_id, length) in segment.docs():
+                if article_id not in self.owners:
+                    self.owners[article_id] = position
+                    self.lengths[article_id] = length
+
+        for article_id in deleted:
+            self.owners.pop(article_id, None)
+            self.lengths.pop(article_id, None)
+
+        self.average_length = (sum(self.lengths.values()) /
+                               len(self.lengths)) if self.lengths else 0
+
+    def live_postings(self, term, prefix=False):
+        """
+        Return the article id to tf dictionaries of the live documents
+        containing a term, or each term starting with it
+        """
+        expansions = defaultdict(dict)
+        for (position, segment) in enumerate(self.segments):
+            for (expanded, df, offset) in segment.expand(term, prefix):
+                for (ordinal, frequency) in segment.postings(df, offset):
+                    (article_id, _) = segment.doc(ordinal)
+                    if self.owners.get(article_id) == position:
+                        expansions[expanded][article_id] = frequency
+
+        return [postings for postings in expansions.values() if postings]
+
+    def score(self, postings):
+        """
+        Return the BM25 scores of the documents containing a term
+        """
+        count = len(self.lengths)
+        idf = math.log(1 + (count - len(postings) + 0.5) /
+                       (len(postings) + 0.5))
+
+        return {article_id: idf * frequency * (self.k1 + 1) / (
+            frequency + self.k1 * (1 - self.b + self.b *
+                                   self.lengths[article_id] /
+                                   self.average_length))
+                for (article_id, frequency) in postings.items()}
+
+
+class ArticleIndex:
+    """
+    The inverted index stored in a directory
+    """
+
+    max_segments = 8
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.snapshot = None
+        self.merging = threading.Lock()
+        self.merge_thread = None
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def lock(self, shared=False, name='lock'):
+        """
+        Serialize writers across processes, and keep them from removing
+        segments while readers open the ones named by the manifest. The
+        merge lock serializes merges and rebuilds instead.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(name), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def read_manifest(self):
+        try:
+            with open(self.path('manifest.json')) as manifest:
+                return json.load(manifest)
+        except FileNotFoundError:
+            return {'generation': 0, 'segments': [], 'deleted': []}
+
+    def write_manifest(self, manifest):
+        manifest['generation'] += 1
+        with open(self.path('manifest.json.tmp'), 'w') as output:
+            json.dump(manifest, output)
+        os.replace(self.path('manifest.json.tmp'), self.path('manifest.json'))
+
+    def new_segment_name(self):
+        return 'segment-{}.idx'.format(uuid.uuid4().hex)
+
+    def refresh(self):
+        """
+        Return the snapshot of the current manifest, taking a new one if
+        the manifest changed since the last was taken
+        """
+        snapshot = self.snapshot
+        if snapshot is not None and \
+                self.read_manifest()['generation'] == snapshot.generation:
+            return snapshot
+
+        with self.lock(shared=True):
+            manifest = self.read_manifest()
+            segments = [Segment(self.path(name))
+                        for name in manifest['segments']]
+
+        snapshot = Snapshot(manifest['generation'], segments,
+                            manifest['deleted'])
+        self.snapshot = snapshot
+        return snapshot
+
+    def search(self, query, limit=None):
+        """
+        Return the ids of the articles matching a query, best first.
+
+        Terms must all match unless separated by OR, and a term ending
+        with * matches every term it starts.
+        """
+        snapshot = self.refresh()
+        scores = {}
+
+        for clause in re.split(r'\s+OR\s+', query.strip()):
+            terms = [token.lower() for token in QUERY_TOKEN.findall(clause)
+                     if token != 'AND']
+            clause_scores = None
+
+            for term in terms:
+                term_scores = defaultdict(float)
+                for postings in snapshot.live_postings(term.rstrip('*'),
+                                                       term.endswith('*')):
+                    for (article_id, score) in \
+                            snapshot.score(postings).items():
+                        term_scores[article_id] += score
+
+                if clause_scores is None:
+                    clause_scores = term_scores
+                else:
+                    clause_scores = {
+                        article_id: score + term_scores[article_id]
+                        for (article_id, score) in clause_scores.items()
+                        if article_id in term_scores}
+
+            for (article_id, score) in (clause_scores or {}).items():
+                scores[article_id] = max(score, scores.get(article_id, 0))
+
+        ranked = sorted(scores, key=lambda article_id: (
+            -scores[article_id], -article_id))
+        return ranked[:limit] if limit else ranked
+
+    def add(self, documents):
+        """
+        Index new versions of articles, given as dictionaries with an
+        id and their text fields, and start merging the segments in the
+        background once there are too many
+        """
+        builder = SegmentBuilder()
+        for document in documents:
+            builder.add(document['id'], *analyze(document))
+
+        if not builder.docs:
+            return
+
+        name = self.new_segment_name()
+        builder.write(self.path(name))
+
+        with self.lock():
+            manifest = self.read_manifest()
+            manifest['segments'].append(name)
+            added = {article_id for (article_id, _) in builder.docs}
+            manifest['deleted'] = [article_id for article_id in
+                                   manifest['deleted']
+                                   if article_id not in added]
+            self.write_manifest(manifest)
+
+        if len(manifest['segments']) > self.max_segments:
+            self.merge_later()
+
+    def delete(self, article_ids):
+        """
+        Remove articles from the index
+        """
+        with self.lock():
+            manifest = self.read_manifest()
+            manifest['deleted'] = sorted(
+                set(manifest['deleted']) | set(article_ids))
+            self.write_manifest(manifest)
+
+    def remove(self, names):
+        """
+        Remove segments that the manifest no longer names
+        """
+        for name in names:
+            if os.path.exists(self.path(name)):
+                os.remove(self.path(name))
+
+    def merge(self):
+        """
+        Merge the segments written since the base segment into one once
+        there are too many, and into the base itself once they are a
+        tenth of its size. The merged segment is written holding only
+        the merge lock, so articles are indexed meanwhile, and the
+        writer lock is taken to swap it into the manifest.
+        """
+        with self.lock(name='merge.lock'):
+            manifest = self.read_manifest()
+            if len(manifest['segments']) <= self.max_segments:
+                return
+
+            segments = [Segment(self.path(name))
+                        for name in manifest['segments']]
+            first = 1
+            if sum(segment.doc_count for segment in segments[1:]) * 10 > \
+                    segments[0].doc_count:
+                first = 0
+
+            merged = self.new_segment_name()
+            deleted = set(manifest['deleted'])
+            self.merge_segments(segments[first:], deleted, self.path(merged))
+            for segment in segments:
+                segment.close()
+
+            names = manifest['segments'][first:]
+            with self.lock():
+                manifest = self.read_manifest()
+                newer = manifest['segments'][first + len(names):]
+                manifest['segments'] = (manifest['segments'][:first] +
+                                        [merged] + newer)
+
+                # the merged base holds none of the articles deleted when
+                # the merge started, unless they were indexed again since
+                if first == 0:
+                    indexed = self.article_ids(newer)
+                    manifest['deleted'] = [
+                        article_id for article_id in manifest['deleted']
+                        if article_id not in deleted or article_id in indexed]
+
+                self.write_manifest(manifest)
+                self.remove(names)
+
+    def merge_later(self):
+        """
+        Merge the segments from a background thread, unless this process
+        is merging them already
+        """
+        if not self.merging.acquire(blocking=False):
+            return
+
+        self.merge_thread = threading.Thread(target=self.merge_in_background)
+        self.merge_thread.daemon = True
+        self.merge_thread.start()
+
+    def merge_in_background(self):
+        try:
+            self.merge()
+        except Exception:
+            logger.exception('Could not merge the segments of %s',
+                             self.directory)
+        finally:
+            self.merging.release()
+
+    def article_ids(self, names):
+        """
+        Return the ids of the articles in the given segments
+        """
+        article_ids = set()
+        for name in names:
+            segment = Segment(self.path(name))
+            article_ids.update(article_id
+                               for (article_id, _) in segment.docs())
+            segment.close()
+        return article_ids
+
+    def merge_segments(self, segments, deleted, path):
+        """
+        Write the live documents of segments, oldest first, into one
+        segment without re-reading the articles
+        """
+        owners = {}
+        for (position, segment) in enumerate(segments):
+            for (ordinal, (article_id, _)) in enumerate(segment.docs()):
+                owners[article_id] = (position, ordinal)
+
+        docs, renumbered = [], {}
+        for (position, segment) in enumerate(segments):
+            for (ordinal, (article_id, length)) in enumerate(segment.docs()):
+                if owners[article_id] == (position, ordinal) and \
+                        article_id not in deleted:
+                    renumbered[(position, ordinal)] = len(docs)
+                    docs.append((article_id, length))
+
+        postings = defaultdict(list)
+        for (position, segment) in enumerate(segments):
+            for (encoded, df, offset) in segment.terms():
+                term = encoded.decode('utf-8')
+                for (ordinal, frequency) in segment.postings(df, offset):
+                    if (position, ordinal) in renumbered:
+                        postings[term].append(
+                            (renumbered[(position, ordinal)], frequency))
+
+        for term_postings in postings.values():
+            term_postings.sort()
+
+        write_segment(path, docs, postings)
+
+    def rebuild(self, documents, batch_size=10000):
+        """
+        Replace the whole index with the given articles, writing them
+        in batches and merging the batches into a single segment. The
+        writer lock is only taken to swap in the new segment, keeping
+        the articles indexed and deleted meanwhile.
+        """
+        with self.lock(name='merge.lock'):
+            started = self.read_manifest()
+            names, builder = [], SegmentBuilder()
+
+            for document in documents:
+                builder.add(document['id'], *analyze(document))
+                if len(builder.docs) >= batch_size:
+                    names.append(self.new_segment_name())
+                    builder.write(self.path(names[-1]))
+                    builder = SegmentBuilder()
+
+            names.append(self.new_segment_name())
+            builder.write(self.path(names[-1]))
+
+            if len(names) > 1:
+                segments = [Segment(self.path(name)) for name in names]
+                merged = self.new_segment_name()
+                self.merge_segments(segments, set(), self.path(merged))
+                for segment in segments:
+                    segment.close()
+                self.remove(names)
+                names = [merged]
+
+            with self.lock():
+                manifest = self.read_manifest()
+                replaced = [name for name in manifest['segments']
+                            if name in started['segments']]
+                manifest['segments'] = names + [
+                    name for name in manifest['segments']
+                    if name not in replaced]
+                manifest['deleted'] = [
+                    article_id for article_id in manifest['deleted']
+                    if article_id not in started['deleted']]
+
+                self.write_manifest(manifest)
+                self.remove(replaced)
+
+
+indexes = {}
+
+
+def get_index():
+    """
+    Return the article index of the configured directory
+    """
+    directory = settings.ARTICLE_SEARCH_INDEX_DIR
+    if directory not in indexes:
+        indexes[directory] = ArticleIndex(directory)
+    return indexes[directory]
+
+
+def index_enabled():
+    """
+    Whether the index is the configured search backend and so has to
+    be kept up to date
+    """
+    return issubclass(import_string(settings.ARTICLE_SEARCH_BACKEND),
+                      IndexSearchFilter)
+
+
+class IndexSearchFilter(filters.SearchFilter):
+    """
+    Search backend answering searches from the article index, ordered
+    by BM25 score
+    """
+
+    max_hits = 1000
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not self.get_search_terms(request):
+            return queryset
+
+        ids = get_index().search(query, limit=self.max_hits)
+
+        return queryset.filter(id__in=ids).annotate(
+            search_position=Case(
+                *[When(id=article_id, then=position)
+                  for (position, article_id) in enumerate(ids)],
+                output_field=IntegerField())
+        ).order_by('search_position')
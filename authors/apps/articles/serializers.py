@@ -2,43 +2,34 @@ from rest_framework import serializers
 from django.apps import apps
 from .models import (ArticleModel, FavoriteArticleModel,
                      BookmarkArticleModel, TagModel,
-                     CommentHistoryModel, CommentModel, ReadStatsModel)
+                     CommentHistoryModel, ReadStatsModel, TagStatsModel)
 from fluent_comments.models import FluentComment
-from .utils import user_object, configure_response, TagField
+from threadedcomments.models import PATH_SEPARATOR
+from .utils import TagField, CommentTree, article_stats
+from .overlay import article_overlay, viewer_overlays, public_overlay
+from .tags import set_tags
+from .votes import current_vote_counts
 from django.contrib.auth.models import AnonymousUser
-from django.db.models import Avg
-from authors.apps.ratings.models import Ratings
-from ..highlights.models import HighlightsModel
-from ..highlights.serializers import HighlightsSerializer
+from django.db.models import Manager, prefetch_related_objects
 
 from rest_framework.response import Response
 
 TABLE = apps.get_model('articles', 'ArticleModel')
 
 
-class RecursiveField(serializers.Serializer):
-    def to_representation(self, value):
-        serializer = self.parent.parent.__class__(
-            value,
-            context=self.context)  # pragma: no cover
-
-        response = serializer.data     # pragma: no cover
-        response['author'] = user_object(
-            response['user_id'])    # pragma: no cover
-
-        comment_votes = CommentModel.objects.filter(
-            comment=response['id']).first()
-
-        response['votes'] = comment_votes.vote_score   # pragma: no cover
-        response['num_vote_down'] = comment_votes.num_vote_down     # pragma: no cover
-        response['num_vote_up'] = comment_votes.num_vote_up      # pragma: no cover
-        del response['user_id']   # pragma: no cover
-
-        return response
+class CommentSerializer(serializers.ModelSerializer):
+    children = serializers.SerializerMethodField()
 
+    def get_children(self, obj):
+        """
+        Return the replies to a comment, loading its whole subtree by
+        tree path in a single query
+        """
+        subtree = FluentComment.objects.filter(
+            object_pk=obj.object_pk,
+            tree_path__startswith=obj.tree_path + PATH_SEPARATOR)
 
-class CommentSerializer(serializers.ModelSerializer):
-    children = RecursiveField(many=True, required=False)
+        return CommentTree(subtree).replies(obj.id)
 
     class Meta:
         model = FluentComment
@@ -51,8 +42,50 @@ class CommentSerializer(serializers.ModelSerializer):
             'user_id',)
 
 
+class ArticleListSerializer(serializers.ListSerializer):
+    """
+    Serializes a page of articles without their bodies, loading the
+    comments and the per-viewer fields of the whole page in a fixed
+    number of queries instead of once per article
+    """
+
+    def to_representation(self, data):
+        articles = list(data.all() if isinstance(data, Manager) else data)
+        self.prefetched = self.prefetch(articles)
+
+        return super().to_representation(articles)
+
+    def prefetch(self, articles):
+        """
+        Load the related data of all articles, keyed by article id
+        """
+        prefetch_related_objects(articles, 'tag_list', 'stats')
+
+        slugs = [article.slug for article in articles]
+        comments = CommentTree(
+            FluentComment.objects.filter(object_pk__in=slugs)).threads()
+
+        user = self.context['request'].user
+        if self.context.get('public'):
+            user = AnonymousUser()
+
+        overlays = viewer_overlays(user, [
+            (article.id, article.slug, article_stats(article).read_count)
+            for article in articles])
+
+        return {article.id: {
+            'comments': comments.get(article.slug, []),
+            'overlay': overlays.get(article.slug, public_overlay()),
+        } for article in articles}
+
+
 class ArticleSerializer(serializers.ModelSerializer):
-    """The article serializer."""
+    """
+    The article serializer.
+
+    The fields that depend on the reader come from its overlay, which
+    is left at the anonymous values when the context is marked public.
+    """
     comments = serializers.SerializerMethodField()
     favorited = serializers.SerializerMethodField()
     favorites_count = serializers.SerializerMethodField()
@@ -69,7 +102,7 @@ class ArticleSerializer(serializers.ModelSerializer):
         required=False
     )
     read_count = serializers.SerializerMethodField()
-    article_readers = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
 
     class Meta:
         model = TABLE
@@ -97,119 +130,127 @@ class ArticleSerializer(serializers.ModelSerializer):
             'facebook',
             'mail',
             'readtime',
+            'word_count',
+            'excerpt',
             'highlights',
             'read_count',
-            'article_readers',
             'is_liked',
         )
         lookup_field = 'slug'
         extra_kwargs = {'url': {'lookup_field': 'slug'}}
+        read_only_fields = ('readtime', 'word_count', 'excerpt')
+        list_serializer_class = ArticleListSerializer
 
-    def get_comments(self, obj):
-        comment = FluentComment.objects.filter(
-            object_pk=obj.slug, parent_id=None)
-        serializer = CommentSerializer(comment, many=True)
+    def get_fields(self):
+        """
+        Leave the body out of article listings, which show the excerpt
+        """
+        fields = super().get_fields()
+        if isinstance(self.parent, ArticleListSerializer):
+            del fields['body']
+        return fields
 
-        data = configure_response(serializer)
+    def create(self, validated_data):
+        """
+        Create an article, linking its tags in bulk
+        """
+        tags = validated_data.pop('tag_list', None)
+        article = super().create(validated_data)
 
-        return data
+        if tags:
+            set_tags(article, tags, created=True)
+        return article
 
-    def get_favorited(self, obj):
+    def update(self, instance, validated_data):
+        """
+        Update an article, only changing the tags that differ
+        """
+        tags = validated_data.pop('tag_list', None)
+        article = super().update(instance, validated_data)
 
-        if self.check_anonymous():
-            return False
+        if tags is not None:
+            set_tags(article, tags)
+        return article
 
-        favorited = FavoriteArticleModel.objects.filter(
-            article=obj,
-            favoritor=self.context['request'].user)
+    def to_representation(self, instance):
+        """
+        Represent an article with the vote changes not yet stored
+        """
+        response = super().to_representation(instance)
+        if 'vote_score' in response:
+            response.update(current_vote_counts(instance))
+        return response
 
-        if favorited:
-            return True
-        return False
+    def get_prefetched(self, obj):
+        """
+        Get the data loaded up front for this article when serializing
+        a page of articles, if any
+        """
+        prefetched = getattr(self.parent, 'prefetched', None)
+        if prefetched is not None:
+            return prefetched.get(obj.id)
 
-    def check_anonymous(self):
+    def get_overlay(self, obj):
         """
-        Check if the current user is authenticated
+        Get the per-viewer fields of an article
         """
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return True
-        return False
+        prefetched = self.get_prefetched(obj)
+        if prefetched is not None:
+            return prefetched['overlay']
 
-    def get_favorites_count(self, obj):
+        if not hasattr(self, 'overlays'):
+            self.overlays = {}
+
+        if obj.slug not in self.overlays:
+            if self.context.get('public'):
+                self.overlays[obj.slug] = public_overlay()
+            else:
+                self.overlays[obj.slug] = article_overlay(
+                    self.context['request'].user,
+                    obj.slug) or public_overlay()
 
-        favorited_articles = FavoriteArticleModel.objects.all().filter(
-            article=obj).count()
-        return favorited_articles
+        return self.overlays[obj.slug]
+
+    def get_comments(self, obj):
+        prefetched = self.get_prefetched(obj)
+        if prefetched is not None:
+            return prefetched['comments']
+
+        comments = CommentTree(
+            FluentComment.objects.filter(object_pk=obj.slug)).threads()
+
+        return comments.get(obj.slug, [])
+
+    def get_favorited(self, obj):
+        return self.get_overlay(obj)['favorited']
+
+    def get_favorites_count(self, obj):
+        return article_stats(obj).favorites_count
 
     def rating(self, obj):
         """
         Get the average rating of an article
         """
-        average_rate = Ratings.objects.filter(article=obj,
-                                              ).aggregate(rate=Avg('rating'))
-
-        if average_rate["rate"]:
-            return float('%.2f' % (average_rate["rate"]))
-        return 0
+        return article_stats(obj).average_rating
 
     def get_user_rating(self, obj):
         """
         Get the rating of the logged in user
         """
-        if not self.check_anonymous():
-            request = self.context.get('request')
-            rating = Ratings.objects.filter(
-                article=obj, rated_by=request.user).first()
-            if rating:
-                return rating.rating
+        return self.get_overlay(obj)['user_rating']
 
     def get_highlights(self, obj):
+        return self.get_overlay(obj)['highlights']
 
-        if self.check_anonymous():
-            return None
-
-        highlighted = HighlightsModel.objects.filter(
-            article=obj,
-            highlighted_by=self.context['request'].user)
-
-        if highlighted:
-            serializer = HighlightsSerializer(
-                highlighted, many=True)    # pragma: no cover
-            return serializer.data
-
-        return None
+    def get_is_liked(self, obj):
+        return self.get_overlay(obj)['is_liked']
 
     def get_read_count(self, obj):
         """
-        Return the number of people who have read an article
-        This is visible to all logged in users
-        """
-        if not self.check_anonymous():
-            read = ReadStatsModel.objects.filter(article=obj).count()
-
-            if read:
-                return read
-            return 0
-        return None
-
-    def get_article_readers(self, obj):
+        Return the approximate number of people who have read an
+        article. This is visible to all logged in users
         """
-        Get the usernames of people who have read an article
-        This is only visible to the author of the article
-        """
-        if self.check_anonymous():
-            return None
-
-        request = self.context.get('request')
-
-        if request.user != obj.author:
-            return None
-
-        read = ReadStatsModel.objects.filter(article=obj)
-        users = [x.user.username for x in read]
-
-        return users
+        return self.get_overlay(obj)['read_count']
 
 
 class FavoriteArticleSerializer(serializers.ModelSerializer):
@@ -237,6 +278,17 @@ class FavoriteArticleSerializer(serializers.ModelSerializer):
         return obj.article.slug
 
 
+class ArticleReaderSerializer(serializers.ModelSerializer):
+    """Article reader serializer."""
+
+    username = serializers.ReadOnlyField(source='user.username')
+    read_at = serializers.ReadOnlyField(source='created_at')
+
+    class Meta:
+        model = ReadStatsModel
+        fields = ['username', 'read_at']
+
+
 class BookmarkArticleSerializer(serializers.ModelSerializer):
     """Bookmark article serializer."""
 
@@ -253,14 +305,12 @@ class BookmarkArticleSerializer(serializers.ModelSerializer):
 
 
 class TagSerializer(serializers.ModelSerializer):
-    """Tag an article serializer"""
+    """Tag catalogue entry serializer"""
+    tagname = serializers.CharField(source='tag.tagname')
 
     class Meta:
-        model = TagModel
-        fields = ('tagname',)
-
-    def to_representation(self, instance):
-        return instance.tagname
+        model = TagStatsModel
+        fields = ('tagname', 'article_count')
 
 
 class CommentHistorySerializer(serializers.ModelSerializer):
@@ -0,0 +1,68 @@
+"""
+Allocation of unique article slugs.
+
+A slug is the slugified title, followed by the next free number when
+that is taken. The next number is found with one query over the slugs
+sharing the title's prefix, including those that renamed articles gave
+up so that their old links keep leading to them, and allocations for
+titles of the same family are serialized with a transaction level
+advisory lock, so that concurrent creates cannot pick the same slug.
+"""
+import re
+
+from django.db import connection
+from django.utils.text import slugify
+
+# room left after the title for a separator and a number
+SUFFIX_LENGTH = 12
+
+ALLOCATE_SLUG = """
+SELECT bool_or(slug = %(base)s),
+       max(substring(slug from %(number)s)::bigint)
+FROM (
+    SELECT slug FROM {articles}
+    WHERE (slug = %(base)s OR slug LIKE %(pattern)s)
+    AND id IS DISTINCT FROM %(article)s
+    UNION ALL
+    SELECT slug FROM {history}
+    WHERE (slug = %(base)s OR slug LIKE %(pattern)s)
+    AND article_id IS DISTINCT FROM %(article)s
+) slugs
+"""
+
+
+def title_slug(article):
+    """
+    Return the slug of an article's title, without a number
+    """
+    field = article._meta.get_field('slug')
+    slug = slugify(article.title or '')[:field.max_length - SUFFIX_LENGTH]
+
+    return slug.strip('-') or article._meta.model_name
+
+
+def allocate_slug(article):
+    """
+    Return a free slug for an article. It must be called in the
+    transaction that saves the article, which holds the lock taken here
+    until it commits.
+    """
+    base = title_slug(article)
+    family = re.sub(r'-[0-9]+$', '', base)
+    pattern = base.replace('_', '\\_') + '-%'
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))',
+                       ['articles:slug:' + family])
+        cursor.execute(
+            ALLOCATE_SLUG.format(
+                articles=article._meta.db_table,
+                history=article._meta.get_field(
+                    'old_slugs').related_model._meta.db_table),
+            {'base': base, 'number': '^{}-([0-9]{{1,18}})$'.format(base),
+             'pattern': pattern, 'article': article.pk})
+        taken, last = cursor.fetchone()
+
+    if not taken:
+        return base
+    return '{}-{}'.format(base, max(last or 1, 1) + 1)
@@ -0,0 +1,261 @@
+"""
+Resolution of tag names to tags.
+
+Tag lists are resolved in bulk: the names missing from an in-process
+LRU cache of tag ids are looked up with one query, and those that do
+not exist are created with one insert that leaves tags created
+concurrently alone. A cached id can outlive its tag, when the tag is
+deleted or the transaction creating it rolls back, so tags are linked
+to articles by a statement that skips unknown ids, and the names of
+those are resolved again.
+
+The m2m_changed signals of tag changes carry the ids of the tags that
+were actually linked or unlinked, which keep the article counts of
+tags exact.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.signals import m2m_changed
+
+from . import models
+
+# creates the tags of names, returning those not created concurrently
+INSERT_TAGS = """
+INSERT INTO {tags} (tagname) SELECT unnest(%s::varchar[])
+ON CONFLICT (tagname) DO NOTHING
+RETURNING tagname, id
+"""
+
+# links tags to an article in the given order, returning the ids of
+# the tags that exist and whether this linked them
+LINK_TAGS = """
+WITH tags AS (
+    SELECT tags.id, wanted.position
+    FROM unnest(%s::integer[]) WITH ORDINALITY AS wanted(id, position)
+    JOIN {tags} tags ON tags.id = wanted.id
+), links AS (
+    INSERT INTO {through} (articlemodel_id, tagmodel_id)
+    SELECT %s, id FROM tags ORDER BY position
+    ON CONFLICT DO NOTHING
+    RETURNING tagmodel_id
+)
+SELECT tags.id, links.tagmodel_id IS NOT NULL
+FROM tags LEFT JOIN links ON links.tagmodel_id = tags.id
+"""
+
+# unlinks tags from an article, returning the ids of those it had
+UNLINK_TAGS = """
+DELETE FROM {through} WHERE articlemodel_id = %s AND tagmodel_id = ANY(%s)
+RETURNING tagmodel_id
+"""
+
+# adds to the article counts of tags, in tag order so that concurrent
+# changes lock the counts in the same order
+COUNT_TAGS = """
+INSERT INTO {stats} (tag_id, article_count)
+SELECT changes.tag_id, changes.change
+FROM unnest(%s::integer[], %s::integer[]) AS changes(tag_id, change)
+WHERE EXISTS (SELECT 1 FROM {tags} WHERE id = changes.tag_id)
+ORDER BY changes.tag_id
+ON CONFLICT (tag_id) DO UPDATE
+SET article_count = {stats}.article_count + EXCLUDED.article_count
+"""
+
+
+class TagCache:
+    """
+    The ids of the most recently used tag names of a process
+    """
+
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.size = size
+        self.ids = OrderedDict()
+
+    def get_many(self, names):
+        """
+        Return the cached ids of the given names
+        """
+        found = {}
+        with self.lock:
+            for name in names:
+                if name in self.ids:
+                    self.ids.move_to_end(name)
+                    found[name] = self.ids[name]
+        return found
+
+    def set_many(self, ids):
+        """
+        Cache the ids of tag names, evicting the least recently used
+        """
+        with self.lock:
+            for name, tag_id in ids.items():
+                self.ids[name] = tag_id
+                self.ids.move_to_end(name)
+
+            while len(self.ids) > self.size:
+                self.ids.popitem(last=False)
+
+    def discard(self, names):
+        """
+        Forget the ids of the given names
+        """
+        with self.lock:
+            for name in names:
+                self.ids.pop(name, None)
+
+    def clear(self):
+        """
+        Forget every cached id
+        """
+        with self.lock:
+            self.ids.clear()
+
+
+tag_cache = TagCache(settings.TAG_CACHE_SIZE)
+
+
+def tag_links():
+    """
+    Return the model linking articles to their tags
+    """
+    return models.ArticleModel.tag_list.through
+
+
+def lookup_tags(names):
+    """
+    Return the ids of tag names from the database, creating the tags
+    that do not exist
+    """
+    ids = dict(models.TagModel.objects.filter(
+        tagname__in=names).values_list('tagname', 'id'))
+    missing = [name for name in names if name not in ids]
+
+    if missing:
+        with connection.cursor() as cursor:
+            cursor.execute(INSERT_TAGS.format(
+                tags=models.TagModel._meta.db_table), [missing])
+            ids.update(cursor.fetchall())
+
+        if len(ids) < len(names):
+            ids.update(models.TagModel.objects.filter(
+                tagname__in=missing).values_list('tagname', 'id'))
+
+    tag_cache.set_many(ids)
+    return ids
+
+
+def find_tags(names):
+    """
+    Return the ids of the tags of names that exist, without creating
+    any
+    """
+    ids = tag_cache.get_many(names)
+    missing = [name for name in names if name not in ids]
+
+    if missing:
+        found = dict(models.TagModel.objects.filter(
+            tagname__in=missing).values_list('tagname', 'id'))
+        tag_cache.set_many(found)
+        ids.update(found)
+
+    return ids
+
+
+def resolve_tags(names):
+    """
+    Return the tags of a list of names, in order and without repeats,
+    creating those that do not exist
+    """
+    names = list(OrderedDict.fromkeys(names))
+    ids = tag_cache.get_many(names)
+    missing = [name for name in names if name not in ids]
+
+    if missing:
+        ids.update(lookup_tags(missing))
+
+    return [models.TagModel(id=ids[name], tagname=name) for name in names]
+
+
+def send_tags_changed(article, action, tag_ids):
+    """
+    Send the m2m_changed signal of a change to the tags of an article
+    """
+    m2m_changed.send(sender=tag_links(), action=action, instance=article,
+                     reverse=False, model=models.TagModel, pk_set=tag_ids,
+                     using=connection.alias)
+
+
+def link_tags(article, tags):
+    """
+    Link tags to an article, returning the ids of those that exist and
+    of those this linked
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            LINK_TAGS.format(tags=models.TagModel._meta.db_table,
+                             through=tag_links()._meta.db_table),
+            [[tag.id for tag in tags], article.id])
+        rows = cursor.fetchall()
+
+    return ({tag_id for (tag_id, _) in rows},
+            {tag_id for (tag_id, linked) in rows if linked})
+
+
+def unlink_tags(article, tag_ids):
+    """
+    Unlink tags from an article, returning the ids of those it had
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(UNLINK_TAGS.format(through=tag_links()._meta.db_table),
+                       [article.id, sorted(tag_ids)])
+        return {tag_id for tag_id, in cursor.fetchall()}
+
+
+def update_tag_counts(changes):
+    """
+    Add {tag id: change} changes to the article counts of tags
+    """
+    changes = {tag_id: change for (tag_id, change) in changes.items()
+               if change}
+    if not changes:
+        return
+
+    tag_ids, counts = zip(*sorted(changes.items()))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            COUNT_TAGS.format(stats=models.TagStatsModel._meta.db_table,
+                              tags=models.TagModel._meta.db_table),
+            [list(tag_ids), list(counts)])
+
+
+def set_tags(article, tags, created=False):
+    """
+    Give an article the given tags, only unlinking the tags it no longer
+    has and linking the ones it did not have
+    """
+    current = set() if created else set(tag_links().objects.filter(
+        articlemodel_id=article.id).values_list('tagmodel_id', flat=True))
+    removed = current - {tag.id for tag in tags}
+    added = [tag for tag in tags if tag.id not in current]
+
+    if removed:
+        send_tags_changed(article, 'pre_remove', removed)
+        removed = unlink_tags(article, removed)
+        send_tags_changed(article, 'post_remove', removed)
+
+    if added:
+        send_tags_changed(article, 'pre_add', {tag.id for tag in added})
+        found, linked = link_tags(article, added)
+
+        stale = [tag.tagname for tag in added if tag.id not in found]
+        if stale:
+            tag_cache.discard(stale)
+            linked |= link_tags(article, resolve_tags(stale))[1]
+
+        send_tags_changed(article, 'post_add', linked)
+
+    getattr(article, '_prefetched_objects_cache', {}).pop('tag_list', None)
@@ -0,0 +1,49 @@
+"""
+Reading metrics and fingerprints of article text
+"""
+import hashlib
+import re
+
+import readtime
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 40
+
+
+def body_hash(body):
+    """
+    Return the content hash of an article body
+    """
+    return hashlib.sha256((body or '').encode()).hexdigest()
+
+
+def normalize(text):
+    """
+    Return text lowercased with its whitespace collapsed
+    """
+    return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+
+def content_fingerprint(title, body):
+    """
+    Return the fingerprint of an article's title and body, which is
+    the same for copies that only differ in case or whitespace
+    """
+    content = '{}\0{}'.format(normalize(title), normalize(body))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def measure_text(body):
+    """
+    Return the stored reading metrics of an article body: its hash,
+    word count, read time and plain text excerpt
+    """
+    text = re.sub(r'\s+', ' ', strip_tags(body or '')).strip()
+
+    return {
+        'body_hash': body_hash(body),
+        'word_count': len(text.split()),
+        'readtime': readtime.of_text(text).text,
+        'excerpt': Truncator(text).words(EXCERPT_WORDS),
+    }
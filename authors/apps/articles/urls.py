@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework import routers
 from .views import (ArticleView, CommentView, LikeView,
                     DisLikeView, FavoriteArticle, ArticleList,
-                    BookmarkArticleView, TagViewSet, CommentLikeView, CommentDisLikeView, CommentHistory)
+                    BookmarkArticleView, TagViewSet, CommentLikeView, CommentDisLikeView, CommentHistory,
+                    ArticleReadersView)
 
 
 router = routers.DefaultRouter()
@@ -26,5 +27,6 @@ urlpatterns = [
                                                                    'get': 'list',
                                                                    'delete': 'destroy'})),
     path('tags/', TagViewSet.as_view()),
-    path('articles/<slug>/comments/<int:id>/history/', CommentHistory.as_view())
+    path('articles/<slug>/comments/<int:id>/history/', CommentHistory.as_view()),
+    path('articles/<slug>/readers/', ArticleReadersView.as_view()),
 ]
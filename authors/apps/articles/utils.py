@@ -1,66 +1,59 @@
 """
 Helper functions and classes for articles
 """
-import datetime
 import re
-import cloudinary.uploader
+from collections import defaultdict
 from django_filters import (
     FilterSet, rest_framework)
-from rest_framework import serializers
+from django.contrib.postgres.lookups import PostgresSimpleLookup
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import (CharField, Count, F, FloatField, Func,
+                              Lookup, Q, Value)
+from rest_framework import filters, serializers
 from fluent_comments.models import FluentComment
 from rest_framework.exceptions import (ValidationError, NotFound)
-from .models import (ArticleModel, TagModel,
-                     CommentModel, ReadStatsModel, User)
+from rest_framework.relations import MANY_RELATION_KWARGS
+from .models import (ArticleModel, TagModel, ArticleStatsModel,
+                     CommentModel, User)
+from .reads import read_buffer
+from .tags import find_tags, resolve_tags, tag_links
+from .votes import current_vote_counts
+from ..core.uploads import ImageUpload, is_image
 from ..profiles.models import UserProfile
 
 
 def ImageUploader(image):
     """
-    Upload image to cloudinary
+    Spool an image to be uploaded in the background
     :param image: FILE from post request
-    :return: uploaded image data if image was uploaded successfully else None
+    :return: the pending upload if the file is an image else the error
     """
 
-    if not str(image.name).endswith(('.png', '.jpg', '.jpeg')):
+    if not is_image(image):
         return {"status": 400, "error": ["Ensure that the file is an image"]}
 
-    try:
-        image_data = cloudinary.uploader.upload(
-            image,
-            public_id=str(datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                          .replace("-", "")
-                          .replace(":", "")
-                          .replace(" ", "")),
-            crop='limit',
-            width=2000,
-            height=2000,
-            eager=[
-                {'width': 200, 'height': 200,
-                 'crop': 'thumb', 'gravity': 'face',
-                 'radius': 20, 'effect': 'sepia'},
-                {'width': 100, 'height': 150,
-                 'crop': 'fit', 'format': 'png'}
-            ]
-        )
-        return image_data
-
-    except Exception as e:
-        return {"status": e.status_code,
-                "error": e.__dict__}
+    return ImageUpload(image)
 
 
-def user_object(uid):
+def user_card(instance):
     """
-    Function for getting user object
+    Function for building the author card of a user profile
     """
-    instance = UserProfile.objects.filter(id=uid)[0]
-    user = {
+    return {
         'id': instance.id,
         'email': instance.user.email,
         'username': instance.user.username,
         'image': instance.image,
     }
 
+
+def user_object(uid):
+    """
+    Function for getting user object
+    """
+    instance = UserProfile.objects.filter(id=uid)[0]
+    user = user_card(instance)
+
     try:
         user.bio = instance.bio
     except:
@@ -76,25 +69,74 @@ def user_object(uid):
     return user
 
 
-def configure_response(serializer):
-    """Function to configure response with a user information"""
+def user_objects(uids):
+    """
+    Function for getting the user objects of many users in one query
+    :return: dictionary of user objects keyed by id
+    """
+    profiles = UserProfile.objects.select_related('user').filter(
+        id__in=set(uids))
+
+    return {profile.id: user_card(profile) for profile in profiles}
+
+
+class CommentTree:
+    """
+    Nested comment responses assembled in memory. The comments are
+    loaded in a single query ordered by their materialized tree path, so
+    every reply follows its parent, and their votes and authors are
+    attached with one query each
+    """
 
-    dictionary = None
-    data = []
-    for comment in serializer.data:
-        dictionary = dict(comment)
+    def __init__(self, comments):
+        self.comments = list(comments.order_by('tree_path'))
+        self.votes = {vote.comment_id: vote for vote in
+                      CommentModel.objects.filter(comment_id__in=[
+                          comment.id for comment in self.comments])}
+        self.authors = user_objects(
+            comment.user_id for comment in self.comments)
+        self.date_field = serializers.DateTimeField()
 
-        comment_votes = CommentModel.objects.filter(
-            comment=dictionary['id']).first()
+        self.children = defaultdict(list)
+        for comment in self.comments:
+            self.children[comment.parent_id].append(comment)
+
+    def represent(self, comment, score_key='votes'):
+        """
+        Return the response of a comment with its replies nested
+        """
+        response = {
+            'id': comment.id,
+            'comment': comment.comment,
+            'children': self.replies(comment.id),
+            'submit_date': self.date_field.to_representation(
+                comment.submit_date),
+            'author': self.authors.get(comment.user_id),
+        }
 
-        dictionary['author'] = user_object(dictionary['user_id'])
+        comment_votes = self.votes.get(comment.id)
         if comment_votes:
-            dictionary['votes_score'] = comment_votes.vote_score
-            dictionary['num_vote_down'] = comment_votes.num_vote_down
-            dictionary['num_vote_up'] = comment_votes.num_vote_up
-        del dictionary['user_id']
-        data.append(dictionary)
-    return data
+            votes = current_vote_counts(comment_votes)
+            response[score_key] = votes['vote_score']
+            response['num_vote_down'] = votes['num_vote_down']
+            response['num_vote_up'] = votes['num_vote_up']
+        return response
+
+    def replies(self, parent_id):
+        """
+        Return the responses of the replies to a comment
+        """
+        return [self.represent(child) for child in self.children[parent_id]]
+
+    def threads(self):
+        """
+        Return the top level comment responses keyed by article slug
+        """
+        threads = defaultdict(list)
+        for comment in self.children[None]:
+            threads[comment.object_pk].append(
+                self.represent(comment, 'votes_score'))
+        return threads
 
 
 def add_social_share(request):
@@ -113,16 +155,62 @@ def add_social_share(request):
     return request
 
 
-def save_read_stat(request, article):
-    """ Save a read statitic to db if it does not exist"""
+def save_read_stat(request, article_id):
+    """
+    Buffer a read statistic, which is stored later if it does not exist
+    """
     if not request.user.is_anonymous:
-        existing_read = ReadStatsModel.objects.all().filter(
-            user=request.user, article=article
-        )
+        read_buffer.add(request.user.id, article_id)
+
+
+def article_stats(article):
+    """
+    Function for getting the engagement counters of an article
+    """
+    try:
+        return article.stats
+    except ArticleStatsModel.DoesNotExist:
+        return ArticleStatsModel(article=article)
+
+
+@CharField.register_lookup
+class TrigramContains(PostgresSimpleLookup):
+    """
+    Matches text containing the given value in any case, with an ILIKE
+    on the column itself, which a trigram index on it can answer
+    """
+    lookup_name = 'trigram_contains'
+    operator = 'ILIKE'
+
+    def get_db_prep_lookup(self, value, connection):
+        return ('%s', ['%{}%'.format(
+            connection.ops.prep_for_like_query(value))])
+
+
+@CharField.register_lookup
+class TrigramWordSimilar(Lookup):
+    """
+    Matches text containing a word similar to the given value, which a
+    trigram index on the column can answer. The value is put on the
+    left of <%, as the planner only matches that form to the index.
+    """
+    lookup_name = 'trigram_word_similar'
 
-        if not existing_read:
-            ReadStatsModel.objects.create(
-                user=request.user, article=article)
+    def as_sql(self, qn, connection):
+        lhs, lhs_params = self.process_lhs(qn, connection)
+        rhs, rhs_params = self.process_rhs(qn, connection)
+        return '%s <%%%% %s' % (rhs, lhs), rhs_params + lhs_params
+
+
+class TrigramWordSimilarity(Func):
+    """
+    How closely the given value matches a word of a text column
+    """
+    function = 'WORD_SIMILARITY'
+
+    def __init__(self, string, expression, **extra):
+        super().__init__(Value(string), expression,
+                         output_field=FloatField(), **extra)
 
 
 class ArticleFilter(FilterSet):
@@ -130,27 +218,119 @@ class ArticleFilter(FilterSet):
     Custom filter class for articles
     """
     title = rest_framework.CharFilter('title',
-                                      lookup_expr='icontains')
+                                      method='similar_filter')
     author = rest_framework.CharFilter('author__username',
-                                       lookup_expr='icontains')
-    tag = rest_framework.CharFilter('tag_list',
-                                    lookup_expr='iexact',
-                                    method='m2mfilter')
+                                       method='author_filter')
+    author_id = rest_framework.NumberFilter('author_id')
+    tag = rest_framework.CharFilter('tag_list', method='m2mfilter')
+    tag_mode = rest_framework.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')), method='tag_mode_filter')
 
     class Meta:
         model = ArticleModel
-        fields = ("title", "author", "tag")
+        fields = ("title", "author", "author_id", "tag", "tag_mode")
 
-    def m2mfilter(self, qs, tags, value):
+    def similar_filter(self, qs, field, value):
         """
-        Custom filter for the manytomany tag_list field
+        Custom filter for text containing the value or a word similar
+        to it, most similar first
         """
 
         if not value:
             return qs
 
-        values = value.split(',')
-        return qs.filter(tag_list__tagname__in=values).distinct()
+        return qs.filter(
+            Q(**{field + '__trigram_contains': value}) |
+            Q(**{field + '__trigram_word_similar': value})
+        ).annotate(
+            similarity=TrigramWordSimilarity(value, field)
+        ).order_by('-similarity', '-created_at', '-id')
+
+    def author_filter(self, qs, field, value):
+        """
+        Custom filter for the author, by id when the username matches
+        exactly and by similar usernames otherwise
+        """
+
+        author_id = User.objects.filter(
+            username=value).values_list('id', flat=True).first()
+        if author_id is not None:
+            return qs.filter(author_id=author_id)
+
+        return self.similar_filter(qs, field, value)
+
+    def m2mfilter(self, qs, tags, value):
+        """
+        Custom filter for the manytomany tag_list field, for articles
+        with any of the comma separated tags, or all of them when
+        `tag_mode` is `all`. The tags are matched by id against the
+        (tag, article) index of the links, so every article is found
+        once without a DISTINCT.
+        """
+
+        names = list(filter(None, (name.strip()
+                                   for name in value.split(','))))
+        if not names:
+            return qs
+
+        tag_ids = set(find_tags(names).values())
+        links = tag_links().objects.filter(tagmodel_id__in=tag_ids)
+
+        if self.form.cleaned_data.get('tag_mode') == 'all':
+            if len(tag_ids) < len(set(names)):
+                return qs.none()
+
+            links = links.values('articlemodel_id').annotate(
+                matched=Count('tagmodel_id')).filter(matched=len(tag_ids))
+
+        return qs.filter(id__in=links.values('articlemodel_id'))
+
+    def tag_mode_filter(self, qs, field, value):
+        """
+        The mode of the tag filter, which applies it
+        """
+
+        return qs
+
+
+class ArticleSearchFilter(filters.SearchFilter):
+    """
+    Full text search over the weighted search vector of articles,
+    ordered by relevance. Articles whose author's username is one of
+    the search terms match as well
+    """
+
+    search_config = 'english'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        query = SearchQuery(' '.join(terms), config=self.search_config)
+        authors = User.objects.filter(
+            username__in=terms).values_list('id', flat=True)
+
+        return queryset.filter(
+            Q(search_vector=query) | Q(author_id__in=list(authors))
+        ).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-created_at', '-id')
+
+
+class TagListField(serializers.ManyRelatedField):
+    """
+    Related field for a list of tags, resolving all the names of the
+    list at once
+    """
+
+    def to_internal_value(self, data):
+        """
+        Validate a list of tag names and return its tags
+        """
+        names = [name for name in super().to_internal_value(data) if name]
+
+        return resolve_tags(names)
 
 
 class TagField(serializers.RelatedField):
@@ -159,6 +339,17 @@ class TagField(serializers.RelatedField):
     is created on article creation
     """
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """
+        Resolve tag lists with a TagListField
+        """
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return TagListField(**list_kwargs)
+
     def get_queryset(self):
 
         return TagModel.objects.all()
@@ -171,17 +362,16 @@ class TagField(serializers.RelatedField):
 
     def to_internal_value(self, data):
         """
-        Validate data and restore it back into its internal
-        python representation
+        Validate a tag name, which is resolved with the rest of its list
         """
 
         if data:
-            if not re.match(r'^[a-zA-Z0-9][ A-Za-z0-9_-]*$', data):
+            if not re.match(r'^[a-zA-Z0-9][ A-Za-z0-9_-]*$', data) or len(
+                    data) > TagModel._meta.get_field('tagname').max_length:
                 raise ValidationError(
                     detail={'message': "{} is an invalid tag".format(data)})
 
-            tag, created = TagModel.objects.get_or_create(tagname=data)
-            return tag
+            return data
 
 
 def get_comment_queryset(request, slug):
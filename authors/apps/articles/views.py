@@ -1,30 +1,43 @@
 """
 Article Views
 """
-import readtime
-from rest_framework import filters, status, viewsets
+from collections import OrderedDict
+
+from rest_framework import status, viewsets
 from rest_framework.generics import ListAPIView, GenericAPIView
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User
 from rest_framework.permissions import (IsAuthenticated, AllowAny)
 from django.utils import timezone
 from django.http import JsonResponse
 from django_filters.rest_framework import DjangoFilterBackend
+from vote.models import DOWN, UP
 from fluent_comments.models import FluentComment
 from ..authentication.models import User
 from .serializers import (ArticleSerializer,
                           CommentSerializer, FavoriteArticleSerializer,
                           BookmarkArticleSerializer, TagSerializer,
-                          CommentHistorySerializer)
+                          CommentHistorySerializer, ArticleReaderSerializer)
 from .models import (ArticleModel, FavoriteArticleModel,
-                     BookmarkArticleModel, TagModel,
-                     CommentHistoryModel, CommentModel)
-from .utils import (ImageUploader, user_object,
-                    configure_response, add_social_share, ArticleFilter,
+                     BookmarkArticleModel,
+                     CommentHistoryModel, CommentModel, ReadStatsModel,
+                     SlugHistoryModel, TagStatsModel)
+from ..core.pagination import get_paginator, page_limit
+from .cache import (article_version, get_article, set_article,
+                    article_document, render_article, article_response,
+                    tag_catalogue_version, get_tag_catalogue,
+                    set_tag_catalogue)
+from .overlay import article_overlay
+from .text import content_fingerprint
+from .votes import vote_article, vote_comment
+from .utils import (ImageUploader, user_object, user_objects,
+                    CommentTree, add_social_share, ArticleFilter,
                     get_comment_queryset, check_article, save_read_stat)
 
 
@@ -33,7 +46,7 @@ class ArticleView(viewsets.ModelViewSet):
     The article View
     """
 
-    queryset = ArticleModel.objects.all()
+    queryset = ArticleModel.objects.select_related('stats').defer('body')
     serializer_class = ArticleSerializer
     lookup_field = 'slug'
 
@@ -82,25 +95,20 @@ class ArticleView(viewsets.ModelViewSet):
         get:
         The get articles endpoint
         """
-        page_limit = request.GET.get('limit')
+        paginator = get_paginator(request, keyset=True)
 
-        if not page_limit or not page_limit.isdigit():
-            page_limit = 9
-
-        queryset = self.queryset
-        paginator = PageNumberPagination()
-        paginator.page_size = page_limit
-
-        page = paginator.paginate_queryset(queryset, request)
+        page = paginator.paginate_queryset(self.queryset, request)
         serializer = ArticleSerializer(page, many=True,
                                        context={'request': request})
+        authors = user_objects(
+            article['author'] for article in serializer.data)
 
         dictionary = None
         data = []
         for article in serializer.data:
             dictionary = dict(article)
             dictionary = add_social_share(dictionary)
-            dictionary['author'] = user_object(dictionary['author'])
+            dictionary['author'] = authors.get(dictionary['author'])
             data.append(dictionary)
 
         return paginator.get_paginated_response(data=data)
@@ -110,35 +118,43 @@ class ArticleView(viewsets.ModelViewSet):
         get:
         The get an article endpoint
         """
-
-        try:
-            article = ArticleModel.objects.filter(slug=slug)[0]
-        except:
+        version = article_version(slug)
+        rendered = get_article(slug, version)
+
+        if rendered is None:
+            try:
+                article = ArticleModel.objects.filter(slug=slug)[0]
+            except:
+                current = SlugHistoryModel.objects.filter(
+                    slug=slug).values_list('article__slug', flat=True).first()
+                if current:
+                    return self.retrieve(request, current)
+                return JsonResponse({"status": 404,
+                                     "error": "Article with slug {} not found".format(slug)},
+                                    status=404)
+
+            serializer = ArticleSerializer(
+                article, context={'request': request, 'public': True})
+            data = dict(serializer.data)
+            data['author'] = user_object(data['author'])
+            rendered = set_article(slug, version, add_social_share(data))
+
+        if request.user.is_anonymous:
+            return article_response(request, rendered)
+
+        data = article_document(rendered)
+
+        if request.user.username != data['author']['username']:
+            save_read_stat(request, data['id'])
+
+        overlay = article_overlay(request.user, slug)
+        if overlay is None:
             return JsonResponse({"status": 404,
                                  "error": "Article with slug {} not found".format(slug)},
                                 status=404)
 
-        if request.user != article.author:
-            save_read_stat(request, article)
-
-        serializer = ArticleSerializer(article,
-                                       context={'request': request})
-        response = Response(serializer.data)
-
-        user = request.user
-
-        if user:
-            article = ArticleModel.objects.filter(slug=slug)[0]
-
-            check_vote = article.votes.exists(user.id)
-            if check_vote:
-                response.data['is_liked'] = True
-
-        response.data['author'] = user_object(serializer.data['author'])
-        response.data = add_social_share(response.data)
-        return JsonResponse({"status": 200,
-                             "data": response.data},
-                            status=200)
+        data.update(overlay)
+        return article_response(request, render_article(data))
 
     def update(self, request, slug=None, *args, **kwargs):
         """
@@ -162,9 +178,6 @@ class ArticleView(viewsets.ModelViewSet):
                  "error": "You cannot edit an article you do not own"},
                 status=403)
 
-        body = request.data.get('body')
-        read_time = readtime.of_text(body)
-        request.data['readtime'] = read_time.text
         serializer = ArticleSerializer(article,
                                        data=request.data,
                                        context={'request': request},
@@ -199,20 +212,19 @@ class ArticleView(viewsets.ModelViewSet):
                  'error': 'Article with slug {} not found'.format(slug)},
                 status=404)
 
-    def create_article(self, request):
+    def create_article(self, request, upload=None):
         """
         Function for creating an article
         """
         request.data['author'] = request.user.id
 
-        body = request.data.get('body')
-        read_time = readtime.of_text(body)
-        request.data['readtime'] = read_time.text
-
         serializer = ArticleSerializer(data=request.data,
                                        context={'request': request})
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        article = serializer.save()
+
+        if upload is not None:
+            upload.attach(article)
 
         response = serializer.data
 
@@ -222,12 +234,9 @@ class ArticleView(viewsets.ModelViewSet):
 
     def check_if_duplicate(self, userid, title1, body1):
 
-        records = ArticleModel.objects.filter(
-            author_id=userid)
-
-        duplicate_record = records.filter(
-            title=title1.strip()).filter(
-            body=body1.strip())
+        duplicate_record = ArticleModel.objects.filter(
+            author_id=userid,
+            fingerprint=content_fingerprint(title1, body1))
 
         if duplicate_record.exists():
             return True
@@ -237,15 +246,16 @@ class ArticleView(viewsets.ModelViewSet):
         """
         Function for uploading image
         """
-        cloud_response = ImageUploader(request.FILES['image'])
-        if cloud_response is not None:
-            if cloud_response.get('error', False):
-                return Response(cloud_response, status=int(cloud_response.get('status')))
+        upload = ImageUploader(request.FILES['image'])
+        if isinstance(upload, dict):
+            return Response(upload, status=upload['status'])
 
-            image_url = cloud_response.get(
-                'secure_url', request.FILES['image'])
-            request.data['image'] = image_url
-            return self.create_article(request)
+        request.data['image'] = upload.placeholder
+        try:
+            return self.create_article(request, upload)
+        except Exception:
+            upload.discard()
+            raise
 
 
 class CommentView(viewsets.ModelViewSet):
@@ -361,32 +371,23 @@ class CommentView(viewsets.ModelViewSet):
                  'error': 'Article with slug {} not found'.format(slug)},
                 status=404)
 
-        queryset = FluentComment.objects.filter(object_pk=slug)
-        serializer = CommentSerializer(queryset, many=True)
+        tree = CommentTree(FluentComment.objects.filter(object_pk=slug))
+        comments_count = len(tree.comments)
 
-        if queryset.count() == 0:
+        if comments_count == 0:
             return JsonResponse(
                 {'status': 404,
                  'error': "No comments yet on this article".format(slug)},
                 status=404)
 
-        if queryset.count() == 1:
-            comment_votes = CommentModel.objects.filter(
-                comment=queryset.first().id).first()
+        if comments_count == 1:
+            return Response({"Comment": tree.represent(tree.comments[0])})
 
-            response = Response(serializer.data)
-            response = dict(response.data[0].items())
-            response['author'] = user_object(response['user_id'])
-            response['votes'] = comment_votes.vote_score
-            response['num_vote_down'] = comment_votes.num_vote_down
-            response['num_vote_up'] = comment_votes.num_vote_up
-            del response['user_id']
-            return Response({"Comment": response})
-
-        data = configure_response(serializer)
+        data = [tree.represent(comment, 'votes_score')
+                for comment in tree.comments]
         return Response(
             {"Comments": data,
-             "comments_count": queryset.count()})
+             "comments_count": comments_count})
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -417,8 +418,9 @@ class CommentView(viewsets.ModelViewSet):
                              'error': "You cannot delete a comment you do not own"},
                             status=403)
 
-        comment.delete()
-        commenter.delete()
+        with transaction.atomic():
+            comment.delete()
+            commenter.delete()
         return Response({'status': 200,
                          'data': 'Comment deleted successfully'},
                         status=200)
@@ -433,23 +435,18 @@ class CommentLikeView(GenericAPIView):
 
         check_article(slug)
 
-        comment_exists = CommentModel.objects.filter(
-            comment=comment_id).first()
-        if not comment_exists:
+        votes = vote_comment(slug, comment_id, request.user.id, UP)
+        if votes is None:
             return JsonResponse(
                 {'status': 404,
                  'error': 'Comment with id {} not found'.format(comment_id)},
                 status=404)
 
-        check_vote = comment_exists.votes.exists(request.user.id)
-
-        if check_vote:
-            comment_exists.votes.delete(request.user.id)
+        if not votes['voted']:
             return JsonResponse({
                 "status": 200,
                 "message": "You have deleted this like", },
                 status=200)
-        comment_exists.votes.up(request.user.id)
 
         return JsonResponse({
             "status": 200,
@@ -467,22 +464,17 @@ class CommentDisLikeView(GenericAPIView):
 
         check_article(slug)
 
-        comment_exists = CommentModel.objects.filter(
-            comment=comment_id).first()
-
-        if not comment_exists:
+        votes = vote_comment(slug, comment_id, request.user.id, DOWN)
+        if votes is None:
             return JsonResponse(
                 {'status': 404,
                  'error': 'Comment with id {} not found'.format(comment_id)},
                 status=404)
 
-        vote_down = comment_exists.votes.down(request.user.id)
-
-        if vote_down:
+        if votes['voted']:
             return JsonResponse({"status": 200,
                                  "message": "You have Disliked this comment", },
                                 status=200)
-        comment_exists.votes.delete(request.user.id)
         return JsonResponse({"status": 200,
                              "message": "You have deleted this dislike", },
                             status=200)
@@ -495,37 +487,28 @@ class LikeView(GenericAPIView):
     def post(self, request, *args, **kwargs):
         slug = self.kwargs.get('slug')
 
-        slug_exists = ArticleModel.objects.filter(slug=slug)
-        if not slug_exists:
+        votes = vote_article(slug, request.user.id, UP)
+        if votes is None:
             return JsonResponse(
                 {'status': 404,
                  'error': 'Article with slug {} not found'.format(slug)},
                 status=404)
 
-        article = ArticleModel.objects.filter(slug=slug)[0]
-
-        user_id = request.user.id
-        check_vote = article.votes.exists(user_id)
-
-        if check_vote:
-            article.votes.delete(user_id)
-            article_two = ArticleModel.objects.filter(slug=slug)[0]
+        if not votes['voted']:
             return JsonResponse({
                 "status": 200,
-                "slug": article_two.slug,
-                "num_vote_down": article_two.num_vote_down,
-                "num_vote_up": article_two.num_vote_up,
+                "slug": slug,
+                "num_vote_down": votes['num_vote_down'],
+                "num_vote_up": votes['num_vote_up'],
                 "liked": False,
                 "message": "You have deleted this like", },
                 status=200)
-        article.votes.up(user_id)
-        article_two = ArticleModel.objects.filter(slug=slug)[0]
 
         return JsonResponse({"status": 200,
-                             "slug": article_two.slug,
+                             "slug": slug,
                              "liked": True,
-                             "num_vote_down": article_two.num_vote_down,
-                             "num_vote_up": article_two.num_vote_up,
+                             "num_vote_down": votes['num_vote_down'],
+                             "num_vote_up": votes['num_vote_up'],
                              "message": "You have liked this article",
                              },
                             status=200)
@@ -538,34 +521,26 @@ class DisLikeView(GenericAPIView):
     def post(self, request, *args, **kwargs):
         slug = self.kwargs.get('slug')
 
-        slug_exists = ArticleModel.objects.filter(slug=slug)
-        if not slug_exists:
+        votes = vote_article(slug, request.user.id, DOWN)
+        if votes is None:
             return JsonResponse(
                 {'status': 404,
                  'error': 'Article with slug {} not found'.format(slug)},
                 status=404)
 
-        article = ArticleModel.objects.filter(slug=slug)[0]
-        user_id = request.user.id
-
-        vote_down = article.votes.down(user_id)
-
-        if vote_down:
-            article_two = ArticleModel.objects.filter(slug=slug)[0]
+        if votes['voted']:
             return JsonResponse({"status": 200,
-                                 "slug": article_two.slug,
-                                 "num_vote_down": article_two.num_vote_down,
-                                 "num_vote_up": article_two.num_vote_up,
+                                 "slug": slug,
+                                 "num_vote_down": votes['num_vote_down'],
+                                 "num_vote_up": votes['num_vote_up'],
                                  "disliked": True,
                                  "message": "You have Disliked this article", },
                                 status=200)
-        article.votes.delete(user_id)
-        article_two = ArticleModel.objects.filter(slug=slug)[0]
         return JsonResponse({"status": 200,
-                             "slug": article_two.slug,
-                             "num_vote_down": article_two.num_vote_down,
-                             "num_vote_up": article_two.num_vote_up,
-                             "disliked": True,
+                             "slug": slug,
+                             "num_vote_down": votes['num_vote_down'],
+                             "num_vote_up": votes['num_vote_up'],
+                             "disliked": False,
                              "message": "You have deleted this dislike", },
                             status=200)
 
@@ -605,7 +580,8 @@ class FavoriteArticle(viewsets.ModelViewSet):
             serializer = self.serializer_class(data=request.data)
 
         serializer.is_valid(raise_exception=True)
-        serializer.save(article=article, favoritor=user)
+        with transaction.atomic():
+            serializer.save(article=article, favoritor=user)
 
         return Response({
             "data": serializer.data
@@ -633,7 +609,8 @@ class FavoriteArticle(viewsets.ModelViewSet):
             article = ArticleModel.objects.filter(slug=slug).first()
             existing_favorite = FavoriteArticleModel.objects.get(
                 article=article, favoritor=request.user)
-            self.perform_destroy(existing_favorite)
+            with transaction.atomic():
+                self.perform_destroy(existing_favorite)
             return Response({'status': 200,
                              'data': 'Article unfavorited successfully'},
                             status=200)
@@ -649,11 +626,18 @@ class ArticleList(ListAPIView):
     Search and filter View
     """
     permission_classes = [AllowAny]
-    queryset = ArticleModel.objects.all()
+    queryset = ArticleModel.objects.select_related('stats').defer('body')
     serializer_class = ArticleSerializer
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, )
     filter_class = ArticleFilter
-    search_fields = ('author__username', 'description', 'body', 'title', )
+
+    @property
+    def filter_backends(self):
+        """
+        Filter with ArticleFilter, then search with the configured
+        search backend
+        """
+        return (DjangoFilterBackend,
+                import_string(settings.ARTICLE_SEARCH_BACKEND), )
 
     def list(self, request):
         # with filter
@@ -665,10 +649,12 @@ class ArticleList(ListAPIView):
         dictionary = None
         data = []
         if serializer.data:
+            authors = user_objects(
+                article['author'] for article in serializer.data)
             for article in serializer.data:
                 dictionary = dict(article)
                 dictionary = add_social_share(dictionary)
-                dictionary['author'] = user_object(dictionary['author'])
+                dictionary['author'] = authors.get(dictionary['author'])
                 data.append(dictionary)
             return self.get_paginated_response(data=data)
         return Response({'status': 404, 'message': 'We could not find what you are looking for.'}, status=404)
@@ -692,6 +678,36 @@ class CommentHistory(ListAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class ArticleReadersView(ListAPIView):
+    """
+    Get the people who have read an article, newest first.
+    This is only visible to the author of the article
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ArticleReaderSerializer
+
+    def list(self, request, slug=None):
+        article = ArticleModel.objects.filter(slug=slug).only(
+            'id', 'author_id').first()
+        if not article:
+            return Response({'status': 404,
+                             'error': 'Article with slug {} not found'.format(slug)},
+                            status=404)
+
+        if article.author_id != request.user.id:
+            return Response({'status': 403,
+                             'error': 'Only the author of an article can see its readers'},
+                            status=403)
+
+        paginator = get_paginator(request)
+        page = paginator.paginate_queryset(
+            ReadStatsModel.objects.filter(article=article).select_related(
+                'user').order_by('-created_at', '-id'), request)
+        serializer = self.serializer_class(page, many=True)
+
+        return paginator.get_paginated_response(serializer.data)
+
+
 class BookmarkArticleView(viewsets.ModelViewSet):
     """Bookmark an article"""
     permission_classes = [IsAuthenticated]
@@ -777,15 +793,51 @@ class BookmarkArticleView(viewsets.ModelViewSet):
 
 
 class TagViewSet(APIView):
-    """Add tags to an article"""
+    """The tag catalogue"""
     pagination_class = None
 
     def get(self, request):
         """
         get:
-        The get all tags endpoint
+        The tag catalogue endpoint. Tags in use are listed with their
+        number of articles, most used first, and paginated. `prefix`
+        only lists the tags starting with it, and `top` lists the given
+        number of most used tags on a single page.
         """
+        url = request.build_absolute_uri()
+        version = tag_catalogue_version()
+        data = get_tag_catalogue(version, url)
 
-        queryset = TagModel.objects.all()
-        serializer = TagSerializer(queryset, many=True)
-        return Response({'Tags': serializer.data})
+        if data is None:
+            data = self.catalogue(request)
+            set_tag_catalogue(version, url, data)
+
+        return Response(data)
+
+    def catalogue(self, request):
+        """
+        Return a page of the tag catalogue
+        """
+        queryset = TagStatsModel.objects.filter(
+            article_count__gt=0).select_related('tag').order_by(
+            '-article_count', 'tag_id')
+
+        prefix = request.GET.get('prefix')
+        if prefix:
+            queryset = queryset.filter(tag__tagname__startswith=prefix)
+
+        top = request.GET.get('top', '')
+        if top.isdigit():
+            tags = queryset[:min(int(top), settings.MAX_PAGE_SIZE)]
+            return {'Tags': list(TagSerializer(tags, many=True).data)}
+
+        paginator = PageNumberPagination()
+        paginator.page_size = page_limit(request, default=20)
+        tags = paginator.paginate_queryset(queryset, request)
+
+        return OrderedDict([
+            ('count', paginator.page.paginator.count),
+            ('next', paginator.get_next_link()),
+            ('previous', paginator.get_previous_link()),
+            ('Tags', list(TagSerializer(tags, many=True).data)),
+        ])
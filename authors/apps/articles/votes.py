@@ -0,0 +1,265 @@
+"""
+Toggling of the likes and dislikes of articles and comments.
+
+A toggle is a single statement that removes the reader's vote if it is
+the one being cast, switches it if it is the opposite one, and adds it
+otherwise. Votes are recorded right away, but the counters of their
+articles and comments are written behind: each process adds the
+changes to a buffer that is flushed with one UPDATE per table every
+VOTE_FLUSH_INTERVAL seconds, and when the process exits. Writers of a
+popular article therefore do not queue on its row, and the counters
+shown by a process include the changes it has not flushed yet.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, connection, transaction
+from vote.models import DOWN, UP, Vote
+
+from . import cache
+from .models import ArticleModel, CommentModel
+
+logger = logging.getLogger(__name__)
+
+# toggles a vote, returning the target's stored counters, the changes
+# to the counters of the vote cast and of the opposite vote, and whether
+# the user kept a vote
+TOGGLE_VOTE = """
+WITH target AS (
+    SELECT id, num_vote_up, num_vote_down FROM {table}
+    WHERE {column} = %(lookup)s ORDER BY id LIMIT 1
+), removed AS (
+    DELETE FROM {votes} votes USING target
+    WHERE votes.content_type_id = %(content_type)s
+    AND votes.object_id = target.id AND votes.user_id = %(user)s
+    AND votes.action = %(action)s
+    RETURNING votes.id
+), switched AS (
+    UPDATE {votes} votes SET action = %(action)s FROM target
+    WHERE votes.content_type_id = %(content_type)s
+    AND votes.object_id = target.id AND votes.user_id = %(user)s
+    AND votes.action = %(opposite)s
+    RETURNING votes.id
+), added AS (
+    INSERT INTO {votes} (user_id, content_type_id, object_id, action,
+                         create_at)
+    SELECT %(user)s, %(content_type)s, target.id, %(action)s, now()
+    FROM target
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {votes} votes
+        WHERE votes.content_type_id = %(content_type)s
+        AND votes.object_id = target.id AND votes.user_id = %(user)s)
+    ON CONFLICT DO NOTHING
+    RETURNING id
+)
+SELECT target.id, target.num_vote_up, target.num_vote_down,
+       (SELECT count(*) FROM added) + (SELECT count(*) FROM switched)
+       - (SELECT count(*) FROM removed),
+       - (SELECT count(*) FROM switched),
+       (SELECT count(*) FROM removed) = 0
+FROM target
+"""
+
+# adds (id, up, down) changes to the vote counters of a table
+COUNT_VOTES = """
+UPDATE {table} SET
+    num_vote_up = num_vote_up + changes.up,
+    num_vote_down = num_vote_down + changes.down,
+    vote_score = vote_score + changes.up - changes.down
+FROM unnest(%s::integer[], %s::integer[], %s::integer[])
+    AS changes(id, up, down)
+WHERE {table}.id = changes.id
+"""
+
+
+def store_votes(changes):
+    """
+    Add {(model, id): (up, down)} changes to the vote counters, with one
+    UPDATE per model
+    """
+    rows = defaultdict(list)
+    for ((model, pk), (up, down)) in sorted(
+            changes.items(), key=lambda item: item[0][1]):
+        if up or down:
+            rows[model].append((pk, up, down))
+
+    with transaction.atomic():
+        for (model, changed) in rows.items():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    COUNT_VOTES.format(table=connection.ops.quote_name(
+                        model._meta.db_table)),
+                    [list(column) for column in zip(*changed)])
+
+
+class VoteBuffer:
+    """
+    The vote counter changes of a process that are waiting to be stored
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.changes = defaultdict(lambda: [0, 0])
+        self.slugs = set()
+        self.timer = None
+
+    def add(self, model, pk, up, down, slug):
+        """
+        Buffer a change to the counters of an instance shown in the
+        article with the slug, and return the instance's pending change
+        """
+        with self.lock:
+            change = self.changes[(model, pk)]
+            change[0] += up
+            change[1] += down
+            self.slugs.add(slug)
+
+            if self.timer is None:
+                self.timer = threading.Timer(settings.VOTE_FLUSH_INTERVAL,
+                                             self.flush_later)
+                self.timer.daemon = True
+                self.timer.start()
+
+            return tuple(change)
+
+    def pending(self, model, pk):
+        """
+        Return the (up, down) change not yet stored for an instance
+        """
+        with self.lock:
+            return tuple(self.changes.get((model, pk), (0, 0)))
+
+    def take(self):
+        """
+        Empty the buffer and return the changes and slugs it held
+        """
+        with self.lock:
+            changes, self.changes = self.changes, defaultdict(lambda: [0, 0])
+            slugs, self.slugs = self.slugs, set()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return changes, slugs
+
+    def flush(self):
+        """
+        Store the buffered changes, keeping them buffered if that fails,
+        and drop the cached renderings of the articles showing them
+        """
+        changes, slugs = self.take()
+        if not changes:
+            return
+
+        try:
+            store_votes(changes)
+        except DatabaseError:
+            logger.exception('Could not store %d vote counter changes',
+                             len(changes))
+            with self.lock:
+                for (key, (up, down)) in changes.items():
+                    self.changes[key][0] += up
+                    self.changes[key][1] += down
+                self.slugs.update(slugs)
+            raise
+
+        cache.invalidate_articles(*slugs)
+
+    def flush_later(self):
+        """
+        Flush the buffer from the timer thread
+        """
+        try:
+            self.flush()
+        except DatabaseError:
+            pass
+        finally:
+            connection.close()
+
+
+vote_buffer = VoteBuffer()
+
+
+@atexit.register
+def flush_on_exit():
+    """
+    Store the buffered vote counter changes when the process shuts down
+    """
+    try:
+        vote_buffer.flush()
+    except DatabaseError:
+        pass
+
+
+def vote_counts(up, down, pending=(0, 0)):
+    """
+    Return the vote counters of stored up and down counts with a
+    pending (up, down) change applied
+    """
+    up, down = up + pending[0], down + pending[1]
+    return {'num_vote_up': up, 'num_vote_down': down,
+            'vote_score': up - down}
+
+
+def current_vote_counts(instance):
+    """
+    Return the vote counters of an instance, including the change this
+    process has not stored yet
+    """
+    return vote_counts(instance.num_vote_up, instance.num_vote_down,
+                       vote_buffer.pending(type(instance), instance.pk))
+
+
+def toggle_vote(model, user_id, action, article, **lookup):
+    """
+    Toggle a user's UP or DOWN vote on the instance of a vote model
+    found by a single field lookup, which is shown in the article with
+    the given slug. Return its vote counts and whether the user now has
+    that vote, or None if there is no instance.
+    """
+    (name, value), = lookup.items()
+
+    sql = TOGGLE_VOTE.format(
+        table=connection.ops.quote_name(model._meta.db_table),
+        column=connection.ops.quote_name(model._meta.get_field(name).column),
+        votes=connection.ops.quote_name(Vote._meta.db_table))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'lookup': value,
+            'content_type': ContentType.objects.get_for_model(model).id,
+            'user': user_id,
+            'action': action,
+            'opposite': DOWN if action == UP else UP,
+        })
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    (pk, up, down, cast, opposite, voted) = row
+    change = (cast, opposite) if action == UP else (opposite, cast)
+
+    votes = vote_counts(up, down, vote_buffer.add(model, pk, *change, article))
+    votes['voted'] = voted
+    return votes
+
+
+def vote_article(slug, user_id, action):
+    """
+    Toggle a user's vote on an article, returning its vote counts or
+    None if there is no article with the slug
+    """
+    return toggle_vote(ArticleModel, user_id, action, slug, slug=slug)
+
+
+def vote_comment(slug, comment_id, user_id, action):
+    """
+    Toggle a user's vote on a comment of an article, returning the vote
+    counts of the comment or None if there is no such comment
+    """
+    return toggle_vote(CommentModel, user_id, action, slug,
+                       comment=comment_id)
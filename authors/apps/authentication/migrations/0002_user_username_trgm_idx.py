@@ -0,0 +1,20 @@
+# Generated by Django 2.2 on 2026-10-18 16:03
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['username'], name='user_username_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
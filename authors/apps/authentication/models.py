@@ -8,6 +8,7 @@ from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin
 )
 from django.contrib.auth.tokens import default_token_generator
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 from django.core.mail import send_mail
@@ -114,6 +115,11 @@ class User(AbstractBaseUser, PermissionsMixin):
     # objects of this type.
     objects = UserManager()
 
+    class Meta:
+        # trigram index for fuzzy username matching
+        indexes = [GinIndex(fields=['username'], opclasses=['gin_trgm_ops'],
+                            name='user_username_trgm_idx')]
+
     def __str__(self):
         """
         Returns a string representation of this `User`.
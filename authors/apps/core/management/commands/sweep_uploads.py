@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...uploads import sweep_uploads
+
+
+class Command(BaseCommand):
+    help = ('Finish the image uploads left behind by processes that '
+            'stopped before storing them')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int,
+            default=settings.IMAGE_UPLOAD_STALE_AFTER,
+            help='Seconds after which a spooled upload is left behind')
+
+    def handle(self, *args, **options):
+        stored = sweep_uploads(options['stale_after'])
+        self.stdout.write('Stored {} images'.format(stored))
@@ -0,0 +1,157 @@
+import base64
+from collections import OrderedDict
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def page_limit(request, default=9):
+    """
+    Return the page size requested with the `limit` query parameter,
+    capped at the MAX_PAGE_SIZE setting
+    """
+    limit = request.GET.get('limit', '')
+    limit = int(limit) if limit.isdigit() and int(limit) else default
+
+    return min(limit, settings.MAX_PAGE_SIZE)
+
+
+def approximate_count(queryset):
+    """
+    Return the query planner's estimate of the number of rows of a
+    queryset, which unlike COUNT(*) does not read the rows
+    """
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_paginator(request, default=PageNumberPagination,
+                  results_key='results', keyset=False):
+    """
+    Return a keyset paginator when the request carries a `cursor` query
+    parameter, or when `keyset` is on and it asks for no page number,
+    and the default paginator otherwise, both with the page size capped
+    """
+    if KeysetPagination.cursor_query_param in request.GET or (
+            keyset and default.page_query_param not in request.GET):
+        return KeysetPagination(page_limit(request), results_key)
+
+    paginator = default()
+    paginator.page_size = page_limit(request)
+    return paginator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset newest first by seeking past the
+    (created_at, id) of the last row seen rather than counting and
+    skipping rows, so that a deep page costs the same as the first one.
+
+    The position is carried in an opaque `cursor` query parameter, left
+    empty or out for the first page. An approximate total is included
+    when `total=approximate` is requested.
+    """
+
+    cursor_query_param = 'cursor'
+    total_query_param = 'total'
+
+    def __init__(self, page_size=9, results_key='results'):
+        self.page_size = page_size
+        self.results_key = results_key
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request)
+
+        self.total = None
+        if request.GET.get(self.total_query_param) == 'approximate':
+            self.total = approximate_count(queryset)
+
+        if position:
+            queryset = queryset.extra(
+                where=['({0}.created_at, {0}.id) {1} (%s, %s)'.format(
+                    connection.ops.quote_name(queryset.model._meta.db_table),
+                    '>' if reverse else '<')],
+                params=list(position))
+
+        ordering = ('created_at', 'id') if reverse else ('-created_at', '-id')
+        page = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more, page = len(page) > self.page_size, page[:self.page_size]
+
+        if reverse:
+            page.reverse()
+
+        self.has_next = bool(position) if reverse else has_more
+        self.has_previous = has_more if reverse else bool(position)
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.total is not None:
+            response['count'] = self.total
+
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response[self.results_key] = data
+        return Response(response)
+
+    def get_next_link(self):
+        if self.has_next and self.page:
+            return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if self.has_previous and self.page:
+            return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        """
+        Return the (created_at, id) position and direction of a cursor
+        """
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            querystring = base64.urlsafe_b64decode(
+                encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+
+            created_at = parse_datetime(tokens['c'][0])
+            row_id = int(tokens['i'][0])
+            reverse = bool(int(tokens['r'][0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound({'status': 404, 'error': 'Invalid cursor'})
+
+        if created_at is None:
+            raise NotFound({'status': 404, 'error': 'Invalid cursor'})
+
+        return (created_at, row_id), reverse
+
+    def encode_cursor(self, row, reverse):
+        """
+        Return the link to the page after or before a row
+        """
+        querystring = parse.urlencode({'c': row.created_at.isoformat(),
+                                       'i': row.id,
+                                       'r': int(reverse)})
+        encoded = base64.urlsafe_b64encode(
+            querystring.encode('ascii')).decode('ascii')
+
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
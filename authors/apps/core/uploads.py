@@ -0,0 +1,278 @@
+"""
+Background uploads of article and profile images.
+
+An uploaded image is spooled to IMAGE_UPLOAD_SPOOL_DIR and the object
+it belongs to is saved right away with a placeholder URL. Once the
+saving transaction commits, a pool of IMAGE_UPLOAD_WORKERS threads
+stores the image with the IMAGE_STORAGE_BACKEND and puts its URL in
+place of the placeholder, unless the object got another image since.
+
+Uploads left behind by a process that stopped before storing them are
+finished by the sweep_uploads command once they are older than
+IMAGE_UPLOAD_STALE_AFTER seconds. Placeholders whose spooled image is
+still there get it stored, the others get the field's default, and
+spooled images that no placeholder names are removed.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent import futures
+from functools import lru_cache
+from urllib.parse import urljoin
+
+import cloudinary.uploader
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# the fields that hold the placeholders of spooled images
+IMAGE_FIELDS = (('articles.ArticleModel', 'image'),
+                ('profiles.UserProfile', 'image'))
+
+
+def is_image(image):
+    """
+    Return whether an uploaded file has the name of an image
+    """
+    return str(image.name).endswith(IMAGE_EXTENSIONS)
+
+
+class CloudinaryStorage:
+    """
+    Stores images on Cloudinary, with their thumbnails
+    """
+
+    def save(self, path, name):
+        """
+        Upload the image at path and return its URL
+        """
+        image_data = cloudinary.uploader.upload(
+            path,
+            public_id=name,
+            crop='limit',
+            width=2000,
+            height=2000,
+            eager=[
+                {'width': 200, 'height': 200,
+                 'crop': 'thumb', 'gravity': 'face',
+                 'radius': 20, 'effect': 'sepia'},
+                {'width': 100, 'height': 150,
+                 'crop': 'fit', 'format': 'png'}
+            ]
+        )
+        return image_data['secure_url']
+
+
+class FileSystemStorage:
+    """
+    Stores images in IMAGE_STORAGE_DIR, served from IMAGE_STORAGE_URL,
+    for development and tests
+    """
+
+    def save(self, path, name):
+        """
+        Copy the image at path and return its URL
+        """
+        filename = name + os.path.splitext(path)[1]
+        os.makedirs(settings.IMAGE_STORAGE_DIR, exist_ok=True)
+        shutil.copyfile(path, os.path.join(settings.IMAGE_STORAGE_DIR,
+                                           filename))
+
+        return urljoin(settings.IMAGE_STORAGE_URL, filename)
+
+
+@lru_cache(maxsize=None)
+def get_storage(backend):
+    """
+    Return the image storage of a backend path
+    """
+    return import_string(backend)()
+
+
+class ImageUpload:
+    """
+    An image spooled to disk until it is stored
+    """
+
+    def __init__(self, image):
+        self.set_path(os.path.join(
+            settings.IMAGE_UPLOAD_SPOOL_DIR, '{}-{}{}'.format(
+                int(time.time()), uuid.uuid4().hex,
+                os.path.splitext(str(image.name))[1].lower())))
+
+        os.makedirs(settings.IMAGE_UPLOAD_SPOOL_DIR, exist_ok=True)
+        with open(self.path, 'wb') as spool:
+            for chunk in image.chunks():
+                spool.write(chunk)
+
+    @classmethod
+    def spooled(cls, path):
+        """
+        Return the upload of an image spooled earlier
+        """
+        upload = cls.__new__(cls)
+        upload.set_path(path)
+        return upload
+
+    def set_path(self, path):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.placeholder = '{}#{}'.format(settings.IMAGE_PLACEHOLDER_URL,
+                                          self.name)
+
+    def attach(self, instance, field='image'):
+        """
+        Store the image for a field holding the placeholder once the
+        current transaction commits
+        """
+        model, pk = type(instance), instance.pk
+        transaction.on_commit(
+            lambda: upload_pool.submit(self, model, pk, field))
+
+    def discard(self):
+        """
+        Remove the spooled image
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def store(self, model, pk, field):
+        """
+        Store the image and put its URL in place of the placeholder,
+        or the field's default if the image could not be stored
+        """
+        try:
+            url = get_storage(settings.IMAGE_STORAGE_BACKEND).save(
+                self.path, self.name)
+        except Exception:
+            logger.exception('Could not store image %s', self.name)
+            url = model._meta.get_field(field).get_default()
+
+        with transaction.atomic():
+            instance = model.objects.select_for_update().filter(
+                pk=pk, **{field: self.placeholder}).first()
+
+            if instance is not None:
+                setattr(instance, field, url)
+                instance.save(update_fields=[field])
+
+        self.discard()
+
+
+class UploadPool:
+    """
+    The threads storing the spooled images of a process
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pending = set()
+
+    def submit(self, upload, model, pk, field):
+        """
+        Store an image from a worker thread
+        """
+        with self.lock:
+            if self.executor is None:
+                self.executor = futures.ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_UPLOAD_WORKERS,
+                    thread_name_prefix='image-upload')
+
+            future = self.executor.submit(self.run, upload, model, pk, field)
+            self.pending.add(future)
+        future.add_done_callback(self.done)
+
+    def done(self, future):
+        """
+        Forget a finished upload
+        """
+        with self.lock:
+            self.pending.discard(future)
+
+    def run(self, upload, model, pk, field):
+        """
+        Store an image in a worker thread
+        """
+        try:
+            upload.store(model, pk, field)
+        except Exception:
+            logger.exception('Could not attach image %s', upload.name)
+        finally:
+            connection.close()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the submitted images to be stored
+        """
+        with self.lock:
+            pending = list(self.pending)
+        futures.wait(pending, timeout)
+
+
+upload_pool = UploadPool()
+
+
+def spooled_at(name):
+    """
+    Return when the image of an upload was spooled, or 0 if its name
+    does not tell
+    """
+    try:
+        return int(name.split('-', 1)[0])
+    except ValueError:
+        return 0
+
+
+def sweep_uploads(stale_after=None):
+    """
+    Finish the uploads spooled more than stale_after seconds ago, which
+    the process that spooled them stopped before storing, and return
+    the number of images stored
+    """
+    if stale_after is None:
+        stale_after = settings.IMAGE_UPLOAD_STALE_AFTER
+    cutoff = time.time() - stale_after
+
+    spool = settings.IMAGE_UPLOAD_SPOOL_DIR
+    spooled = {}
+    if os.path.isdir(spool):
+        for filename in os.listdir(spool):
+            name = os.path.splitext(filename)[0]
+            if spooled_at(name) < cutoff:
+                spooled[name] = os.path.join(spool, filename)
+
+    stored = 0
+    prefix = settings.IMAGE_PLACEHOLDER_URL + '#'
+
+    for (label, field) in IMAGE_FIELDS:
+        model = apps.get_model(label)
+        placeholders = model.objects.filter(**{
+            field + '__startswith': prefix}).values_list('pk', field)
+
+        for (pk, placeholder) in placeholders:
+            name = placeholder[len(prefix):]
+            if spooled_at(name) >= cutoff:
+                continue
+
+            if name in spooled:
+                ImageUpload.spooled(spooled.pop(name)).store(model, pk, field)
+                stored += 1
+            else:
+                model.objects.filter(pk=pk, **{field: placeholder}).update(
+                    **{field: model._meta.get_field(field).get_default()})
+
+    for path in spooled.values():
+        ImageUpload.spooled(path).discard()
+
+    return stored
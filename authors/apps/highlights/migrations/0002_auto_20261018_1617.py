@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlights', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='highlightsmodel',
+            index=models.Index(fields=['highlighted_by', 'article'], name='highlight_user_article_idx'),
+        ),
+    ]
@@ -19,3 +19,9 @@ class HighlightsModel(models.Model):
     comment = models.TextField(blank=False, null=False)
     location = models.TextField(blank=False, null=False)
     position = models.IntegerField(blank=False, null=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['highlighted_by', 'article'],
+                         name='highlight_user_article_idx'),
+        ]
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from fluent_comments.models import FluentComment
 
 from ..articles import models
@@ -6,7 +6,8 @@ from ..authentication.models import User
 from ..follows.models import UserFollow
 from .utils import (create_comment_notification,
                     create_post_notification, create_subscriptions,
-                    create_follow_notification)
+                    create_follow_notification, forget_opt_outs,
+                    update_opt_outs)
 
 
 post_save.connect(create_subscriptions, sender=User)
@@ -16,3 +17,7 @@ post_save.connect(create_follow_notification, sender=UserFollow)
 post_save.connect(create_post_notification, sender=models.ArticleModel)
 
 post_save.connect(create_comment_notification, sender=FluentComment)
+
+post_save.connect(update_opt_outs, sender='notifications.Subscriptions')
+
+post_delete.connect(forget_opt_outs, sender='notifications.Subscriptions')
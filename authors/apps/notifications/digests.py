@@ -0,0 +1,90 @@
+"""
+Periodic email digests.
+
+Users who chose hourly or daily digests are not mailed each of their
+notifications, which are kept as digest entries instead. The
+send_digests command, run by a scheduler every hour or every day, takes
+the entries of the users with that frequency, DIGEST_BATCH_SIZE users
+at a time, and sends each user one email listing them, rendered once
+per digest. The hourly run also sends the entries left over by users
+who have since turned digests off.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+
+from . import models
+from ..authentication.models import User
+from .preferences import opt_outs
+from .utils import opt_url
+
+# deletes the digest entries of some users and returns them
+TAKE_ENTRIES = """
+DELETE FROM {entries} WHERE user_id = ANY(%s)
+RETURNING id, user_id, message, url
+"""
+
+FREQUENCIES = {'hourly': ('hourly', 'off'), 'daily': ('daily',)}
+
+
+def take_entries(user_ids):
+    """
+    Delete the digest entries of the users with the given ids and return
+    them by user id, oldest first
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(TAKE_ENTRIES.format(entries=connection.ops.quote_name(
+            models.DigestEntry._meta.db_table)), [user_ids])
+        rows = sorted(cursor.fetchall())
+
+    entries = defaultdict(list)
+    for (_, user_id, message, url) in rows:
+        entries[user_id].append({'message': message, 'url': url})
+    return entries
+
+
+def digest_message(email, entries, frequency):
+    """
+    Return the digest email of a user listing their entries
+    """
+    message = EmailMessage("ACTIVITY DIGEST", render_to_string(
+        "digest.html", {
+            "frequency": frequency,
+            "entries": entries,
+            "opt_url": opt_url,
+        }), "Authors Haven", [email])
+
+    message.content_subtype = "html"
+    return message
+
+
+def send_digests(frequency, batch_size=None):
+    """
+    Send the users with the given digest frequency their pending
+    entries, and return the number of digests sent
+    """
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    users = models.DigestEntry.objects.filter(
+        user__subscriptions__digest__in=FREQUENCIES[frequency]).order_by(
+        'user_id').values_list('user_id', flat=True).distinct()
+
+    sent, last = 0, 0
+    while True:
+        user_ids = list(users.filter(user_id__gt=last)[:batch_size])
+        if not user_ids:
+            return sent
+        last = user_ids[-1]
+
+        _, mail_exclude, _ = opt_outs.current()
+        with transaction.atomic():
+            entries = take_entries(user_ids)
+            messages = [
+                digest_message(email, entries[user_id], frequency)
+                for (user_id, email) in User.objects.filter(
+                    id__in=entries).order_by('id').values_list('id', 'email')
+                if user_id not in mail_exclude]
+
+            sent += get_connection().send_messages(messages) or 0
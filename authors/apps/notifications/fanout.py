@@ -0,0 +1,87 @@
+"""
+Deferred notification of new articles.
+
+Creating an article records its announcement in the same transaction,
+so publishing takes the same time whatever the number of followers and
+no announcement is lost with the process that published it. Those of
+articles rolled back are never committed, and those of deleted articles
+are deleted with them.
+
+The send_outbox worker announces the articles published at least
+ARTICLE_NOTIFICATION_DELAY seconds before, so the edits made right
+after publishing are folded into the announcement. A batch of
+announcements is taken with FOR UPDATE SKIP LOCKED, so concurrent
+workers skip it, and deleted in the transaction that notifies the
+followers, so a worker that stops midway leaves it to be announced
+again.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import models, utils
+from ..articles.models import ArticleModel
+
+logger = logging.getLogger(__name__)
+
+# deletes the next due announcements and returns their article ids
+TAKE_ANNOUNCEMENTS = """
+DELETE FROM {announcements}
+WHERE article_id IN (
+    SELECT article_id FROM {announcements}
+    WHERE announce_after <= statement_timestamp()
+    ORDER BY announce_after, article_id LIMIT %s
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING article_id
+"""
+
+
+def queue_announcement(article_id):
+    """
+    Record that the followers of a new article are to be notified
+    """
+    models.PendingAnnouncement.objects.create(
+        article_id=article_id, announce_after=timezone.now() + timedelta(
+            seconds=settings.ARTICLE_NOTIFICATION_DELAY))
+
+
+def take_announcements(limit):
+    """
+    Delete the next due announcements and return their article ids
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(TAKE_ANNOUNCEMENTS.format(
+            announcements=connection.ops.quote_name(
+                models.PendingAnnouncement._meta.db_table)), [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def announce_articles(batch_size=None):
+    """
+    Notify the followers of the due new articles batch by batch until
+    none are left, and return the number announced
+    """
+    batch_size = batch_size or settings.ARTICLE_ANNOUNCEMENT_BATCH_SIZE
+    announced = 0
+
+    while True:
+        with transaction.atomic():
+            article_ids = take_announcements(batch_size)
+            if not article_ids:
+                return announced
+
+            for article in ArticleModel.objects.filter(
+                    id__in=article_ids).select_related('author').order_by(
+                    'id'):
+                try:
+                    with transaction.atomic():
+                        utils.notify_followers(article)
+                except Exception:
+                    logger.exception('Could not notify the followers of %s',
+                                     article.slug)
+                else:
+                    announced += 1
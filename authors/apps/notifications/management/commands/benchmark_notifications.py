@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from ...models import Subscriptions
+from ...preferences import opt_outs
+from ...utils import notify_followers
+from ....articles.models import ArticleModel
+from ....authentication.models import User
+from ....follows.models import UserFollow
+from ....profiles.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = ('Measure the queries and time taken to notify the followers '
+            'of a new article, in a transaction that is rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sizes', nargs='*', type=int, default=[10, 1000, 100000],
+            help='Numbers of followers to notify')
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            queries, seconds = self.measure(size)
+
+            self.stdout.write('{} followers: {} queries in {:.2f}s'.format(
+                size, queries, seconds))
+
+    def measure(self, size):
+        """
+        Notify the given number of followers of a new article, returning
+        the number of queries and seconds it took
+        """
+        with transaction.atomic():
+            author = User.objects.create(
+                username='benchmark-author',
+                email='benchmark-author@example.com')
+            # followers get the profiles and subscriptions that saving
+            # them one at a time would create
+            followers = User.objects.bulk_create(
+                (User(username='benchmark-{}'.format(index),
+                      email='benchmark-{}@example.com'.format(index))
+                 for index in range(size)), batch_size=10000)
+            UserProfile.objects.bulk_create(
+                (UserProfile(user=follower) for follower in followers),
+                batch_size=10000)
+            Subscriptions.objects.bulk_create(
+                (Subscriptions(user=follower) for follower in followers),
+                batch_size=10000)
+            UserFollow.objects.bulk_create(
+                (UserFollow(follower=follower, following=author)
+                 for follower in followers), batch_size=10000)
+
+            article = ArticleModel.objects.create(
+                title='Benchmark', description='Benchmark', body='Benchmark',
+                author=author)
+            opt_outs.current()
+
+            backend = 'django.core.mail.backends.locmem.EmailBackend'
+            with override_settings(EMAIL_BACKEND=backend), \
+                    CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                notify_followers(article)
+                seconds = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        return len(queries), seconds
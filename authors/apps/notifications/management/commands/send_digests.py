@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...digests import FREQUENCIES, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Send the users with the given digest frequency their digests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('frequency', choices=sorted(FREQUENCIES))
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.DIGEST_BATCH_SIZE,
+            help='Number of users whose digests are sent at a time')
+
+    def handle(self, *args, **options):
+        sent = send_digests(options['frequency'], options['batch_size'])
+        self.stdout.write('Sent {} digests'.format(sent))
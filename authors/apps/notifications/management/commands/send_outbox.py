@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from ...fanout import announce_articles
+from ...outbox import Throttle, send_outbox
+
+
+class Command(BaseCommand):
+    help = ('Announce the due new articles to the followers of their '
+            'authors, and send the emails waiting in the outbox, at most '
+            'OUTBOX_RATE_LIMIT a second. The rate applies to each worker '
+            'process on its own, so running several workers multiplies it.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+            help='Number of emails sent over each mail server connection')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep checking the outbox instead of stopping once empty')
+        parser.add_argument(
+            '--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+            help='Seconds to wait between checks of an empty outbox')
+
+    def handle(self, *args, **options):
+        throttle = Throttle(settings.OUTBOX_RATE_LIMIT)
+
+        while True:
+            announced = announce_articles()
+            if announced:
+                self.stdout.write('Announced {} articles'.format(announced))
+
+            sent = send_outbox(options['batch_size'], throttle)
+            if sent:
+                self.stdout.write('Sent {} emails'.format(sent))
+
+            if not options['loop']:
+                return
+
+            connection.close()
+            time.sleep(options['interval'])
@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_merge_20190520_1150'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notifications',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2 on 2026-10-18 17:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0009_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptions',
+            name='digest',
+            field=models.CharField(choices=[('off', 'off'), ('hourly', 'hourly'), ('daily', 'daily')], default='off', max_length=6),
+        ),
+        migrations.CreateModel(
+            name='DigestEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.CharField(max_length=200)),
+                ('url', models.CharField(max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
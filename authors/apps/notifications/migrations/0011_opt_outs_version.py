@@ -0,0 +1,20 @@
+# Generated by Django 2.2 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0010_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptOutsVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32)),
+            ],
+        ),
+    ]
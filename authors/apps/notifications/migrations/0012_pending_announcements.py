@@ -0,0 +1,26 @@
+# Generated by Django 2.2 on 2026-10-18 18:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0050_slug_history_pattern_idx'),
+        ('notifications', '0011_opt_outs_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingAnnouncement',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='articles.ArticleModel')),
+                ('announce_after', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pendingannouncement',
+            index=models.Index(fields=['announce_after', 'article'], name='announcement_due_idx'),
+        ),
+    ]
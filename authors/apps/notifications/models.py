@@ -1,5 +1,8 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.utils import timezone
 
+from ..articles.models import ArticleModel
 from ..authentication.models import User
 from . import utils, actions
 
@@ -22,6 +25,8 @@ class Notifications(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=['user', '-created_at', '-id'],
+                                name='notification_created_at_idx')]
 
     def __str__(self):
 
@@ -39,3 +44,89 @@ class Subscriptions(models.Model):
     email = models.BooleanField(default=True)
 
     app = models.BooleanField(default=True)
+
+    digest = models.CharField(max_length=6, choices=(
+        ('off', 'off'), ('hourly', 'hourly'), ('daily', 'daily')),
+        default='off')
+
+
+class DigestEntry(models.Model):
+    """
+    A notification waiting to be emailed in the digest of its user
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE)
+
+    message = models.CharField(max_length=200)
+
+    url = models.CharField(max_length=200)
+
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+
+
+class PendingAnnouncement(models.Model):
+    """
+    A new article whose followers are waiting to be notified by the
+    send_outbox worker
+    """
+
+    article = models.OneToOneField(
+        ArticleModel, primary_key=True, on_delete=models.CASCADE)
+
+    announce_after = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['announce_after', 'article'],
+                                name='announcement_due_idx')]
+
+
+class OptOutsVersion(models.Model):
+    """
+    A token replaced in the transaction of every change to the
+    notification opt-outs, which processes compare to the one of the
+    opt-outs they loaded
+    """
+
+    version = models.CharField(max_length=32)
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting in the outbox to be sent by the send_outbox command
+    """
+
+    subject = models.TextField()
+
+    body = models.TextField()
+
+    content_subtype = models.CharField(max_length=20, default='plain')
+
+    html = models.TextField(blank=True)
+
+    from_email = models.CharField(max_length=320)
+
+    to = ArrayField(models.CharField(max_length=320), default=list)
+
+    cc = ArrayField(models.CharField(max_length=320), default=list)
+
+    bcc = ArrayField(models.CharField(max_length=320), default=list)
+
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+
+    send_after = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    last_error = models.TextField(blank=True)
+
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['send_after', 'id'],
+                                name='outbox_due_idx',
+                                condition=models.Q(failed_at__isnull=True))]
+
+    def __str__(self):
+
+        return self.subject  # pragma: no cover
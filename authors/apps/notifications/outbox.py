@@ -0,0 +1,209 @@
+"""
+Durable outbox for outgoing email.
+
+The OutboxBackend email backend stores messages in the outbox table,
+in the transaction of the request that sends them, instead of talking
+to the mail server. Blind copies to more than OUTBOX_MAX_RECIPIENTS
+addresses are split into several messages.
+
+The send_outbox command drains the outbox in batches. A batch is
+claimed with one statement that pushes it OUTBOX_LEASE seconds into
+the future, so concurrent workers skip it and a crashed worker's batch
+is sent again later. Each batch is sent over a single connection of
+the OUTBOX_EMAIL_BACKEND, at most OUTBOX_RATE_LIMIT messages a second.
+The rate is kept by each worker process on its own, so running several
+workers multiplies it.
+Failed messages are retried with exponential backoff, and are marked
+failed after OUTBOX_MAX_ATTEMPTS attempts or a permanent rejection.
+"""
+import logging
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# pushes the next due messages into the future and returns them
+CLAIM_EMAILS = """
+UPDATE {outbox}
+SET send_after = statement_timestamp() + %(lease)s * interval '1 second'
+WHERE id IN (
+    SELECT id FROM {outbox}
+    WHERE failed_at IS NULL AND send_after <= statement_timestamp()
+    ORDER BY send_after, id LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING *
+"""
+
+
+def outbox_emails(message):
+    """
+    Return the outbox rows of an email message, splitting its blind
+    copies between rows of at most OUTBOX_MAX_RECIPIENTS
+    """
+    html = next((content for (content, mimetype) in
+                 getattr(message, 'alternatives', [])
+                 if mimetype == 'text/html'), '')
+
+    bcc, size = list(message.bcc), settings.OUTBOX_MAX_RECIPIENTS
+    chunks = [bcc[start:start + size]
+              for start in range(0, len(bcc), size)] or [[]]
+
+    return [models.OutboxEmail(
+        subject=message.subject, body=message.body,
+        content_subtype=message.content_subtype, html=html,
+        from_email=message.from_email,
+        to=[] if index else list(message.to),
+        cc=[] if index else list(message.cc), bcc=chunk)
+        for (index, chunk) in enumerate(chunks)]
+
+
+class OutboxBackend(BaseEmailBackend):
+    """
+    An email backend that stores messages in the outbox
+    """
+
+    def send_messages(self, email_messages):
+        emails = [email for message in email_messages
+                  for email in outbox_emails(message)]
+
+        models.OutboxEmail.objects.bulk_create(emails)
+        return len(email_messages)
+
+
+def email_message(email):
+    """
+    Return the email message of an outbox row
+    """
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email,
+        to=email.to, cc=email.cc, bcc=email.bcc)
+    message.content_subtype = email.content_subtype
+
+    if email.html:
+        message.attach_alternative(email.html, 'text/html')
+    return message
+
+
+def claim_emails(limit):
+    """
+    Lease the next due outbox rows to this worker and return them
+    """
+    emails = models.OutboxEmail.objects.raw(
+        CLAIM_EMAILS.format(outbox=models.OutboxEmail._meta.db_table),
+        {'lease': settings.OUTBOX_LEASE, 'limit': limit})
+
+    return sorted(emails, key=lambda email: email.id)
+
+
+def retry_delay(attempts):
+    """
+    Return how long to wait before the attempt after the given number
+    """
+    return timedelta(seconds=min(
+        settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.OUTBOX_MAX_RETRY_DELAY))
+
+
+def is_permanent(error):
+    """
+    Return whether the mail server rejected a message for good
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for (code, _) in error.recipients.values())
+
+    return (isinstance(error, smtplib.SMTPResponseException) and
+            error.smtp_code >= 500)
+
+
+def defer_email(email, error):
+    """
+    Schedule another attempt at sending an email, or mark it failed
+    """
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+
+    if is_permanent(error) or email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.failed_at = timezone.now()
+        logger.error('Giving up on outbox email %s: %s', email.id, error)
+    else:
+        email.send_after = timezone.now() + retry_delay(email.attempts)
+
+    email.save(update_fields=['attempts', 'last_error', 'send_after',
+                              'failed_at'])
+
+
+class Throttle:
+    """
+    Spaces out calls to stay under a number per second
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+
+    def wait(self):
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def send_batch(emails, throttle):
+    """
+    Send outbox rows over one connection, deleting those that were sent
+    and deferring the others, all of them if the mail server cannot be
+    reached. Return the number sent.
+    """
+    mail = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    sent = []
+
+    try:
+        for (position, email) in enumerate(emails):
+            throttle.wait()
+            try:
+                mail.open()
+            except (smtplib.SMTPException, OSError) as error:
+                for unsent in emails[position:]:
+                    defer_email(unsent, error)
+                break
+
+            try:
+                mail.send_messages([email_message(email)])
+            except (smtplib.SMTPException, OSError) as error:
+                defer_email(email, error)
+                if not isinstance(error, smtplib.SMTPResponseException):
+                    mail.close()
+            else:
+                sent.append(email.id)
+    finally:
+        mail.close()
+        models.OutboxEmail.objects.filter(id__in=sent).delete()
+
+    return len(sent)
+
+
+def send_outbox(batch_size=None, throttle=None):
+    """
+    Send the due outbox emails batch by batch until none are left, and
+    return the number sent
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    throttle = throttle or Throttle(settings.OUTBOX_RATE_LIMIT)
+    sent = 0
+
+    while True:
+        emails = claim_emails(batch_size)
+        if not emails:
+            return sent
+
+        sent += send_batch(emails, throttle)
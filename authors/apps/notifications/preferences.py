@@ -0,0 +1,85 @@
+"""
+Cached notification opt-outs.
+
+Each process holds the ids of the users who opted out of in-app and of
+email notifications in a set per channel, and of those who get their
+emails in digests, loaded with one query when first needed. A changed
+subscription replaces a version token stored in the database, in the
+same transaction, and each check reads the token with one primary key
+lookup, loading the sets again when it was replaced. Since the token
+commits with the change, every process sees it exactly when it can see
+the change, whichever cache backend is configured. The sets are never
+patched in place, since two processes changing subscriptions at once
+could then each miss the other's change.
+"""
+import threading
+import uuid
+
+from django.db import connection
+from django.db.models import Q
+
+from . import models
+
+# replaces the version token of the opt-outs, adding it if missing
+REPLACE_VERSION = """
+INSERT INTO {versions} (id, version) VALUES (1, %s)
+ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version
+"""
+
+
+class OptOuts:
+    """
+    The ids of the users who opted out of each notification channel,
+    and of those who get email digests
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.app = set()
+        self.email = set()
+        self.digest = set()
+
+    def current(self):
+        """
+        Return the ids of the users who opted out of in-app and of email
+        notifications and of those who get email digests, loading them
+        if they changed
+        """
+        version = models.OptOutsVersion.objects.filter(id=1).values_list(
+            'version', flat=True).first() or ''
+
+        with self.lock:
+            if version != self.version:
+                rows = list(models.Subscriptions.objects.filter(
+                    Q(app=False) | Q(email=False) | ~Q(digest='off'))
+                    .values_list('user_id', 'app', 'email', 'digest'))
+
+                self.app = {row[0] for row in rows if not row[1]}
+                self.email = {row[0] for row in rows if not row[2]}
+                self.digest = {row[0] for row in rows if row[3] != 'off'}
+                self.version = version
+
+            return self.app, self.email, self.digest
+
+    def invalidate(self):
+        """
+        Replace the version in the transaction of a change, so that
+        every process loads the opt-outs again once it is committed
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(REPLACE_VERSION.format(
+                versions=connection.ops.quote_name(
+                    models.OptOutsVersion._meta.db_table)),
+                [uuid.uuid4().hex])
+
+    def clear(self):
+        """
+        Forget the opt-outs, so they are loaded again when next needed
+        """
+        with self.lock:
+            self.version = None
+            self.app, self.email, self.digest = set(), set(), set()
+
+
+opt_outs = OptOuts()
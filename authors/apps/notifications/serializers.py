@@ -30,7 +30,7 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscriptions
 
-        fields = ("email", "app")
+        fields = ("email", "app", "digest")
 
     def update(self, instance, validated_data):
 
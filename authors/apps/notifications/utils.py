@@ -1,6 +1,8 @@
 import os
 
+from django.conf import settings
 from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
 from django.template.loader import render_to_string
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
@@ -10,6 +12,9 @@ from . import models
 from ..authentication.models import User
 from ..articles.models import ArticleModel, FavoriteArticleModel
 from ..authentication.messages import errors
+from ..follows.models import UserFollow
+from .fanout import queue_announcement
+from .preferences import opt_outs
 
 domain = os.getenv('DOMAIN')
 
@@ -103,16 +108,6 @@ def fetch_articles(slug):
     return ArticleModel.objects.filter(slug=slug).first()
 
 
-def fetch_user(username):
-    """
-    This method 'fetch_user'
-    fetches an instances of an user
-    if any
-    """
-
-    return User.objects.get(username=username)
-
-
 def check_is_object_owner(requester, user):
     """
     This method 'check_is_object_owner'
@@ -124,26 +119,6 @@ def check_is_object_owner(requester, user):
         raise PermissionDenied(errors["not_owner"])
 
 
-def fetch_unsubscriptions(app=''):
-    """
-    This method 'fetch_unsubscriptions'
-    fetches an instances of excluded
-    users subscriptions
-    """
-
-    mail_exclude = models.Subscriptions.objects.filter(email=False)
-
-    mail_exclude = [fetch_user(
-        username=user.user.username).email for user in mail_exclude]
-
-    app_exclude = models.Subscriptions.objects.filter(app=False)
-
-    app_exclude = [fetch_user(
-        username=user.user.username).email for user in app_exclude]
-
-    return app_exclude if app else mail_exclude
-
-
 def send_mail_notification(recipients, msg=''):
     """
     Sends email for notifications
@@ -156,19 +131,6 @@ def send_mail_notification(recipients, msg=''):
     msg.send()
 
 
-def save_notifications(username, message, url):
-    """
-    Format and save notifications
-    """
-
-    user = username and User.objects.filter(
-        username=username).first() or None
-
-    models.Notifications(user=user,
-                         message=message,
-                         url=url).save()
-
-
 def make_message(author, title='', url='', opt_url='',
                  comment='', html='', follow=''):
     """
@@ -196,70 +158,98 @@ def make_message(author, title='', url='', opt_url='',
     return html_message if html else response
 
 
-def make_notifications(user, article, slug, obj, comment=False):
+def notification_recipients(user_ids, sender):
     """
-    Save notification and send email
+    Return the id and email of the users with the given ids but the
+    sender
     """
 
-    url = "{}/api/articles/{}/".format(domain, slug)
+    return User.objects.filter(id__in=user_ids).exclude(
+        id=sender.id).order_by('id').values_list('id', 'email')
 
-    mail_exlude, app_exclude = (
-        fetch_unsubscriptions(), fetch_unsubscriptions(True))
 
-    message, html_message, mails = (
-        make_message(user.username, article.title,
-                     comment=comment, html=False),
-        make_message(user.username, article.title,
-                     url, opt_url,
-                     comment, True),
-        []
-    )
+def make_notifications(user, article, user_ids, comment=False):
+    """
+    Save the notifications of the users with the given ids in batches,
+    and mail them those who did not opt out or keep them for their
+    digests
+    """
 
-    if comment:
+    url = "{}/api/articles/{}/".format(domain, article.slug)
 
-        [save_notifications(favorite.favoritor.username, message, url)
-         for favorite in obj if favorite.favoritor.email not in app_exclude and
-         not (user.email in favorite.favoritor.email)]
+    message = make_message(user.username, article.title,
+                           comment=comment, html=False)
 
-        mails = [fetch_user(username=favorite.favoritor.username).email
-                 for favorite in obj if favorite.favoritor.email
-                 not in mail_exlude]
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
 
-        if user.username != article.author.username:
+    app_exclude, mail_exclude, digest_users = opt_outs.current()
 
-            if article.author.email not in app_exclude:
+    notifications, entries, mails = [], [], []
 
-                save_notifications(article.author.username, message, url)
+    for (user_id, email) in notification_recipients(
+            user_ids, user).iterator(chunk_size=batch_size):
 
-            if article.author.email not in mail_exlude:
-                mails.append(
-                    fetch_user(username=article.author.username).email)
+        if user_id not in app_exclude:
 
-    else:
+            notifications.append(models.Notifications(
+                user_id=user_id, message=message, url=url))
 
-        [save_notifications(user.follower.username, message, url)
-         for user in obj if user.follower.email not in app_exclude]
+        if user_id in mail_exclude:
 
-        mails = [fetch_user(username=user.follower.username).email
-                 for user in obj if user.follower.email not in mail_exlude]
+            pass
 
-    if user.email in mails:
+        elif user_id in digest_users:
 
-        mails.remove(user.email)
+            entries.append(models.DigestEntry(
+                user_id=user_id, message=message, url=url))
 
-    send_mail_notification(mails, html_message)
+        else:
 
+            mails.append(email)
 
-def create_post_notification(sender, **kwargs):
+        if len(notifications) >= batch_size:
+
+            models.Notifications.objects.bulk_create(notifications)
+
+            notifications = []
+
+        if len(entries) >= batch_size:
+
+            models.DigestEntry.objects.bulk_create(entries)
+
+            entries = []
+
+    models.Notifications.objects.bulk_create(notifications)
+
+    models.DigestEntry.objects.bulk_create(entries)
+
+    if mails:
+
+        send_mail_notification(mails, make_message(
+            user.username, article.title, url, opt_url, comment, True))
+
+
+def notify_followers(article):
     """
-    Create notification if followed users create article
+    Create notifications for the followers of an article's author
     """
 
-    article, author = kwargs["instance"], kwargs["instance"].author
+    author = article.author
+
+    followers = UserFollow.objects.filter(
+        following=author).values('follower_id')
+
+    make_notifications(author, article, followers)
+
+
+def create_post_notification(sender, **kwargs):
+    """
+    Queue the notification of followers if followed users create article
+    """
 
-    followers = author.followers.all()
+    if kwargs['created']:
 
-    make_notifications(author, article, article.slug, followers)
+        queue_announcement(kwargs["instance"].id)
 
 
 def create_comment_notification(sender, **kwargs):
@@ -271,9 +261,12 @@ def create_comment_notification(sender, **kwargs):
 
     article = fetch_articles(slug=slug)
 
-    favorites = fetch_favorites(article=article)
+    favoritors = fetch_favorites(article=article).values('favoritor_id')
+
+    readers = User.objects.filter(
+        Q(id__in=favoritors) | Q(id=article.author_id)).values('id')
 
-    make_notifications(user, article, slug, favorites, True)
+    make_notifications(user, article, readers, True)
 
 
 def create_subscriptions(sender, **kwargs):
@@ -294,25 +287,60 @@ def create_follow_notification(sender, **kwargs):
 
     if kwargs['created']:
 
-        follower, following, email = (kwargs['instance'].follower.username,
-                                      kwargs['instance'].following.username,
-                                      kwargs['instance'].following.email)
+        follower, following = (kwargs['instance'].follower.username,
+                               kwargs['instance'].following)
 
         url = "{}/api/profiles/{}".format(domain, follower)
 
-        mail_exlude, app_exclude = (fetch_unsubscriptions(),
-                                    fetch_unsubscriptions(True))
+        app_exclude, mail_exclude, digest_users = opt_outs.current()
+
+        message = make_message(follower, comment=False, html=False,
+                               follow=True)
+
+        if following.id not in app_exclude:
+
+            models.Notifications.objects.create(user=following,
+                                                message=message, url=url)
+
+        if following.id in mail_exclude:
 
-        message, html_message = (
-            make_message(follower, comment=False, html=False, follow=True),
-            make_message(follower, url, opt_url,
-                         comment=False, html=True, follow=True)
-        )
+            return
 
-        if str(email) not in app_exclude:
+        if following.id in digest_users:
+
+            models.DigestEntry.objects.create(user=following,
+                                              message=message, url=url)
+
+        else:
+
+            send_mail_notification([following.email], make_message(
+                follower, url, opt_url, comment=False, html=True,
+                follow=True))
+
+
+def update_opt_outs(sender, **kwargs):
+    """
+    Record the changed subscriptions of a user
+    """
+
+    subscription = kwargs['instance']
+
+    if (kwargs['created'] and subscription.app and subscription.email and
+            subscription.digest == 'off'):
+
+        return
+
+    opt_outs.invalidate()
+
+
+def forget_opt_outs(sender, **kwargs):
+    """
+    Forget the opt-outs of a user whose subscriptions are deleted
+    """
 
-            save_notifications(following, message, url)
+    subscription = kwargs['instance']
 
-        if str(email) not in mail_exlude:
+    if not (subscription.app and subscription.email and
+            subscription.digest == 'off'):
 
-            send_mail_notification([email], html_message)
+        opt_outs.invalidate()
@@ -8,6 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from . import utils
 from .serializers import NotificationSerializer, SubscriptionsSerializer
 from ..authentication.messages import errors
+from ..core.pagination import get_paginator
 
 
 def retreive_notifications(username, request, read=None):
@@ -18,24 +19,23 @@ def retreive_notifications(username, request, read=None):
     provided
     """
 
-    paginator = utils.PageNumberPaginationNotifications()
-
-    paginator.page_size = request.GET.get('limit', '9')
+    paginator = get_paginator(request, utils.PageNumberPaginationNotifications,
+                              'notifications')
 
     user = utils.get_user(username)
 
     notifications = utils.get_notification(user, read=read)
 
-    count = notifications.count()
+    if not notifications.exists():
+
+        return Response(
+            {"notifications": "You do not have any notifications"})
 
     page = paginator.paginate_queryset(notifications, request)
 
     serializer = NotificationSerializer(page, many=True)
 
-    response = paginator.get_paginated_response(data=serializer.data)
-
-    return response if count else Response(
-        {"notifications": "You do not have any notifications"})
+    return paginator.get_paginated_response(data=serializer.data)
 
 
 class NotificationRetreiveView(RetrieveAPIView):
@@ -1,56 +1,35 @@
-import datetime
-import cloudinary.uploader
 from django.http import JsonResponse
 from rest_framework.exceptions import ParseError
 
 from ..authentication.messages import errors
+from ..core.uploads import ImageUpload, is_image
 
 
 def ImageUploader(image):
     """
-    Upload image to cloudinary
+    Spool an image to be uploaded in the background
     :param image: FILE from post request
-    :return: uploaded image data if image was uploaded successfully else None
+    :return: the pending upload if the file is an image else error raised
     """
 
-    if not str(image.name).endswith(('.png', '.jpg', '.jpeg')):
+    if not is_image(image):
         raise ParseError(errors["bad_image"])
 
-    try:
-        image_data = cloudinary.uploader.upload(
-            image,
-            public_id=str(datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                          .replace("-", "")
-                          .replace(":", "")
-                          .replace(" ", "")),
-            crop='limit',
-            width=2000,
-            height=2000,
-            eager=[
-                {'width': 200, 'height': 200,
-                 'crop': 'thumb', 'gravity': 'face',
-                 'radius': 20, 'effect': 'sepia'},
-                {'width': 100, 'height': 150,
-                 'crop': 'fit', 'format': 'png'}
-            ]
-        )
-        return image_data
-
-    except Exception as e:
-        raise ParseError({"error": e.__dict__})
+    return ImageUpload(image)
 
 
 def validate_image_upload(request):
     """
-    Check if image is provided and uploaded
+    Check if image is provided and spool it, showing a placeholder
+    until it is uploaded
 
     :param request: put request
-    :return: uploaded image data if successful else error raised
+    :return: the pending upload if an image is provided else None
     """
 
     if request.FILES.get("image", False):
 
-        image = ImageUploader(request.FILES["image"])
+        upload = ImageUploader(request.FILES["image"])
+        request.data["image"] = upload.placeholder
 
-        request.data["image"] = image.get(
-            "secure_url", request.FILES["image"])
+        return upload
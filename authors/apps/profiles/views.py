@@ -72,7 +72,7 @@ class ProfileRetreiveUpdateAPIView(RetrieveUpdateAPIView):
 
         self.check_object_permissions(request, user)
 
-        validate_image_upload(request)
+        upload = validate_image_upload(request)
 
         context = {
             "request": request.user.username,
@@ -82,9 +82,17 @@ class ProfileRetreiveUpdateAPIView(RetrieveUpdateAPIView):
         serializer = self.serializer_class(
             user, data=serializer_data, context=context,  partial=True)
 
-        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except Exception:
+            if upload is not None:
+                upload.discard()
+            raise
+
+        profile = serializer.save()
 
-        serializer.save()
+        if upload is not None:
+            upload.attach(profile)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
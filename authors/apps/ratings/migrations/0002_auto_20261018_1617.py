@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ratings',
+            index=models.Index(fields=['rated_by', 'article'], name='rating_user_article_idx'),
+        ),
+    ]
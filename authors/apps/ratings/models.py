@@ -19,3 +19,9 @@ class Ratings(models.Model):
                                  on_delete=models.CASCADE)
 
     rating = models.IntegerField(null=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['rated_by', 'article'],
+                         name='rating_user_article_idx'),
+        ]
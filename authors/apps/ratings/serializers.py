@@ -3,7 +3,7 @@ Ratings serializers
 """
 from rest_framework import serializers
 from .models import Ratings
-from django.db.models import Avg
+from ..articles.utils import article_stats
 
 
 class RatingsSerializer(serializers.ModelSerializer):
@@ -50,9 +50,4 @@ class RatingsSerializer(serializers.ModelSerializer):
         """
         Get the average rating of an article
         """
-        average_rate = Ratings.objects.filter(article=instance.article,
-                                              ).aggregate(rate=Avg('rating'))
-
-        if average_rate["rate"]:
-            return float('%.2f' % (average_rate["rate"]))
-        return 0
+        return article_stats(instance.article).average_rating
@@ -6,6 +6,7 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework import status
+from django.db import transaction
 
 from .models import Ratings, ArticleModel
 from .serializers import RatingsSerializer
@@ -63,7 +64,8 @@ class RatingsAPIView(GenericAPIView):
             serializer = self.serializer_class(data=rate)
 
         serializer.is_valid(raise_exception=True)
-        serializer.save(article=article, rated_by=request.user)
+        with transaction.atomic():
+            serializer.save(article=article, rated_by=request.user)
 
         return Response({
             'message': 'Article rating successful',
@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_auto_20190520_0951'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportmodel',
+            index=models.Index(fields=['-created_at', '-id'], name='report_created_at_idx'),
+        ),
+    ]
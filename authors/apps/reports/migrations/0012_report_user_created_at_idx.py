@@ -0,0 +1,17 @@
+# Generated by Django 2.2 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0011_auto_20261018_1551'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportmodel',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='report_user_created_at_idx'),
+        ),
+    ]
@@ -33,3 +33,7 @@ class ReportModel(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=['-created_at', '-id'],
+                                name='report_created_at_idx'),
+                   models.Index(fields=['user', '-created_at', '-id'],
+                                name='report_user_created_at_idx')]
@@ -5,10 +5,10 @@ from .serializers import ReportSerializer
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from .utils import user_object
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView, DestroyAPIView
 from ...apps.authentication.serializers import UserSerializer
+from ..core.pagination import get_paginator
 
 
 class ReportView(viewsets.ModelViewSet):
@@ -66,14 +66,8 @@ class ReportView(viewsets.ModelViewSet):
         The get reports endpoint
         """
 
-        page_limit = request.GET.get('limit')
-
-        if not page_limit or not page_limit.isdigit():
-            page_limit = 9
-
         queryset = ReportModel.objects.filter(user=request.user)
-        paginator = PageNumberPagination()
-        paginator.page_size = page_limit
+        paginator = get_paginator(request, keyset=True)
 
         page = paginator.paginate_queryset(queryset, request)
         serializer = ReportSerializer(page, many=True,
@@ -208,16 +202,9 @@ class ReportList(ListAPIView):
         get:
         The get all reports endpoint
         """
-        page_limit = request.GET.get('limit')
-
-        if not page_limit or not page_limit.isdigit():
-            page_limit = 9
+        paginator = get_paginator(request, keyset=True)
 
-        queryset = self.queryset
-        paginator = PageNumberPagination()
-        paginator.page_size = page_limit
-
-        page = paginator.paginate_queryset(queryset, request)
+        page = paginator.paginate_queryset(self.queryset, request)
         serializer = ReportSerializer(page, many=True,
                                       context={'request': request})
 
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     'cloudinary',
     'django_extensions',
     'vote',
@@ -49,7 +50,6 @@ INSTALLED_APPS = [
     'authors.apps.profiles',
     'authors.apps.follows',
     'authors.apps.notifications',
-    'mailer',
     'authors.apps.articles',
     'oauth2_provider',
     'social_django',
@@ -181,6 +181,89 @@ REST_FRAMEWORK = {
     ),
 }
 
+# upper bound of the page size clients can request with `limit`
+MAX_PAGE_SIZE = env.int('DJANGO_MAX_PAGE_SIZE', default=100)
+
+# search backend of /api/article/search/, either Postgres full text
+# search or the embedded index kept in ARTICLE_SEARCH_INDEX_DIR
+ARTICLE_SEARCH_BACKEND = env(
+    'ARTICLE_SEARCH_BACKEND',
+    default='authors.apps.articles.utils.ArticleSearchFilter')
+ARTICLE_SEARCH_INDEX_DIR = env(
+    'ARTICLE_SEARCH_INDEX_DIR', default=os.path.join(BASE_DIR, 'search_index'))
+
+# a cache shared between processes, such as memcached or redis, should
+# be configured in production so that invalidations reach every worker
+# rendered articles and tag catalogue pages are only cached when every
+# process shares the cache, such as memcached at CACHE_URL, since their
+# invalidations must reach every worker. The default in-process cache
+# leaves them uncached.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache')
+
+# seconds a rendered article stays cached, bounding how long changes
+# that do not invalidate it, like a commenter's new avatar, take to show
+ARTICLE_CACHE_TIMEOUT = env.int('ARTICLE_CACHE_TIMEOUT', default=60 * 60)
+
+# article reads are buffered by each process and stored in batches of
+# up to this many reads, or after this many seconds
+ARTICLE_READ_BUFFER_SIZE = env.int('ARTICLE_READ_BUFFER_SIZE', default=500)
+ARTICLE_READ_FLUSH_INTERVAL = env.float(
+    'ARTICLE_READ_FLUSH_INTERVAL', default=5.0)
+
+# changes to the vote counters of articles and comments are buffered by
+# each process and stored after this many seconds
+VOTE_FLUSH_INTERVAL = env.float('VOTE_FLUSH_INTERVAL', default=1.0)
+
+# the followers of the author of a new article are notified by the
+# send_outbox worker after this many seconds, so that edits made in the
+# meantime are part of a single announcement, this many articles at a
+# time
+ARTICLE_NOTIFICATION_DELAY = env.float(
+    'ARTICLE_NOTIFICATION_DELAY', default=30.0)
+ARTICLE_ANNOUNCEMENT_BATCH_SIZE = env.int(
+    'ARTICLE_ANNOUNCEMENT_BATCH_SIZE', default=10)
+
+# notifications are saved this many at a time when fanned out to the
+# followers of an author or the readers of an article
+NOTIFICATION_BATCH_SIZE = env.int('NOTIFICATION_BATCH_SIZE', default=5000)
+
+# tag ids are cached by each process for up to this many tag names
+TAG_CACHE_SIZE = env.int('TAG_CACHE_SIZE', default=10000)
+
+# seconds a page of the tag catalogue stays cached, though any change to
+# the tags of an article replaces every cached page
+TAG_CATALOGUE_CACHE_TIMEOUT = env.int(
+    'TAG_CATALOGUE_CACHE_TIMEOUT', default=60 * 60)
+
+# uploaded images are spooled to IMAGE_UPLOAD_SPOOL_DIR and stored by
+# this many background threads with the IMAGE_STORAGE_BACKEND, either
+# Cloudinary or the IMAGE_STORAGE_DIR served from IMAGE_STORAGE_URL.
+# Their articles and profiles show IMAGE_PLACEHOLDER_URL meanwhile.
+IMAGE_UPLOAD_WORKERS = env.int('IMAGE_UPLOAD_WORKERS', default=4)
+IMAGE_UPLOAD_SPOOL_DIR = env(
+    'IMAGE_UPLOAD_SPOOL_DIR', default=os.path.join(BASE_DIR, 'upload_spool'))
+IMAGE_STORAGE_BACKEND = env(
+    'IMAGE_STORAGE_BACKEND',
+    default='authors.apps.core.uploads.CloudinaryStorage')
+IMAGE_STORAGE_DIR = env(
+    'IMAGE_STORAGE_DIR', default=os.path.join(BASE_DIR, 'media', 'images'))
+IMAGE_STORAGE_URL = env(
+    'IMAGE_STORAGE_URL', default='http://localhost:8000/media/images/')
+IMAGE_PLACEHOLDER_URL = env(
+    'IMAGE_PLACEHOLDER_URL',
+    default='https://res.cloudinary.com/{}/image/upload/placeholder.png'
+    .format(env.str('CLOUDINARY_CLOUD_NAME')))
+
+# uploads still spooled after this many seconds were left behind by a
+# process that stopped, and are finished by the sweep_uploads command
+IMAGE_UPLOAD_STALE_AFTER = env.int('IMAGE_UPLOAD_STALE_AFTER',
+                                   default=60 * 60)
+
 # jwt authentication settings
 JWT_AUTH = {
     'JWT_ENCODE_HANDLER':
@@ -242,12 +325,40 @@ SWAGGER_SETTINGS = {
     }
 }
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
+# emails are stored in the outbox and sent by the send_outbox command
+# with the OUTBOX_EMAIL_BACKEND
+EMAIL_BACKEND = 'authors.apps.notifications.outbox.OutboxBackend'
+OUTBOX_EMAIL_BACKEND = env.str(
+    'OUTBOX_EMAIL_BACKEND',
+    default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = env.str('EMAIL_HOST', default='smtp.gmail.com')
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_PORT = env.int('EMAIL_PORT', default=587)
+EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', default=True)
+
+# the outbox is sent in batches of this many emails, each over one
+# connection, at most OUTBOX_RATE_LIMIT emails a second per worker
+# process, and checked every OUTBOX_POLL_INTERVAL seconds when empty
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=100)
+OUTBOX_RATE_LIMIT = env.float('OUTBOX_RATE_LIMIT', default=10.0)
+OUTBOX_POLL_INTERVAL = env.float('OUTBOX_POLL_INTERVAL', default=5.0)
+
+# most blind copies sent in a single email
+OUTBOX_MAX_RECIPIENTS = env.int('OUTBOX_MAX_RECIPIENTS', default=100)
+
+# seconds a worker has to send a batch before other workers take it over
+OUTBOX_LEASE = env.int('OUTBOX_LEASE', default=300)
+
+# failed emails are retried after OUTBOX_RETRY_DELAY seconds, doubling
+# up to OUTBOX_MAX_RETRY_DELAY, and given up after OUTBOX_MAX_ATTEMPTS
+OUTBOX_RETRY_DELAY = env.int('OUTBOX_RETRY_DELAY', default=60)
+OUTBOX_MAX_RETRY_DELAY = env.int('OUTBOX_MAX_RETRY_DELAY', default=60 * 60)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=8)
+
+# users who chose email digests are sent them by the send_digests
+# command, this many users at a time
+DIGEST_BATCH_SIZE = env.int('DIGEST_BATCH_SIZE', default=500)
 
 
 # Cloudinary settings for Django. Add to your settings file.
@@ -1,8 +1,15 @@
 import os
 from django.test import TestCase
+from django.utils import timezone
 from rest_framework.test import APIClient
 from PIL import Image
 from .data import Data
+from ...apps.articles.reads import read_buffer
+from ...apps.articles.tags import tag_cache
+from ...apps.articles.votes import vote_buffer
+from ...apps.notifications.fanout import announce_articles
+from ...apps.notifications.models import PendingAnnouncement
+from ...apps.notifications.preferences import opt_outs
 
 
 class BaseTest(TestCase):
@@ -18,6 +25,21 @@ class BaseTest(TestCase):
 
         self.base_data = Data()
 
+    def tearDown(self):
+        """ Drop what the test buffered and cached. """
+
+        read_buffer.take()
+        vote_buffer.take()
+        opt_outs.clear()
+        tag_cache.clear()
+
+    def announce_articles(self):
+        """
+        Announce the queued new articles without waiting for them
+        """
+        PendingAnnouncement.objects.update(announce_after=timezone.now())
+        return announce_articles()
+
     def signup_user(self, data=''):
         """
         This method 'signup_user' creates an account
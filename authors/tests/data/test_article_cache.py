@@ -0,0 +1,183 @@
+"""
+Article response cache tests
+"""
+from django.core.cache import cache
+from django.test import override_settings
+
+from .base_test import BaseTest
+from ...apps.articles.models import (ArticleModel, FavoriteArticleModel,
+                                     TagModel)
+from ...apps.articles.votes import vote_buffer
+from ...apps.authentication.models import User
+from ...apps.profiles.models import UserProfile
+from ...apps.ratings.models import Ratings
+
+
+@override_settings(SHARED_CACHE=True)
+class ArticleCacheTestCase(BaseTest):
+    """
+    This class defines the test suite for caching rendered articles
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        cache.clear()
+
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.user = User.objects.get(
+            username=self.base_data.user_data['user']['username'])
+        self.article = ArticleModel.objects.create(
+            title='Cached article', description='description', body='body',
+            author=self.user)
+        self.url = '/api/articles/{}/'.format(self.article.slug)
+
+    def fetch(self, url=None, **headers):
+        """
+        Return the article data an anonymous reader gets
+        """
+        response = self.client.get(url or self.url, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_hot_articles_are_read_without_queries(self):
+        """
+        Test that repeated anonymous reads are served from the cache
+        """
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertTrue(first['ETag'].startswith('"'))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_process_local_caches_are_not_used(self):
+        """
+        Test that articles are rendered from the database on every read
+        when the cache is not shared, so no worker serves a stale one
+        """
+        self.client.get(self.url)
+        ArticleModel.objects.filter(id=self.article.id).update(
+            title='Edited elsewhere')
+
+        self.assertEqual(self.fetch()['title'], 'Edited elsewhere')
+        self.assertIsNone(cache.get('article:{}:version'.format(
+            self.article.slug)))
+
+    def test_conditional_get(self):
+        """
+        Test that a matching If-None-Match is answered with 304
+        """
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_authenticated_readers_get_entity_tags(self):
+        """
+        Test that authenticated readers are not served the anonymous
+        rendering but can still revalidate
+        """
+        anonymous = self.client.get(self.url)
+        headers = {'HTTP_AUTHORIZATION': 'Bearer ' + self.token}
+
+        response = self.client.get(self.url, **headers)
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        self.assertIn('read_count', response.json()['data'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response[
+            'ETag'], **headers)
+        self.assertEqual(response.status_code, 304)
+
+    def test_updates_invalidate_articles(self):
+        """
+        Test that edited articles are not served stale, under either
+        their new slug or the one they had
+        """
+        self.fetch()
+
+        self.article.title = 'Renamed article'
+        self.article.save()
+
+        self.assertEqual(self.fetch()['title'], 'Renamed article')
+        self.assertEqual(self.fetch('/api/articles/{}/'.format(
+            self.article.slug))['title'], 'Renamed article')
+
+    def test_votes_invalidate_articles(self):
+        """
+        Test that likes are shown to cached readers once stored
+        """
+        self.fetch()
+
+        self.client.post(self.url + 'like/',
+                         HTTP_AUTHORIZATION='Bearer ' + self.token)
+        vote_buffer.flush()
+
+        self.assertEqual(self.fetch()['num_vote_up'], 1)
+
+    def test_comments_invalidate_articles(self):
+        """
+        Test that new comments and comment likes are shown to cached
+        readers
+        """
+        self.fetch()
+
+        comment = self.create_comment(self.article.slug).data
+        self.assertEqual(len(self.fetch()['comments']), 1)
+
+        self.client.post(
+            self.url + 'comments/{}/like/'.format(comment['id']),
+            HTTP_AUTHORIZATION='Bearer ' + self.token)
+        vote_buffer.flush()
+        self.assertEqual(self.fetch()['comments'][0]['num_vote_up'], 1)
+
+    def test_ratings_and_favorites_invalidate_articles(self):
+        """
+        Test that ratings and favorites are shown to cached readers
+        """
+        reader = User.objects.create_user(
+            username='reader', email='reader@email.com',
+            password='Admin12345')
+        self.fetch()
+
+        Ratings.objects.create(article=self.article, rated_by=reader,
+                               rating=4)
+        self.assertEqual(self.fetch()['average_rating'], 4)
+
+        favorite = FavoriteArticleModel.objects.create(
+            article=self.article, favoritor=reader)
+        self.assertEqual(self.fetch()['favorites_count'], 1)
+
+        favorite.delete()
+        self.assertEqual(self.fetch()['favorites_count'], 0)
+
+    def test_tags_and_profiles_invalidate_articles(self):
+        """
+        Test that tag and author profile changes are shown to cached
+        readers
+        """
+        self.fetch()
+
+        self.article.tag_list.add(TagModel.objects.create(tagname='cached'))
+        self.assertEqual(self.fetch()['tag_list'], ['cached'])
+
+        profile = UserProfile.objects.get(user=self.user)
+        profile.image = 'https://example.com/avatar.png'
+        profile.save()
+        self.assertEqual(self.fetch()['author']['image'],
+                         'https://example.com/avatar.png')
@@ -0,0 +1,81 @@
+"""
+Duplicate article detection tests
+"""
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.articles.text import content_fingerprint
+
+
+class ArticleFingerprintTestCase(BaseTest):
+    """
+    This class defines the test suite for detecting duplicate articles
+    by their content fingerprint
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        data = self.base_data.user_data2
+        signup = self.signup_user()
+        signup2 = self.signup_user(data)
+
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.activate_user(uid=signup2.data.get('data')['id'],
+                           token=signup2.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.control_token = self.login_user_and_get_token(data)
+        self.slug = self.create_article().data['data']['slug']
+
+    def post(self, title, body, token=''):
+        """
+        Create an article with the given text
+        """
+        return self.client.post(
+            '/api/articles/',
+            {'title': title, 'description': 'description', 'body': body},
+            HTTP_AUTHORIZATION='Bearer ' + (token or self.token),
+            format='json')
+
+    def test_reposts_are_detected_by_fingerprint(self):
+        """
+        Test that a repost differing only in case and whitespace is
+        rejected with a single lookup
+        """
+        article = self.base_data.article_data
+        title = '  {}  '.format(article['title'].upper())
+        body = article['body'].replace(' ', '\n  ')
+
+        with self.assertNumQueries(2) as queries:
+            response = self.post(title, body)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('"fingerprint" =', queries.captured_queries[-1]['sql'])
+        self.assertNotIn('"body" =', queries.captured_queries[-1]['sql'])
+
+    def test_other_authors_and_new_text_are_not_duplicates(self):
+        """
+        Test that the same text by another author, or new text by the
+        same author, can be posted
+        """
+        article = self.base_data.article_data
+
+        response = self.post(article['title'], article['body'],
+                             self.control_token)
+        self.assertEqual(response.status_code, 201)
+
+        response = self.post(article['title'], 'A different body')
+        self.assertEqual(response.status_code, 201)
+
+    def test_fingerprints_follow_edits(self):
+        """
+        Test that edited articles are fingerprinted by their new text
+        """
+        article = ArticleModel.objects.get(slug=self.slug)
+        article.body = 'An edited body'
+        article.save()
+
+        self.assertEqual(ArticleModel.objects.get(id=article.id).fingerprint,
+                         content_fingerprint(article.title, 'An edited body'))
@@ -0,0 +1,147 @@
+"""
+Article listing query count tests
+"""
+import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.articles.serializers import ArticleSerializer
+from ...apps.authentication.models import User
+
+
+class ArticleListQueriesTestCase(BaseTest):
+    """
+    This class defines the test suite for the number of queries
+    made when listing articles
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        data = self.base_data.user_data2
+        signup = self.signup_user()
+        signup2 = self.signup_user(data)
+
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.activate_user(uid=signup2.data.get('data')['id'],
+                           token=signup2.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.control_token = self.login_user_and_get_token(data)
+
+    def create_engaged_articles(self, count, start=0):
+        """
+        Create articles with comments, replies, ratings, favorites,
+        highlights and reads
+        """
+        for index in range(start, start + count):
+            article = self.client.post(
+                '/api/articles/',
+                {'title': 'Query count article {}'.format(index),
+                 'description': 'This is the first test data',
+                 'body': 'This is the first body {}'.format(index),
+                 'tag_list': ['python', 'tag{}'.format(index)]},
+                HTTP_AUTHORIZATION='Bearer ' + self.token,
+                format='json')
+            slug = article.data['data']['slug']
+
+            comment = self.create_comment(slug)
+            self.client.post(
+                '/api/articles/{}/comments/?parent_id={}'.format(
+                    slug, comment.data['id']),
+                self.base_data.comment1_data,
+                HTTP_AUTHORIZATION='Bearer ' + self.control_token,
+                format='json')
+
+            for url, data in (('rate', self.base_data.rating_data),
+                              ('favorite', {}),
+                              ('highlight', self.base_data.highlight_data)):
+                self.client.post(
+                    '/api/articles/{}/{}/'.format(slug, url), data,
+                    HTTP_AUTHORIZATION='Bearer ' + self.control_token,
+                    format='json')
+
+            self.client.get('/api/articles/{}/'.format(slug),
+                            HTTP_AUTHORIZATION='Bearer ' +
+                            self.control_token)
+
+    def count_list_queries(self, url, token=None):
+        """
+        Return the number of queries made to list articles
+        """
+        headers = {'HTTP_AUTHORIZATION': 'Bearer ' + token} if token else {}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_article_list_query_count_does_not_grow_with_page_size(self):
+        """
+        Test that listing articles makes the same number of queries
+        however many articles are on the page
+        """
+        self.create_engaged_articles(2)
+        small_page = [
+            self.count_list_queries('/api/articles/'),
+            self.count_list_queries('/api/articles/', self.token),
+            self.count_list_queries('/api/articles/', self.control_token),
+            self.count_list_queries('/api/article/search/?search=Query',
+                                    self.control_token),
+        ]
+
+        self.create_engaged_articles(5, start=2)
+        large_page = [
+            self.count_list_queries('/api/articles/'),
+            self.count_list_queries('/api/articles/', self.token),
+            self.count_list_queries('/api/articles/', self.control_token),
+            self.count_list_queries('/api/article/search/?search=Query',
+                                    self.control_token),
+        ]
+
+        self.assertEqual(small_page, large_page)
+
+    def test_article_list_query_count_is_pinned(self):
+        """
+        Test the number of queries made to list a page of articles
+        """
+        self.create_engaged_articles(3)
+
+        # page with counters, tags, comments, comment votes, comment
+        # authors and article authors
+        with self.assertNumQueries(6):
+            self.client.get('/api/articles/')
+
+        # the above plus the user, favorited, user ratings, likes and
+        # highlights
+        with self.assertNumQueries(11):
+            self.client.get('/api/articles/',
+                            HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+    def test_bulk_serialization_matches_single_article(self):
+        """
+        Test that a page of articles serializes exactly like each
+        article on its own, without its body
+        """
+        self.create_engaged_articles(3)
+
+        for user in User.objects.all():
+            request = APIRequestFactory().get('/api/articles/')
+            request.user = user
+            context = {'request': request}
+            articles = ArticleModel.objects.all()
+
+            page = ArticleSerializer(articles, many=True, context=context)
+            single = [ArticleSerializer(article, context=context).data
+                      for article in articles]
+            for article in single:
+                del article['body']
+
+            self.assertTrue(page.data[0]['comments'][0]['children'])
+            self.assertEqual(json.dumps(page.data), json.dumps(single))
@@ -0,0 +1,85 @@
+"""
+Article reading metrics tests
+"""
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.authentication.models import User
+
+
+class ArticleMetricsTestCase(BaseTest):
+    """
+    This class defines the test suite for the reading metrics stored
+    with every article
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.user = User.objects.get(
+            username=self.base_data.user_data['user']['username'])
+
+    def update(self, slug, data):
+        """
+        Update an article as its author
+        """
+        return self.client.put('/api/articles/{}/'.format(slug), data,
+                               HTTP_AUTHORIZATION='Bearer ' + self.token,
+                               format='json')
+
+    def test_metrics_are_stored_on_create(self):
+        """
+        Test that new articles get a word count, read time and excerpt
+        """
+        body = '<p>word</p> ' * 500
+        response = self.client.post(
+            '/api/articles/',
+            {'title': 'Measured', 'description': 'description',
+             'body': body},
+            HTTP_AUTHORIZATION='Bearer ' + self.token, format='json')
+        data = response.data['data']
+
+        self.assertEqual(data['word_count'], 500)
+        self.assertEqual(data['readtime'], '2 min')
+        self.assertEqual(data['excerpt'], ' '.join(['word'] * 40) + '…')
+
+    def test_metrics_follow_body_changes_only(self):
+        """
+        Test that metrics are only recomputed when the body changes
+        """
+        slug = self.create_article().data['data']['slug']
+
+        with patch('authors.apps.articles.text.measure_text') as measure:
+            self.update(slug, {'title': 'A new title'})
+            slug = ArticleModel.objects.get(title='A new title').slug
+            self.update(slug, {'body': self.base_data.article_data['body']})
+        measure.assert_not_called()
+
+        response = self.update(slug, {'body': 'Three new words'})
+        self.assertEqual(response.data['data']['word_count'], 3)
+        self.assertEqual(response.data['data']['excerpt'], 'Three new words')
+
+    def test_listings_do_not_load_bodies(self):
+        """
+        Test that article listings show excerpts without reading bodies
+        """
+        self.create_article()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/articles/')
+
+        article = response.data['results'][0]
+        self.assertNotIn('body', article)
+        self.assertTrue(article['excerpt'])
+        for query in queries.captured_queries:
+            self.assertNotIn('"articles_articlemodel"."body"', query['sql'])
@@ -0,0 +1,167 @@
+"""
+Deferred article notification tests
+"""
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.authentication.models import User
+from ...apps.follows.models import UserFollow
+from ...apps.notifications.fanout import announce_articles
+from ...apps.notifications.models import Notifications, PendingAnnouncement
+
+
+class ArticleNotificationTestCase(BaseTest):
+    """
+    This class defines the test suite for notifying followers of new
+    articles off the request path
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        self.author = User.objects.create_user(
+            username='notifyauthor', email='notifyauthor@email.com',
+            password='Admin12345')
+        self.followers = [User.objects.create_user(
+            username='follower{}'.format(index),
+            email='follower{}@email.com'.format(index),
+            password='Admin12345') for index in range(3)]
+
+        for follower in self.followers:
+            UserFollow.objects.create(follower=follower,
+                                      following=self.author)
+        Notifications.objects.all().delete()
+        mail.outbox = []
+
+    def publish(self, title='Announced'):
+        """
+        Create an article by the author and return it
+        """
+        return ArticleModel.objects.create(
+            title=title, description='description', body='body',
+            author=self.author)
+
+    def messages(self):
+        """
+        Return the in-app notification messages of the followers
+        """
+        return sorted(Notifications.objects.values_list('message', flat=True))
+
+    def test_followers_are_notified_after_publishing(self):
+        """
+        Test that publishing only queues the notifications, which are
+        created once the article is announced
+        """
+        article = self.publish()
+
+        self.assertEqual(self.messages(), [])
+        self.assertEqual(list(PendingAnnouncement.objects.values_list(
+            'article_id', flat=True)), [article.id])
+
+        self.assertEqual(self.announce_articles(), 1)
+
+        self.assertEqual(self.messages(), [
+            "notifyauthor created a new article 'Announced'."] * 3)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_edits_are_not_announced(self):
+        """
+        Test that edits made before the announcement are part of it, and
+        later edits and vote counter saves are not announced
+        """
+        article = self.publish('Draft title')
+        article.title = 'Final title'
+        article.save()
+        self.announce_articles()
+
+        article.body = 'Edited body'
+        article.save()
+        article.num_vote_up = 1
+        article.save(update_fields=['num_vote_up'])
+        self.announce_articles()
+
+        self.assertEqual(self.messages(), [
+            "notifyauthor created a new article 'Final title'."] * 3)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_deleted_articles_are_not_announced(self):
+        """
+        Test that articles deleted before their announcement are dropped
+        """
+        self.publish().delete()
+        self.announce_articles()
+
+        self.assertEqual(self.messages(), [])
+        self.assertEqual(mail.outbox, [])
+
+    def test_publishing_does_not_depend_on_followers(self):
+        """
+        Test that publishing takes as many queries however many
+        followers the author has
+        """
+        self.publish('Warm up')
+
+        with CaptureQueriesContext(connection) as few:
+            self.publish('Few followers')
+
+        for index in range(3, 20):
+            UserFollow.objects.create(follower=User.objects.create_user(
+                username='follower{}'.format(index),
+                email='follower{}@email.com'.format(index),
+                password='Admin12345'), following=self.author)
+
+        with CaptureQueriesContext(connection) as many:
+            self.publish('Many followers')
+
+        self.assertEqual(len(many), len(few))
+        self.assertFalse(Notifications.objects.filter(
+            message__contains='new article').exists())
+
+    @override_settings(ARTICLE_NOTIFICATION_DELAY=60)
+    def test_announcements_wait_for_the_delay(self):
+        """
+        Test that articles are only announced once the delay is over
+        """
+        self.publish('First')
+        self.publish('Second')
+
+        self.assertEqual(announce_articles(), 0)
+        self.assertEqual(PendingAnnouncement.objects.count(), 2)
+        self.assertEqual(self.announce_articles(), 2)
+        self.assertFalse(PendingAnnouncement.objects.exists())
+
+    def test_announcements_are_kept_with_their_articles(self):
+        """
+        Test that an announcement is committed or rolled back with its
+        article
+        """
+        try:
+            with transaction.atomic():
+                self.publish('Rolled back')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertFalse(PendingAnnouncement.objects.exists())
+
+    def test_worker_announces_articles(self):
+        """
+        Test that the send_outbox worker announces the due articles
+        """
+        self.publish()
+        PendingAnnouncement.objects.update(announce_after=timezone.now())
+        output = StringIO()
+
+        call_command('send_outbox', stdout=output)
+
+        self.assertEqual(output.getvalue(), 'Announced 1 articles\n')
+        self.assertEqual(len(self.messages()), 3)
@@ -0,0 +1,113 @@
+"""
+Per-viewer article overlay tests
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+
+from .base_test import BaseTest
+from ...apps.articles.models import (ArticleModel, FavoriteArticleModel,
+                                     ReadStatsModel)
+from ...apps.articles.overlay import article_overlays, public_overlay
+from ...apps.authentication.models import User
+from ...apps.highlights.models import HighlightsModel
+from ...apps.ratings.models import Ratings
+
+
+class ArticleOverlayTestCase(BaseTest):
+    """
+    This class defines the test suite for splitting articles into a
+    public document and a per-viewer overlay
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        cache.clear()
+
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.reader = User.objects.get(
+            username=self.base_data.user_data['user']['username'])
+        self.author = User.objects.create_user(
+            username='overlayauthor', email='overlayauthor@email.com',
+            password='Admin12345')
+        self.articles = [ArticleModel.objects.create(
+            title='Overlay article {}'.format(index),
+            description='description', body='body', author=self.author)
+            for index in range(3)]
+
+        article = self.articles[0]
+        FavoriteArticleModel.objects.create(article=article,
+                                            favoritor=self.reader)
+        Ratings.objects.create(article=article, rated_by=self.reader,
+                               rating=5)
+        HighlightsModel.objects.create(
+            article=article, highlighted_by=self.reader, highlight='body',
+            comment='noted', location='body', position=0)
+        article.votes.up(self.reader.id)
+        ReadStatsModel.objects.create(article=article, user=self.reader)
+
+    def fetch(self, article, **headers):
+        """
+        Return the data of an article
+        """
+        response = self.client.get(
+            '/api/articles/{}/'.format(article.slug), **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_readers_see_their_overlay(self):
+        """
+        Test that the shared document is served with the reader's own
+        fields applied
+        """
+        public = self.fetch(self.articles[0])
+        personal = self.fetch(self.articles[0],
+                              HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+        self.assertEqual({key: public[key] for key in public_overlay()},
+                         public_overlay())
+        self.assertTrue(personal['favorited'])
+        self.assertTrue(personal['is_liked'])
+        self.assertEqual(personal['user_rating'], 5)
+        self.assertEqual(personal['read_count'], 1)
+        self.assertEqual(personal['highlights'][0]['comment'], 'noted')
+        self.assertEqual(
+            {key: value for (key, value) in personal.items()
+             if key not in public_overlay()},
+            {key: value for (key, value) in public.items()
+             if key not in public_overlay()})
+
+    def test_overlays_do_not_leak_into_the_shared_document(self):
+        """
+        Test that anonymous readers never get a reader's overlay
+        """
+        self.fetch(self.articles[0], HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+        public = self.fetch(self.articles[0])
+        self.assertFalse(public['favorited'])
+        self.assertIsNone(public['user_rating'])
+
+    def test_overlays_of_a_page_are_loaded_in_bulk(self):
+        """
+        Test that the overlays of many articles take a fixed number of
+        queries, and that missing articles are left out
+        """
+        slugs = [article.slug for article in self.articles] + ['missing']
+
+        # articles, favorites, ratings, likes and highlights
+        with self.assertNumQueries(5):
+            overlays = article_overlays(self.reader, slugs)
+
+        self.assertEqual(set(overlays), set(slugs[:3]))
+        self.assertTrue(overlays[slugs[0]]['favorited'])
+        self.assertFalse(overlays[slugs[1]]['favorited'])
+        self.assertEqual(overlays[slugs[1]]['read_count'], 0)
+
+        with self.assertNumQueries(0):
+            overlays = article_overlays(AnonymousUser(), slugs)
+        self.assertEqual(overlays[slugs[0]], public_overlay())
@@ -0,0 +1,289 @@
+"""
+Article full text search tests
+"""
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.articles.search_index import get_index
+from ...apps.authentication.models import User
+
+
+class ArticleSearchTestCase(BaseTest):
+    """
+    This class defines the test suite for full text search of articles
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        self.author = User.objects.create_user(
+            username='searcher', email='searcher@email.com',
+            password='Admin12345')
+        self.other = User.objects.create_user(
+            username='wanderer', email='wanderer@email.com',
+            password='Admin12345')
+
+        self.create('Cooking pasta', 'A quick dinner', 'Boil the water')
+        self.create('Gardening notes', 'Growing tomatoes', 'Pasta sauce '
+                    'starts with tomatoes from the garden')
+        self.create('Travel diary', 'Pasta in Rome', 'Walking all day',
+                    author=self.other)
+
+    def create(self, title, description, body, author=None):
+        """
+        Create an article with the given text
+        """
+        return ArticleModel.objects.create(
+            title=title, description=description, body=body,
+            author=author or self.author)
+
+    def search(self, query):
+        """
+        Return the titles of the articles matching a search
+        """
+        response = self.client.get('/api/article/search/?' + query)
+        if response.status_code == 404:
+            return []
+        return [article['title'] for article in response.data['results']]
+
+    def test_results_are_ordered_by_field_weight(self):
+        """
+        Test that title matches rank above description matches, and
+        description matches above body matches
+        """
+        self.assertEqual(self.search('search=pasta'),
+                         ['Cooking pasta', 'Travel diary', 'Gardening notes'])
+
+    def test_search_matches_word_forms(self):
+        """
+        Test that searches match stemmed word forms and every term
+        """
+        self.assertEqual(self.search('search=gardens'), ['Gardening notes'])
+        self.assertEqual(self.search('search=pasta tomato'),
+                         ['Gardening notes'])
+
+    def test_search_composes_with_filters(self):
+        """
+        Test that the article filters still apply to search results
+        """
+        self.assertEqual(self.search('search=pasta&author=wanderer'),
+                         ['Travel diary'])
+
+    def test_search_by_author_username(self):
+        """
+        Test that searching for a username returns the author's articles
+        """
+        self.assertEqual(self.search('search=wanderer'), ['Travel diary'])
+
+    def test_search_vector_follows_updates(self):
+        """
+        Test that edited articles are searched by their new text
+        """
+        article = ArticleModel.objects.get(title='Travel diary')
+        article.body = 'Climbing mountains'
+        article.save()
+
+        self.assertEqual(self.search('search=mountain'), ['Travel diary'])
+        self.assertEqual(self.search('search=walking'), [])
+
+
+class IndexSearchTestCase(ArticleSearchTestCase):
+    """
+    This class defines the test suite for searching articles with the
+    embedded inverted index
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        override = override_settings(
+            ARTICLE_SEARCH_BACKEND='authors.apps.articles.search_index.'
+                                   'IndexSearchFilter',
+            ARTICLE_SEARCH_INDEX_DIR=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.directory = directory
+        ArticleSearchTestCase.setUp(self)
+        self.commit()
+
+    def commit(self):
+        """
+        Run the work the test queued for after commit, which the test
+        transaction never reaches
+        """
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for (_, callback) in callbacks:
+            callback()
+
+    def search(self, query):
+        """
+        Return the titles of the articles matching a search once the
+        saves so far are committed
+        """
+        self.commit()
+        return ArticleSearchTestCase.search(self, query)
+
+    def settle(self):
+        """
+        Commit the saves so far and finish merging their segments
+        """
+        self.commit()
+        if get_index().merge_thread is not None:
+            get_index().merge_thread.join()
+        get_index().merge()
+
+    def test_results_are_ordered_by_field_weight(self):
+        """
+        Test that title matches rank above description matches, and
+        description matches above body matches
+        """
+        self.assertEqual(self.search('search=pasta'),
+                         ['Cooking pasta', 'Travel diary', 'Gardening notes'])
+
+    def test_search_matches_word_forms(self):
+        """
+        Test that prefix terms match every word they start
+        """
+        self.assertEqual(self.search('search=garden'), ['Gardening notes'])
+        self.assertEqual(self.search('search=garden*'), ['Gardening notes'])
+        self.assertEqual(self.search('search=pasta tomatoes'),
+                         ['Gardening notes'])
+
+    def test_search_vector_follows_updates(self):
+        """
+        Test that edited articles are searched by their new text
+        """
+        article = ArticleModel.objects.get(title='Travel diary')
+        article.body = 'Climbing mountains'
+        article.save()
+
+        self.assertEqual(self.search('search=mountains'), ['Travel diary'])
+        self.assertEqual(self.search('search=walking'), [])
+
+    def test_search_by_author_username(self):
+        """
+        Test that the index only holds the article text
+        """
+        self.assertEqual(self.search('search=wanderer'), [])
+
+    def test_or_terms(self):
+        """
+        Test that terms separated by OR match either term
+        """
+        self.assertEqual(self.search('search=rome OR boil'),
+                         ['Travel diary', 'Cooking pasta'])
+        self.assertEqual(self.search('search=rome AND boil'), [])
+
+    def test_deleted_articles_leave_the_index(self):
+        """
+        Test that deleted articles are no longer found
+        """
+        ArticleModel.objects.get(title='Cooking pasta').delete()
+
+        self.assertEqual(self.search('search=pasta'),
+                         ['Travel diary', 'Gardening notes'])
+
+    def test_unchanged_saves_are_not_reindexed(self):
+        """
+        Test that saving an article without editing its text does not
+        write to the index
+        """
+        generation = get_index().read_manifest()['generation']
+
+        article = ArticleModel.objects.get(title='Travel diary')
+        article.vote_score = 3
+        article.save()
+
+        self.assertEqual(get_index().read_manifest()['generation'],
+                         generation)
+
+    def test_segments_are_merged(self):
+        """
+        Test that incremental updates are merged into few segments
+        """
+        article = ArticleModel.objects.get(title='Travel diary')
+        for index in range(20):
+            article.body = 'Edition {} of the diary'.format(index)
+            article.save()
+        self.settle()
+
+        manifest = get_index().read_manifest()
+        self.assertLessEqual(len(manifest['segments']),
+                             get_index().max_segments)
+        self.assertEqual(len([name for name in os.listdir(self.directory)
+                              if name.endswith('.idx')]),
+                         len(manifest['segments']))
+        self.assertEqual(self.search('search=edition 19'), ['Travel diary'])
+        self.assertEqual(self.search('search=edition 18'), [])
+
+    def test_snapshots_outlive_merges(self):
+        """
+        Test that a search holding the segments of an older manifest can
+        still read them after a merge removed their files
+        """
+        snapshot = get_index().refresh()
+
+        article = ArticleModel.objects.get(title='Travel diary')
+        for index in range(20):
+            article.body = 'Edition {} of the diary'.format(index)
+            article.save()
+        self.settle()
+
+        self.assertIsNot(get_index().refresh(), snapshot)
+        self.assertFalse(any(os.path.exists(segment.path)
+                             for segment in snapshot.segments))
+        self.assertEqual(len(snapshot.live_postings('pasta')[0]), 3)
+
+    def test_rebuild_command(self):
+        """
+        Test that the index can be rebuilt from the articles table
+        """
+        shutil.rmtree(self.directory)
+        self.assertEqual(self.search('search=pasta'), [])
+
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(self.search('search=pasta'),
+                         ['Cooking pasta', 'Travel diary', 'Gardening notes'])
+
+    def test_saves_during_a_rebuild_are_kept(self):
+        """
+        Test that articles can be indexed while the index is rebuilt, and
+        stay indexed once the rebuilt segment is swapped in
+        """
+        def documents():
+            yield {'id': 0, 'title': 'Stale', 'description': '', 'body': ''}
+            get_index().add([{'id': 0, 'title': 'Fresh', 'description': '',
+                              'body': 'Written meanwhile'}])
+
+        get_index().rebuild(documents())
+
+        self.assertEqual(get_index().search('fresh'), [0])
+        self.assertEqual(get_index().search('stale'), [])
+
+    def test_rolled_back_saves_are_not_indexed(self):
+        """
+        Test that articles are only indexed once their save is committed
+        """
+        try:
+            with transaction.atomic():
+                self.create('Abandoned draft', 'Never saved', 'Rolled back')
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertEqual(get_index().search('abandoned'), [])
+        self.assertEqual(self.search('search=abandoned'), [])
@@ -0,0 +1,157 @@
+"""
+Article engagement counters tests
+"""
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel, ArticleStatsModel
+from ...apps.articles.reads import read_buffer
+from ...apps.ratings.models import Ratings
+
+
+class ArticleStatsTestCase(BaseTest):
+    """
+    This class defines the test suite for the counters kept
+    for every article
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        data = self.base_data.user_data2
+        signup = self.signup_user()
+        signup2 = self.signup_user(data)
+
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.activate_user(uid=signup2.data.get('data')['id'],
+                           token=signup2.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.control_token = self.login_user_and_get_token(data)
+        self.slug = self.create_article().data['data']['slug']
+
+    def stats(self):
+        """
+        Fetch the counters of the test article
+        """
+        return ArticleStatsModel.objects.get(article__slug=self.slug)
+
+    def test_counters_are_created_with_article(self):
+        """
+        Test that a new article starts with zeroed counters
+        """
+        stats = self.stats()
+
+        self.assertEqual((stats.favorites_count, stats.read_count,
+                          stats.comments_count, stats.rating_count),
+                         (0, 0, 0, 0))
+        self.assertEqual(stats.average_rating, 0)
+
+    def test_favorites_are_counted(self):
+        """
+        Test that favoriting and unfavoriting updates the count
+        """
+        url = '/api/articles/{}/favorite/'.format(self.slug)
+
+        self.client.post(url, HTTP_AUTHORIZATION='Bearer ' +
+                         self.control_token, format='json')
+        self.client.post(url, HTTP_AUTHORIZATION='Bearer ' +
+                         self.control_token, format='json')
+        self.assertEqual(self.stats().favorites_count, 1)
+
+        self.client.delete(url, HTTP_AUTHORIZATION='Bearer ' +
+                           self.control_token, format='json')
+        self.assertEqual(self.stats().favorites_count, 0)
+
+    def test_ratings_keep_a_running_sum_and_count(self):
+        """
+        Test that new, changed and deleted ratings update the
+        running sum and count
+        """
+        url = '/api/articles/{}/rate/'.format(self.slug)
+
+        response = self.client.post(url, {'rating': 4},
+                                    HTTP_AUTHORIZATION='Bearer ' +
+                                    self.control_token, format='json')
+        self.assertEqual(
+            response.data['Rating']['averate_article_rating'], 4)
+
+        response = self.client.post(url, {'rating': 1},
+                                    HTTP_AUTHORIZATION='Bearer ' +
+                                    self.control_token, format='json')
+        self.assertEqual(
+            response.data['Rating']['averate_article_rating'], 1)
+        self.assertEqual((self.stats().rating_sum,
+                          self.stats().rating_count), (1, 1))
+
+        Ratings.objects.get(article__slug=self.slug).delete()
+        self.assertEqual((self.stats().rating_sum,
+                          self.stats().rating_count), (0, 0))
+
+    def test_reads_are_counted_once_per_reader(self):
+        """
+        Test that reads by the same user are counted once
+        """
+        for _ in range(3):
+            response = self.client.get(
+                '/api/articles/{}/'.format(self.slug),
+                HTTP_AUTHORIZATION='Bearer ' + self.control_token)
+            read_buffer.flush()
+
+        self.assertEqual(response.json()['data']['read_count'], 1)
+        self.assertEqual(self.stats().read_count, 1)
+
+    def test_comments_and_replies_are_counted(self):
+        """
+        Test that comments and replies are counted, and that deleting
+        a comment discounts its replies
+        """
+        comment = self.create_comment(self.slug)
+        self.client.post(
+            '/api/articles/{}/comments/?parent_id={}'.format(
+                self.slug, comment.data['id']),
+            self.base_data.comment1_data,
+            HTTP_AUTHORIZATION='Bearer ' + self.control_token,
+            format='json')
+        self.assertEqual(self.stats().comments_count, 2)
+
+        response = self.client.get(
+            '/api/articles/{}/comments/'.format(self.slug))
+        self.assertEqual(response.data['comments_count'], 2)
+
+        self.delete_comment(self.slug, comment.data['id'])
+        self.assertEqual(self.stats().comments_count, 0)
+
+    def test_counters_are_deleted_with_article(self):
+        """
+        Test that deleting an article removes its counters
+        """
+        ArticleModel.objects.get(slug=self.slug).delete()
+
+        self.assertFalse(ArticleStatsModel.objects.exists())
+
+    def test_missing_counters_are_counted(self):
+        """
+        Test that an article without counters gets them counted from
+        its favorites, comments and ratings on its next change
+        """
+        self.create_comment(self.slug)
+        self.client.post('/api/articles/{}/rate/'.format(self.slug),
+                         {'rating': 3}, HTTP_AUTHORIZATION='Bearer ' +
+                         self.control_token, format='json')
+        ArticleStatsModel.objects.all().delete()
+
+        self.client.post('/api/articles/{}/favorite/'.format(self.slug),
+                         HTTP_AUTHORIZATION='Bearer ' + self.control_token,
+                         format='json')
+
+        stats = self.stats()
+        self.assertEqual((stats.favorites_count, stats.comments_count,
+                          stats.rating_sum, stats.rating_count),
+                         (1, 1, 3, 1))
+
+        ArticleStatsModel.objects.all().delete()
+        self.client.get('/api/articles/{}/'.format(self.slug),
+                        HTTP_AUTHORIZATION='Bearer ' + self.control_token)
+        read_buffer.flush()
+        self.assertEqual(self.stats().read_count, 1)
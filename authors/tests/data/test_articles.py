@@ -208,7 +208,7 @@ class ModelTestCase(BaseTest):
                 {'body': ''.join(random.choice(letters))})
             i = i+1
 
-        response = self.client.get('/api/articles/')
+        response = self.client.get('/api/articles/?page=1')
 
         self.assertEqual(response.status_code,
                          status.HTTP_200_OK)
@@ -483,4 +483,5 @@ class ModelTestCase(BaseTest):
         self.assertTrue('Tags' in response.data)
         self.assertEqual(response.status_code,
                          status.HTTP_200_OK)
-        self.assertEqual(response.data['Tags'][0], 'react')
+        self.assertEqual(response.data['Tags'][0],
+                         {'tagname': 'react', 'article_count': 1})
@@ -0,0 +1,119 @@
+"""
+Comment thread query count tests
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base_test import BaseTest
+
+
+class CommentTreeQueriesTestCase(BaseTest):
+    """
+    This class defines the test suite for loading comment threads
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.slug = self.create_article().data['data']['slug']
+
+    def reply(self, parent_id):
+        """
+        Reply to a comment and return the id of the reply
+        """
+        response = self.client.post(
+            '/api/articles/{}/comments/?parent_id={}'.format(
+                self.slug, parent_id),
+            self.base_data.comment1_data,
+            HTTP_AUTHORIZATION='Bearer ' + self.token,
+            format='json')
+
+        return response.data['id']
+
+    def create_thread(self, depth):
+        """
+        Create a comment with a chain of nested replies
+        """
+        parent_id = self.create_comment(self.slug).data['id']
+        for _ in range(depth):
+            parent_id = self.reply(parent_id)
+
+    def count_queries(self, url):
+        """
+        Return the number of queries made to get a url
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_thread_depth(self):
+        """
+        Test that listing comments and getting an article make the
+        same number of queries however deep the threads are
+        """
+        comments_url = '/api/articles/{}/comments/'.format(self.slug)
+        article_url = '/api/articles/{}/'.format(self.slug)
+
+        self.create_thread(1)
+        shallow = [self.count_queries(comments_url),
+                   self.count_queries(article_url)]
+
+        self.create_thread(6)
+        deep = [self.count_queries(comments_url),
+                self.count_queries(article_url)]
+
+        self.assertEqual(shallow, deep)
+
+    def test_comments_are_nested_in_tree_order(self):
+        """
+        Test that replies are nested under their parents in the order
+        they were made
+        """
+        first = self.create_comment(self.slug).data['id']
+        second = self.create_comment(self.slug).data['id']
+        replies = [self.reply(first), self.reply(first)]
+        nested = self.reply(replies[0])
+        self.reply(second)
+
+        response = self.client.get(
+            '/api/articles/{}/'.format(self.slug),
+            HTTP_AUTHORIZATION='Bearer ' + self.token)
+        comments = response.json()['data']['comments']
+
+        self.assertEqual([comment['id'] for comment in comments],
+                         [first, second])
+        self.assertEqual([reply['id'] for reply in comments[0]['children']],
+                         replies)
+        self.assertEqual(comments[0]['children'][0]['children'][0]['id'],
+                         nested)
+        self.assertIn('votes_score', comments[0])
+        self.assertIn('votes', comments[0]['children'][0])
+
+    def test_updated_comment_includes_its_replies(self):
+        """
+        Test that updating a comment returns its nested replies
+        """
+        comment = self.create_comment(self.slug).data['id']
+        reply = self.reply(comment)
+        nested = self.reply(reply)
+
+        response = self.client.put(
+            '/api/articles/{}/comments/?id={}'.format(self.slug, comment),
+            {'comment': 'changed comment'},
+            HTTP_AUTHORIZATION='Bearer ' + self.token,
+            format='json')
+        children = response.data['data']['children']
+
+        self.assertEqual(children[0]['id'], reply)
+        self.assertEqual(children[0]['children'][0]['id'], nested)
+        self.assertEqual(children[0]['author']['username'],
+                         self.base_data.user_data['user']['username'])
@@ -0,0 +1,163 @@
+"""
+Email digest tests
+"""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.management import call_command
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.authentication.models import User
+from ...apps.notifications.digests import send_digests
+from ...apps.notifications.models import (DigestEntry, Notifications,
+                                          Subscriptions)
+from ...apps.notifications.preferences import opt_outs
+from ...apps.notifications.utils import make_notifications
+
+
+class DigestTestCase(BaseTest):
+    """
+    This class defines the test suite for collecting the notifications
+    of users who chose digests and emailing them periodically
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        self.author = User.objects.create(
+            username='digestauthor', email='digestauthor@email.com')
+        self.article = ArticleModel.objects.create(
+            title='Collected', description='description', body='body',
+            author=self.author)
+        self.readers = {digest: User.objects.create(
+            username='{}reader'.format(digest),
+            email='{}reader@email.com'.format(digest))
+            for digest in ('off', 'hourly', 'daily')}
+
+        for (digest, reader) in self.readers.items():
+            self.subscribe(reader, digest=digest)
+        mail.outbox = []
+
+    def subscribe(self, user, **preferences):
+        """
+        Save the subscription preferences of a user
+        """
+        subscription = Subscriptions.objects.get(user=user)
+        for (key, value) in preferences.items():
+            setattr(subscription, key, value)
+        subscription.save()
+
+    def notify(self, times=1):
+        """
+        Notify all readers of the article the given number of times
+        """
+        for _ in range(times):
+            make_notifications(self.author, self.article,
+                               [reader.id for reader in
+                                self.readers.values()])
+
+    def test_digest_users_are_not_mailed_each_notification(self):
+        """
+        Test that readers who chose digests get their notifications in
+        the app and kept for their digests instead of mailed
+        """
+        self.notify(2)
+
+        self.assertEqual([message.bcc for message in mail.outbox],
+                         [['offreader@email.com']] * 2)
+        self.assertEqual(sorted(DigestEntry.objects.values_list(
+            'user__username', flat=True)), ['dailyreader'] * 2 +
+            ['hourlyreader'] * 2)
+        self.assertEqual(Notifications.objects.count(), 6)
+
+    def test_digests_list_all_entries_in_one_email(self):
+        """
+        Test that each reader of a frequency gets one email rendered once
+        with all their entries, which are then deleted
+        """
+        self.notify(3)
+        mail.outbox = []
+
+        with patch('authors.apps.notifications.digests.render_to_string',
+                   return_value='digest') as render:
+            self.assertEqual(send_digests('hourly'), 1)
+
+        render.assert_called_once()
+        self.assertEqual(len(render.call_args[0][1]['entries']), 3)
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['hourlyreader@email.com']])
+        self.assertFalse(DigestEntry.objects.filter(
+            user=self.readers['hourly']).exists())
+        self.assertEqual(DigestEntry.objects.count(), 3)
+        self.assertEqual(send_digests('hourly'), 0)
+
+    def test_digests_are_sent_in_batches(self):
+        """
+        Test that the readers of a frequency are sent their digests a
+        batch at a time
+        """
+        self.subscribe(self.readers['off'], digest='daily')
+        self.notify()
+
+        self.assertEqual(send_digests('daily', batch_size=1), 2)
+        self.assertIn(
+            "digestauthor created a new article &#39;Collected&#39;.",
+            mail.outbox[0].body)
+        self.assertFalse(DigestEntry.objects.filter(
+            user__subscriptions__digest='daily').exists())
+
+    def test_leftover_entries_are_sent_hourly(self):
+        """
+        Test that entries of readers who turned digests off are sent
+        with the hourly digests, and dropped if they stopped emails
+        """
+        self.notify()
+        self.subscribe(self.readers['daily'], digest='off')
+        self.subscribe(self.readers['hourly'], email=False)
+        mail.outbox = []
+
+        self.assertEqual(send_digests('hourly'), 1)
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['dailyreader@email.com']])
+        self.assertFalse(DigestEntry.objects.exists())
+
+    def test_subscriptions_accept_a_digest_frequency(self):
+        """
+        Test that users can choose a digest frequency and are then
+        recorded as digest users
+        """
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        token = self.login_user_and_get_token()
+
+        response = self.client.put(
+            '/api/notifications/subscriptions', {'digest': 'daily'},
+            HTTP_AUTHORIZATION='Bearer ' + token, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        user = User.objects.get(
+            username=self.base_data.user_data['user']['username'])
+        self.assertIn(user.id, opt_outs.current()[2])
+
+        response = self.client.put(
+            '/api/notifications/subscriptions', {'digest': 'weekly'},
+            HTTP_AUTHORIZATION='Bearer ' + token, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_sends_digests(self):
+        """
+        Test that the scheduled command sends the digests of a frequency
+        """
+        self.notify()
+        mail.outbox = []
+        output = StringIO()
+
+        call_command('send_digests', 'daily', stdout=output)
+
+        self.assertEqual(output.getvalue(), 'Sent 1 digests\n')
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['dailyreader@email.com']])
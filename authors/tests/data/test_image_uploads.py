@@ -0,0 +1,197 @@
+"""
+Background image upload tests
+"""
+import io
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIClient, APITransactionTestCase
+
+from ...apps.articles.models import ArticleModel
+from ...apps.authentication.models import User
+from ...apps.core.uploads import FileSystemStorage, ImageUpload, upload_pool
+from ...apps.profiles.models import UserProfile
+
+released = threading.Event()
+
+
+class BlockingStorage(FileSystemStorage):
+    """
+    Stores images once the test lets it
+    """
+
+    def save(self, path, name):
+        released.wait(5)
+        return super().save(path, name)
+
+
+class FailingStorage(FileSystemStorage):
+    """
+    Fails to store images
+    """
+
+    def save(self, path, name):
+        raise OSError('Storage unavailable')
+
+
+class ImageUploadTestCase(APITransactionTestCase):
+    """
+    This class defines the test suite for uploading article and profile
+    images in the background
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(
+            IMAGE_UPLOAD_SPOOL_DIR=os.path.join(self.directory, 'spool'),
+            IMAGE_STORAGE_DIR=os.path.join(self.directory, 'images'),
+            IMAGE_STORAGE_BACKEND='authors.apps.core.uploads.'
+                                  'FileSystemStorage')
+        self.settings.enable()
+
+        self.user = User.objects.create_user(
+            username='uploader', email='uploader@email.com',
+            password='Admin12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        """ Remove the spooled and stored images. """
+
+        released.set()
+        upload_pool.wait(5)
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def image(self):
+        """
+        Return an uploaded PNG image
+        """
+        content = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(content, 'PNG')
+        return SimpleUploadedFile('image.png', content.getvalue(),
+                                  content_type='image/png')
+
+    def spooled(self):
+        """
+        Return the images waiting in the spool
+        """
+        return os.listdir(settings.IMAGE_UPLOAD_SPOOL_DIR)
+
+    def create_article(self):
+        """
+        Create an article with an image
+        """
+        return self.client.post(
+            '/api/articles/',
+            {'title': 'Illustrated', 'description': 'description',
+             'body': 'body', 'image': self.image()},
+            format='multipart')
+
+    @override_settings(IMAGE_STORAGE_BACKEND='authors.tests.data.'
+                                             'test_image_uploads.BlockingStorage')
+    def test_articles_are_saved_before_their_image(self):
+        """
+        Test that an article is created with a placeholder that the
+        stored image replaces
+        """
+        released.clear()
+        response = self.create_article()
+
+        self.assertEqual(response.status_code, 201)
+        placeholder = response.data['data']['image']
+        self.assertTrue(placeholder.startswith(
+            settings.IMAGE_PLACEHOLDER_URL))
+        self.assertEqual(len(self.spooled()), 1)
+
+        released.set()
+        upload_pool.wait(5)
+
+        image = ArticleModel.objects.get(title='Illustrated').image
+        self.assertTrue(image.startswith(settings.IMAGE_STORAGE_URL))
+        self.assertTrue(os.path.exists(os.path.join(
+            settings.IMAGE_STORAGE_DIR, os.path.basename(image))))
+        self.assertEqual(self.spooled(), [])
+
+    def test_profiles_get_their_uploaded_image(self):
+        """
+        Test that a profile image is stored in the background
+        """
+        response = self.client.put('/api/profiles/uploader',
+                                   {'image': self.image()},
+                                   format='multipart')
+        self.assertEqual(response.status_code, 200)
+        upload_pool.wait(5)
+
+        image = UserProfile.objects.get(user=self.user).image
+        self.assertTrue(image.startswith(settings.IMAGE_STORAGE_URL))
+        self.assertEqual(self.spooled(), [])
+
+    @override_settings(IMAGE_STORAGE_BACKEND='authors.tests.data.'
+                                             'test_image_uploads.FailingStorage')
+    def test_failed_uploads_remove_the_placeholder(self):
+        """
+        Test that an image that cannot be stored leaves no placeholder
+        or spooled file behind
+        """
+        with self.assertLogs('authors.apps.core.uploads', 'ERROR'):
+            self.assertEqual(self.create_article().status_code, 201)
+            upload_pool.wait(5)
+
+        self.assertEqual(ArticleModel.objects.get(title='Illustrated').image,
+                         '')
+        self.assertEqual(self.spooled(), [])
+
+    def left_behind(self, title, spooled=True):
+        """
+        Create an article showing the placeholder of an upload spooled
+        long ago by a process that stopped
+        """
+        upload = ImageUpload.spooled(os.path.join(
+            settings.IMAGE_UPLOAD_SPOOL_DIR, '1000-{}.png'.format(
+                title.lower())))
+        os.makedirs(settings.IMAGE_UPLOAD_SPOOL_DIR, exist_ok=True)
+        if spooled:
+            with open(upload.path, 'wb') as spool:
+                spool.write(self.image().read())
+
+        return ArticleModel.objects.create(
+            title=title, description='description', body='body',
+            author=self.user, image=upload.placeholder)
+
+    def test_left_behind_uploads_are_swept(self):
+        """
+        Test that uploads a stopped process left behind are stored, or
+        give way to the default image once their spooled file is gone,
+        while recent uploads are left to their process
+        """
+        stored = self.left_behind('Stored')
+        lost = self.left_behind('Lost', spooled=False)
+        open(os.path.join(settings.IMAGE_UPLOAD_SPOOL_DIR, '1000-orphan.png'),
+             'wb').close()
+
+        recent = ImageUpload(self.image())
+        ArticleModel.objects.create(
+            title='Recent', description='description', body='body',
+            author=self.user, image=recent.placeholder)
+
+        output = StringIO()
+        call_command('sweep_uploads', stdout=output)
+
+        self.assertEqual(output.getvalue(), 'Stored 1 images\n')
+        self.assertTrue(ArticleModel.objects.get(id=stored.id).image
+                        .startswith(settings.IMAGE_STORAGE_URL))
+        self.assertEqual(ArticleModel.objects.get(id=lost.id).image, '')
+        self.assertEqual(ArticleModel.objects.get(title='Recent').image,
+                         recent.placeholder)
+        self.assertEqual(self.spooled(), [os.path.basename(recent.path)])
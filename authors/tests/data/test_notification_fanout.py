@@ -0,0 +1,134 @@
+"""
+Bulk notification fan-out tests
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from fluent_comments.models import FluentComment
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.authentication.models import User
+from ...apps.follows.models import UserFollow
+from ...apps.notifications.models import Notifications, Subscriptions
+from ...apps.notifications.preferences import opt_outs
+from ...apps.notifications.utils import notify_followers
+from ...apps.profiles.models import UserProfile
+
+
+class NotificationFanoutTestCase(BaseTest):
+    """
+    This class defines the test suite for notifying many users with a
+    fixed number of queries
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        self.author = User.objects.create(
+            username='fanoutauthor', email='fanoutauthor@email.com')
+        self.article = ArticleModel.objects.create(
+            title='Fanned out', description='description', body='body',
+            author=self.author)
+        mail.outbox = []
+
+    def follow(self, count, start=0):
+        """
+        Give the author the given number of new followers, with the
+        profiles and subscriptions that saving them would create
+        """
+        followers = User.objects.bulk_create(
+            User(username='fan{}'.format(index),
+                 email='fan{}@email.com'.format(index))
+            for index in range(start, start + count))
+        UserProfile.objects.bulk_create(
+            UserProfile(user=follower) for follower in followers)
+        Subscriptions.objects.bulk_create(
+            Subscriptions(user=follower) for follower in followers)
+        UserFollow.objects.bulk_create(
+            UserFollow(follower=follower, following=self.author)
+            for follower in followers)
+        return followers
+
+    def notify(self):
+        """
+        Notify the followers of the article and return the number of
+        queries it took
+        """
+        with CaptureQueriesContext(connection) as queries:
+            notify_followers(self.article)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_followers(self):
+        """
+        Test that notifying ten or a thousand followers takes as many
+        queries, once the opt-outs are loaded
+        """
+        opt_outs.current()
+
+        self.follow(10)
+        few = self.notify()
+
+        self.follow(990, start=10)
+        Notifications.objects.all().delete()
+        many = self.notify()
+
+        self.assertEqual(many, few)
+        self.assertEqual(Notifications.objects.count(), 1000)
+        self.assertEqual(len(mail.outbox[-1].bcc), 1000)
+
+    def test_opted_out_followers_are_left_out(self):
+        """
+        Test that followers only get the notifications they opted in to
+        """
+        followers = self.follow(3)
+        Subscriptions.objects.filter(user=followers[0]).update(app=False)
+        Subscriptions.objects.filter(user=followers[1]).update(email=False)
+
+        self.notify()
+
+        self.assertEqual(
+            sorted(Notifications.objects.values_list('user', flat=True)),
+            [followers[1].id, followers[2].id])
+        self.assertEqual(sorted(mail.outbox[0].bcc),
+                         [followers[0].email, followers[2].email])
+
+    def test_commenters_are_not_notified(self):
+        """
+        Test that the author of a comment is not notified of it, and the
+        author of the article is notified once when a favoritor too
+        """
+        commenter = User.objects.create(
+            username='commenter', email='commenter@email.com')
+        self.article.favorited_article.create(favoritor=commenter)
+        self.article.favorited_article.create(favoritor=self.author)
+        Notifications.objects.all().delete()
+
+        FluentComment.objects.create(
+            object_pk=self.article.slug, comment='A comment',
+            content_type=ContentType.objects.get(model='user'),
+            user=commenter, site_id=settings.SITE_ID)
+
+        self.assertEqual(
+            list(Notifications.objects.values_list('user', flat=True)),
+            [self.author.id])
+
+    def test_benchmark_reports_queries(self):
+        """
+        Test that the benchmark reports the queries for each size
+        """
+        output = StringIO()
+        call_command('benchmark_notifications', 5, 50, stdout=output)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual([line.split(':')[0] for line in lines],
+                         ['5 followers', '50 followers'])
+        self.assertEqual(len({line.split()[2] for line in lines}), 1)
+        self.assertFalse(User.objects.filter(
+            username__startswith='benchmark').exists())
@@ -60,6 +60,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         notification = self.fetch_all_notifications(token=self.user_token)
 
         self.assertEqual(notification.status_code, status.HTTP_200_OK)
@@ -82,6 +84,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         slug = article.data["data"].get("slug", None)
 
         favorite_article = self.client.post('/api/articles/{}/favorite/'.
@@ -124,6 +128,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         slug = article.data["data"].get("slug", None)
 
         comment = self.client.post('/api/articles/{}/comments/'.format(slug),
@@ -169,6 +175,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         slug = article.data["data"].get("slug", None)
 
         comment = self.client.post('/api/articles/{}/comments/'.format(slug),
@@ -210,6 +218,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         slug = article.data["data"].get("slug", None)
 
         comment = self.client.post('/api/articles/{}/comments/'.format(slug),
@@ -250,6 +260,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         notification = self.fetch_unread_notifications(token=self.user_token)
 
         self.assertEqual(notification.status_code, status.HTTP_200_OK)
@@ -276,6 +288,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         notification = self.fetch_all_notifications(token=self.user_token)
 
         self.assertTrue(notification.data["count"] == 2)
@@ -340,6 +354,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         notification = self.fetch_unread_notifications(token=self.user_token)
 
         self.assertEqual(notification.status_code, status.HTTP_200_OK)
@@ -366,6 +382,8 @@ class NotificationTest(BaseTest):
 
         self.assertEqual(article.status_code, status.HTTP_201_CREATED)
 
+        self.announce_articles()
+
         notification = self.fetch_all_notifications(token=self.user_token)
 
         id = notification.data["notifications"][0].get("id", None)
@@ -0,0 +1,232 @@
+"""
+Email outbox tests, sending to a local SMTP stand-in
+"""
+import socketserver
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from .base_test import BaseTest
+from ...apps.notifications.models import OutboxEmail
+from ...apps.notifications.outbox import Throttle, send_outbox
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks just enough SMTP to receive messages, answering DATA with the
+    queued error replies of the server first
+    """
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 stand-in ready')
+
+        for line in self.rfile:
+            command = line[:4].decode().upper()
+
+            if command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'DATA':
+                if self.server.replies:
+                    self.reply(self.server.replies.pop(0))
+                    continue
+                self.reply('354 end data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in self.rfile:
+                    if data_line == b'.\r\n':
+                        break
+                    data.append(data_line)
+                self.server.messages.append(b''.join(data).decode())
+            self.reply('250 OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """
+    A local SMTP server recording the messages and connections it gets
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.replies = []
+
+
+class OutboxTestCase(BaseTest):
+    """
+    This class defines the test suite for storing emails in the outbox
+    and sending them in batches
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        self.server = SMTPStandIn()
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+
+        self.settings = override_settings(
+            EMAIL_BACKEND='authors.apps.notifications.outbox.OutboxBackend',
+            OUTBOX_EMAIL_BACKEND='django.core.mail.backends.smtp.'
+                                 'EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.server.server_address[1],
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+            OUTBOX_RATE_LIMIT=0)
+        self.settings.enable()
+
+    def tearDown(self):
+        """ Stop the SMTP stand-in. """
+
+        self.settings.disable()
+        self.server.shutdown()
+        self.server.server_close()
+        BaseTest.tearDown(self)
+
+    def queue(self, count):
+        """
+        Send the given number of emails through the outbox
+        """
+        for index in range(count):
+            mail.send_mail('Subject {}'.format(index), 'Body', 'Authors Haven',
+                           ['reader{}@email.com'.format(index)],
+                           html_message='<p>Body</p>')
+
+    def test_request_handlers_write_to_the_outbox(self):
+        """
+        Test that emails sent while handling requests are stored rather
+        than sent
+        """
+        self.signup_user()
+
+        response = self.client.post(
+            '/api/users/reset_password/',
+            {'email': self.base_data.user_data['user']['email']},
+            format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(OutboxEmail.objects.values_list(
+            'subject', flat=True)), ['Activate account', 'Reset Password'])
+        self.assertEqual(self.server.messages, [])
+
+    def test_blind_copies_are_split(self):
+        """
+        Test that emails to many blind copies are stored as several
+        """
+        mail.EmailMessage('Update', 'Body', 'Authors Haven',
+                          bcc=['fan{}@email.com'.format(index)
+                               for index in range(250)]).send()
+
+        self.assertEqual(
+            [len(bcc) for bcc in OutboxEmail.objects.order_by(
+                'id').values_list('bcc', flat=True)], [100, 100, 50])
+
+    def test_batches_share_a_connection(self):
+        """
+        Test that the worker sends a batch over a single connection and
+        empties the outbox
+        """
+        self.queue(5)
+
+        self.assertEqual(send_outbox(batch_size=10), 5)
+
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertIn('<p>Body</p>', self.server.messages[0])
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_failures_are_retried_with_backoff(self):
+        """
+        Test that emails the server could not take are retried later,
+        waiting longer after each attempt
+        """
+        self.queue(3)
+        self.server.replies = ['451 try again later']
+
+        self.assertEqual(send_outbox(), 2)
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.send_after,
+                           timezone.now() + timedelta(seconds=50))
+        self.assertEqual(send_outbox(), 0)
+
+        OutboxEmail.objects.update(send_after=timezone.now())
+        self.server.replies = ['451 try again later']
+        send_outbox()
+
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 2)
+        self.assertGreater(email.send_after,
+                           timezone.now() + timedelta(seconds=110))
+
+        OutboxEmail.objects.update(send_after=timezone.now())
+        self.assertEqual(send_outbox(), 1)
+        self.assertEqual(len(self.server.messages), 3)
+
+    def test_rejected_emails_are_given_up(self):
+        """
+        Test that permanently rejected emails are marked failed and no
+        longer sent
+        """
+        self.queue(1)
+        self.server.replies = ['554 rejected']
+
+        with self.assertLogs('authors.apps.notifications.outbox', 'ERROR'):
+            send_outbox()
+
+        email = OutboxEmail.objects.get()
+        self.assertIsNotNone(email.failed_at)
+        self.assertIn('rejected', email.last_error)
+
+        OutboxEmail.objects.update(send_after=timezone.now())
+        self.assertEqual(send_outbox(), 0)
+
+    def test_unreachable_servers_defer_the_batch(self):
+        """
+        Test that a batch is deferred at once when the mail server cannot
+        be reached
+        """
+        self.queue(3)
+        self.server.shutdown()
+        self.server.server_close()
+
+        self.assertEqual(send_outbox(), 0)
+        self.assertEqual(list(OutboxEmail.objects.values_list(
+            'attempts', flat=True)), [1, 1, 1])
+
+    def test_command_drains_the_outbox(self):
+        """
+        Test that the worker command sends the outbox
+        """
+        self.queue(2)
+        output = StringIO()
+
+        call_command('send_outbox', stdout=output)
+
+        self.assertEqual(output.getvalue(), 'Sent 2 emails\n')
+        self.assertEqual(len(self.server.messages), 2)
+
+    def test_sending_is_throttled(self):
+        """
+        Test that the throttle spaces out sends to its rate
+        """
+        throttle = Throttle(100)
+        started = time.monotonic()
+
+        for _ in range(6):
+            throttle.wait()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
@@ -0,0 +1,166 @@
+"""
+Keyset pagination tests
+"""
+from django.test import override_settings
+from django.utils import timezone
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.authentication.models import User
+from ...apps.notifications.models import Notifications
+from ...apps.reports.models import ReportModel
+
+
+class KeysetPaginationTestCase(BaseTest):
+    """
+    This class defines the test suite for cursor pagination of
+    article and notification listings
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.user = User.objects.get(
+            username=self.base_data.user_data['user']['username'])
+
+        for index in range(7):
+            ArticleModel.objects.create(
+                title='Paginated article {}'.format(index),
+                description='description', body='body', author=self.user)
+
+        # rows sharing a timestamp are told apart by id
+        ArticleModel.objects.filter(title__in=[
+            'Paginated article 2', 'Paginated article 3',
+            'Paginated article 4']).update(created_at=timezone.now())
+
+        self.expected = list(ArticleModel.objects.order_by(
+            '-created_at', '-id').values_list('title', flat=True))
+
+    def walk(self, url, key='results', link='next', **headers):
+        """
+        Follow the links of a paginated listing and return the pages
+        """
+        pages = []
+        while url:
+            response = self.client.get(url, **headers)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data[key])
+            url = response.data[link]
+        return pages
+
+    def test_cursor_pages_follow_created_at_and_id(self):
+        """
+        Test that following next links returns every article exactly
+        once, newest first
+        """
+        pages = self.walk('/api/articles/?cursor=&limit=3')
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([article['title'] for page in pages
+                          for article in page], self.expected)
+
+    def test_previous_links_walk_back(self):
+        """
+        Test that previous links return the earlier pages
+        """
+        last_page = self.walk('/api/articles/?cursor=&limit=3')
+        response = self.client.get('/api/articles/?cursor=&limit=3')
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['next'])
+
+        pages = self.walk(response.data['previous'], link='previous')
+
+        self.assertEqual(pages, last_page[-2::-1])
+        self.assertIsNone(
+            self.client.get('/api/articles/?cursor=').data['previous'])
+
+    def test_approximate_total_is_optional(self):
+        """
+        Test that a total is only returned when requested
+        """
+        response = self.client.get('/api/articles/?cursor=')
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get('/api/articles/?cursor=&total=approximate')
+        self.assertIsInstance(response.data['count'], int)
+
+    @override_settings(MAX_PAGE_SIZE=5)
+    def test_page_size_is_capped(self):
+        """
+        Test that the requested page size cannot exceed the maximum
+        """
+        response = self.client.get('/api/articles/?cursor=&limit=500')
+        self.assertEqual(len(response.data['results']), 5)
+
+        response = self.client.get('/api/articles/?limit=500')
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        """
+        Test that a tampered cursor is rejected
+        """
+        response = self.client.get('/api/articles/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+    def test_deep_pages_do_not_count_or_offset(self):
+        """
+        Test that a later page is fetched by seeking, without COUNT or
+        OFFSET
+        """
+        first = self.client.get('/api/articles/?cursor=&limit=2')
+
+        # page with counters, tags, comments and article authors
+        with self.assertNumQueries(4) as queries:
+            self.client.get(first.data['next'])
+
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_feeds_seek_from_the_first_page(self):
+        """
+        Test that the article and report feeds are paginated by seeking
+        unless a page number is asked for
+        """
+        with self.assertNumQueries(4) as queries:
+            response = self.client.get('/api/articles/?limit=3')
+
+        self.assertNotIn('count', response.data)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+        pages = self.walk('/api/articles/?limit=3')
+        self.assertEqual([article['title'] for page in pages
+                          for article in page], self.expected)
+
+        response = self.client.get('/api/articles/?page=3&limit=3')
+        self.assertEqual(response.data['count'], 7)
+
+        for article in ArticleModel.objects.all():
+            ReportModel.objects.create(user=self.user, article=article,
+                                       reason='reason')
+
+        pages = self.walk('/api/reports/?limit=4',
+                          HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.assertEqual([len(page) for page in pages], [4, 3])
+
+    def test_notifications_cursor_pages(self):
+        """
+        Test that notifications can be paginated with a cursor
+        """
+        Notifications.objects.bulk_create(
+            Notifications(user=self.user, message='message {}'.format(index),
+                          url='url') for index in range(5))
+
+        pages = self.walk('/api/notifications/all?cursor=&limit=2',
+                          key='notifications',
+                          HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
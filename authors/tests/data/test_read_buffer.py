@@ -0,0 +1,161 @@
+"""
+Buffered article read tests
+"""
+import time
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .base_test import BaseTest
+from ...apps.articles.models import (ArticleModel, ArticleStatsModel,
+                                     ReadStatsModel)
+from ...apps.articles.reads import read_buffer
+from ...apps.authentication.models import User
+
+
+class ReadBufferTestCase(BaseTest):
+    """
+    This class defines the test suite for buffering article reads and
+    storing them in batches
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+
+        self.token = self.login_user_and_get_token()
+        self.reader = User.objects.get(
+            username=self.base_data.user_data['user']['username'])
+        self.author = User.objects.create_user(
+            username='bufferauthor', email='bufferauthor@email.com',
+            password='Admin12345')
+        self.article = ArticleModel.objects.create(
+            title='Buffered article', description='description',
+            body='body', author=self.author)
+
+    def read_count(self):
+        """
+        Return the stored read counter of the test article
+        """
+        return ArticleStatsModel.objects.get(article=self.article).read_count
+
+    def test_reading_an_article_does_not_write(self):
+        """
+        Test that reads are buffered instead of written by the request
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/api/articles/{}/'.format(self.article.slug),
+                HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            self.assertNotIn('INSERT', query['sql'])
+        self.assertEqual(read_buffer.reads,
+                         {(self.reader.id, self.article.id)})
+
+        read_buffer.flush()
+        self.assertEqual(ReadStatsModel.objects.get().user, self.reader)
+        self.assertEqual(self.read_count(), 1)
+
+    def test_reads_are_stored_once(self):
+        """
+        Test that repeated and already stored reads are neither stored
+        nor counted again
+        """
+        for _ in range(3):
+            read_buffer.add(self.reader.id, self.article.id)
+        read_buffer.add(self.author.id, self.article.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            read_buffer.flush()
+
+        # one upsert of the reads and one update of their sketches
+        statements = [query['sql'].split()[0]
+                      for query in queries.captured_queries]
+        self.assertEqual(statements.count('INSERT'), 1)
+        self.assertEqual(statements.count('UPDATE'), 1)
+
+        read_buffer.add(self.reader.id, self.article.id)
+        read_buffer.flush()
+
+        self.assertEqual(ReadStatsModel.objects.count(), 2)
+        self.assertEqual(self.read_count(), 2)
+
+    def test_reads_of_deleted_articles_are_dropped(self):
+        """
+        Test that a batch is stored even if some of its articles were
+        deleted since they were read
+        """
+        other = ArticleModel.objects.create(
+            title='Deleted article', description='description',
+            body='body', author=self.author)
+        read_buffer.add(self.reader.id, other.id)
+        read_buffer.add(self.reader.id, self.article.id)
+        other.delete()
+
+        read_buffer.flush()
+
+        self.assertEqual(ReadStatsModel.objects.get().article, self.article)
+        self.assertEqual(read_buffer.reads, set())
+
+
+class ReadBufferFlushTestCase(TransactionTestCase):
+    """
+    This class defines the test suite for flushing buffered reads from
+    the background thread
+    """
+
+    def setUp(self):
+        """ Define the required test variables. """
+
+        self.reader = User.objects.create_user(
+            username='bufferreader', email='bufferreader@email.com',
+            password='Admin12345')
+        self.articles = [ArticleModel.objects.create(
+            title='Buffered article {}'.format(index),
+            description='description', body='body', author=self.reader)
+            for index in range(2)]
+
+    def tearDown(self):
+        """ Drop the reads left in the buffer. """
+
+        read_buffer.take()
+
+    def wait_for_reads(self, count):
+        """
+        Wait for the given number of reads to be stored
+        """
+        deadline = time.time() + 5
+        while ReadStatsModel.objects.count() < count:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    @override_settings(ARTICLE_READ_BUFFER_SIZE=2,
+                       ARTICLE_READ_FLUSH_INTERVAL=60)
+    def test_full_buffers_are_flushed(self):
+        """
+        Test that a buffer is flushed as soon as it is full
+        """
+        read_buffer.add(self.reader.id, self.articles[0].id)
+        read_buffer.add(self.reader.id, self.articles[1].id)
+
+        self.wait_for_reads(2)
+        self.assertEqual([stats.read_count for stats in
+                          ArticleStatsModel.objects.all()], [1, 1])
+
+    @override_settings(ARTICLE_READ_BUFFER_SIZE=100,
+                       ARTICLE_READ_FLUSH_INTERVAL=0.01)
+    def test_buffers_are_flushed_on_a_timer(self):
+        """
+        Test that buffered reads are flushed after the flush interval
+        """
+        read_buffer.add(self.reader.id, self.articles[0].id)
+
+        self.wait_for_reads(1)
+        self.assertEqual(read_buffer.reads, set())
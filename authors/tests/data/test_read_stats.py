@@ -4,6 +4,11 @@ Reader statistics tests
 import json
 from .base_test import BaseTest
 from .data import Data
+from ...apps.articles.actions import add_readers
+from ...apps.articles.models import ArticleModel, ArticleStatsModel
+from ...apps.articles.reads import read_buffer
+from ...apps.authentication.models import User
+from ...apps.core.hyperloglog import REGISTERS
 
 
 class ReadingStatsTestcase(BaseTest):
@@ -41,6 +46,11 @@ class ReadingStatsTestcase(BaseTest):
         article = self.create_article()
         slug = article.data['data']['slug']
 
+        self.client.get('/api/articles/{}/'.format(slug),
+                        HTTP_AUTHORIZATION='Bearer ' +
+                        self.control_token)
+        read_buffer.flush()
+
         response = self.client.get('/api/articles/{}/'.format(slug),
                                    HTTP_AUTHORIZATION='Bearer ' +
                                    self.control_token)
@@ -78,13 +88,14 @@ class ReadingStatsTestcase(BaseTest):
         self.client.get('/api/articles/{}/'.format(slug),
                         HTTP_AUTHORIZATION='Bearer ' +
                         self.control_token)
+        read_buffer.flush()
 
-        response = self.client.get('/api/articles/{}/'.format(slug),
+        response = self.client.get('/api/articles/{}/readers/'.format(slug),
                                    HTTP_AUTHORIZATION='Bearer ' +
                                    self.token)
         res = json.loads(response.content.decode('utf-8'))
 
-        self.assertEqual(res['data']['article_readers'][0], 'NewUser')
+        self.assertEqual(res['results'][0]['username'], 'NewUser')
 
     def test_canot_get_article_readers_if_not_owner(self):
         """
@@ -94,9 +105,50 @@ class ReadingStatsTestcase(BaseTest):
         article = self.create_article()
         slug = article.data['data']['slug']
 
-        response = self.client.get('/api/articles/{}/'.format(slug),
+        response = self.client.get('/api/articles/{}/readers/'.format(slug),
                                    HTTP_AUTHORIZATION='Bearer ' +
                                    self.control_token)
-        res = json.loads(response.content.decode('utf-8'))
 
-        self.assertEqual(res['data']['article_readers'], None)
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('article_readers', self.client.get(
+            '/api/articles/{}/'.format(slug)).json()['data'])
+
+    def test_article_readers_are_paginated(self):
+        """
+        Test that the readers of an article are listed newest first, a
+        page at a time
+        """
+        article = ArticleModel.objects.get(
+            slug=self.create_article().data['data']['slug'])
+        readers = [User.objects.create_user(
+            username='reader{}'.format(index),
+            email='reader{}@email.com'.format(index),
+            password='Admin12345') for index in range(3)]
+        for reader in readers:
+            read_buffer.add(reader.id, article.id)
+            read_buffer.flush()
+
+        response = self.client.get(
+            '/api/articles/{}/readers/?cursor=&limit=2'.format(article.slug),
+            HTTP_AUTHORIZATION='Bearer ' + self.token)
+        first = [reader['username'] for reader in response.data['results']]
+        response = self.client.get(
+            response.data['next'], HTTP_AUTHORIZATION='Bearer ' + self.token)
+        second = [reader['username'] for reader in response.data['results']]
+
+        self.assertEqual(first + second, ['reader2', 'reader1', 'reader0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_read_count_is_estimated_from_a_sketch(self):
+        """
+        Test that read counts come from the reader sketch, which does
+        not count a reader twice
+        """
+        article = ArticleModel.objects.get(
+            slug=self.create_article().data['data']['slug'])
+        for user_id in list(range(1000, 1200)) * 2:
+            add_readers([(user_id, article.id)])
+
+        stats = ArticleStatsModel.objects.get(article=article)
+        self.assertEqual(len(bytes(stats.readers_sketch)), REGISTERS)
+        self.assertAlmostEqual(stats.read_count, 200, delta=20)
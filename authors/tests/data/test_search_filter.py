@@ -1,7 +1,11 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
 from .base_test import BaseTest
 from .data import Data
+from ...apps.articles.models import ArticleModel
+from ...apps.authentication.models import User
 import json
 
 
@@ -234,3 +238,93 @@ class ModelTestCase(BaseTest):
 
         self.assertEqual(response.status_code,
                          status.HTTP_404_NOT_FOUND)
+
+
+class TrigramFilterTestCase(BaseTest):
+    """
+    This class defines the test suite for fuzzy title and author filters
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        self.author = User.objects.create_user(
+            username='gardener', email='gardener@email.com',
+            password='Admin12345')
+        self.other = User.objects.create_user(
+            username='wanderer', email='wanderer@email.com',
+            password='Admin12345')
+
+        for (title, author) in (('Gardening notes', self.author),
+                                ('Garden party planning', self.author),
+                                ('Travel diary', self.other)):
+            ArticleModel.objects.create(title=title, description='text',
+                                        body='text', author=author)
+
+    def filter(self, query):
+        """
+        Return the titles of the articles matching a filter
+        """
+        response = self.client.get('/api/article/search/?' + query)
+        if response.status_code == 404:
+            return []
+        return [article['title'] for article in response.data['results']]
+
+    def test_title_filter_tolerates_typos(self):
+        """
+        Test that titles with a word similar to the filter match
+        """
+        self.assertEqual(self.filter('title=gardenning'), ['Gardening notes'])
+        self.assertEqual(self.filter('title=diarry'), ['Travel diary'])
+
+    def test_title_filter_ranks_by_similarity(self):
+        """
+        Test that closer matches come first
+        """
+        self.assertEqual(self.filter('title=garden'),
+                         ['Garden party planning', 'Gardening notes'])
+
+    def test_title_filter_matches_parts_in_any_case(self):
+        """
+        Test that titles containing the filter in any case match with
+        an ILIKE on the column the trigram index covers, and that
+        wildcards in the filter are taken literally
+        """
+        with CaptureQueriesContext(connection) as queries:
+            titles = self.filter('title=TY PLAN')
+
+        self.assertEqual(titles, ['Garden party planning'])
+        article_query = [query['sql'] for query in queries.captured_queries
+                         if 'FROM "articles_articlemodel"' in query['sql']][0]
+        self.assertIn('"title" ILIKE', article_query)
+        self.assertNotIn('UPPER(', article_query)
+        self.assertEqual(self.filter('title=%25'), [])
+
+    def test_author_filter_tolerates_typos(self):
+        """
+        Test that authors with a similar username match
+        """
+        self.assertEqual(self.filter('author=wanderrer'), ['Travel diary'])
+
+    def test_exact_author_filters_by_id(self):
+        """
+        Test that an exact username filters articles by author id
+        without joining the users table
+        """
+        with CaptureQueriesContext(connection) as queries:
+            titles = self.filter('author=wanderer')
+
+        self.assertEqual(titles, ['Travel diary'])
+        article_query = [query['sql'] for query in queries.captured_queries
+                         if 'FROM "articles_articlemodel"' in query['sql']][0]
+        self.assertIn('"author_id" = {}'.format(self.other.id),
+                      article_query)
+        self.assertNotIn('authentication_user', article_query)
+
+    def test_filter_by_author_id(self):
+        """
+        Test that articles can be filtered by author id
+        """
+        self.assertEqual(self.filter('author_id={}'.format(self.author.id)),
+                         ['Garden party planning', 'Gardening notes'])
@@ -0,0 +1,156 @@
+"""
+Article slug allocation tests
+"""
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel, SlugHistoryModel
+from ...apps.articles.slugs import allocate_slug
+from ...apps.authentication.models import User
+
+
+class SlugAllocatorTestCase(BaseTest):
+    """
+    This class defines the test suite for allocating unique article slugs
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        self.author = User.objects.create_user(
+            username='slugauthor', email='slugauthor@email.com',
+            password='Admin12345')
+
+    def create(self, title):
+        """
+        Create an article with the given title
+        """
+        return ArticleModel.objects.create(
+            title=title, description='description', body=title,
+            author=self.author)
+
+    def test_same_titles_are_numbered(self):
+        """
+        Test that articles sharing a title get the next free number
+        """
+        slugs = [self.create('Same title').slug for index in range(3)]
+        self.assertEqual(slugs, ['same-title', 'same-title-2', 'same-title-3'])
+
+        self.assertEqual(self.create('Same title 2').slug, 'same-title-2-2')
+        self.assertEqual(self.create('Same titles').slug, 'same-titles')
+        self.assertEqual(self.create('').slug, 'articlemodel')
+
+    def test_slugs_are_allocated_in_one_query(self):
+        """
+        Test that the next number is found without probing slug by slug
+        """
+        for index in range(5):
+            self.create('Busy title')
+        article = ArticleModel(title='Busy title', author=self.author)
+
+        with CaptureQueriesContext(connection) as queries:
+            slug = allocate_slug(article)
+
+        self.assertEqual(slug, 'busy-title-6')
+        selects = [query for query in queries.captured_queries
+                   if 'FROM' in query['sql']]
+        self.assertEqual(len(selects), 1)
+
+    def test_slugs_only_change_with_titles(self):
+        """
+        Test that saving an article keeps its slug unless its title changed
+        """
+        article = self.create('Kept title')
+        self.create('Other title')
+
+        article.body = 'A new body'
+        article.save()
+        self.assertEqual(ArticleModel.objects.get(id=article.id).slug,
+                         'kept-title')
+
+        article.title = 'Other title'
+        article.save()
+        self.assertEqual(article.slug, 'other-title-2')
+
+    def test_old_slugs_resolve(self):
+        """
+        Test that renamed articles are still found under their old slug
+        """
+        article = self.create('First title')
+        article.title = 'Second title'
+        article.save()
+        article.title = 'Third title'
+        article.save()
+
+        self.assertEqual(
+            sorted(article.old_slugs.values_list('slug', flat=True)),
+            ['first-title', 'second-title'])
+
+        response = self.client.get('/api/articles/first-title/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['slug'], 'third-title')
+
+        article.delete()
+        self.assertFalse(SlugHistoryModel.objects.exists())
+        response = self.client.get('/api/articles/first-title/')
+        self.assertEqual(response.status_code, 404)
+
+
+    def test_old_slugs_are_not_reused(self):
+        """
+        Test that a new article does not take a slug that a renamed
+        article gave up, which the renamed article may take back
+        """
+        article = self.create('Moving title')
+        article.title = 'Moved title'
+        article.save()
+
+        self.assertEqual(self.create('Moving title').slug, 'moving-title-2')
+        response = self.client.get('/api/articles/moving-title/')
+        self.assertEqual(response.json()['data']['slug'], 'moved-title')
+
+        article.title = 'Moving title'
+        article.save()
+        self.assertEqual(article.slug, 'moving-title')
+
+class ConcurrentSlugTestCase(TransactionTestCase):
+    """
+    This class defines the test suite for allocating slugs from
+    concurrent transactions
+    """
+
+    def test_concurrent_creates_get_distinct_slugs(self):
+        """
+        Test that articles created at once with one title never clash
+        """
+        author = User.objects.create_user(
+            username='raceauthor', email='raceauthor@email.com',
+            password='Admin12345')
+        errors = []
+
+        def create():
+            try:
+                ArticleModel.objects.create(
+                    title='Racing title', description='description',
+                    body='body', author=author)
+            except Exception as error:  # pragma: no cover
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=create) for index in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sorted(ArticleModel.objects.values_list('slug', flat=True)),
+            ['racing-title'] + ['racing-title-{}'.format(number)
+                                for number in range(2, 7)])
@@ -0,0 +1,128 @@
+"""
+Cached subscription preference tests
+"""
+from django.test import override_settings
+
+from .base_test import BaseTest
+from ...apps.authentication.models import User
+from ...apps.notifications.models import OptOutsVersion, Subscriptions
+from ...apps.notifications.preferences import OptOuts, opt_outs
+
+
+class SubscriptionPreferenceTestCase(BaseTest):
+    """
+    This class defines the test suite for checking the notification
+    opt-outs of users without querying them
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.token = self.login_user_and_get_token()
+        self.user = User.objects.get(
+            username=self.base_data.user_data['user']['username'])
+
+        self.other = User.objects.create(username='optedout',
+                                         email='optedout@email.com')
+        Subscriptions.objects.filter(user=self.other).update(app=False)
+
+    def test_opt_outs_are_loaded_once(self):
+        """
+        Test that the opt-outs are loaded with one query and then
+        checked against their version alone
+        """
+        with self.assertNumQueries(2):
+            app, email, _ = opt_outs.current()
+
+        self.assertEqual((app, email), ({self.other.id}, set()))
+
+        with self.assertNumQueries(1):
+            opt_outs.current()
+
+    def test_updates_reload_the_opt_outs(self):
+        """
+        Test that changing or deleting subscriptions has the opt-outs
+        loaded again
+        """
+        opt_outs.current()
+
+        response = self.client.put(
+            '/api/notifications/subscriptions', {'email': False},
+            HTTP_AUTHORIZATION='Bearer ' + self.token, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(2):
+            app, email, _ = opt_outs.current()
+        self.assertEqual((app, email), ({self.other.id}, {self.user.id}))
+
+        Subscriptions.objects.get(user=self.other).delete()
+        with self.assertNumQueries(2):
+            app, email, _ = opt_outs.current()
+        self.assertEqual(app, set())
+
+    def test_processes_see_each_others_updates(self):
+        """
+        Test that processes changing subscriptions at the same time both
+        end up with both changes
+        """
+        first, second = OptOuts(), OptOuts()
+        first.current()
+        second.current()
+
+        Subscriptions.objects.filter(user=self.user).update(email=False)
+        first.invalidate()
+        Subscriptions.objects.filter(user=self.other).update(app=True)
+        second.invalidate()
+
+        for process in (first, second):
+            app, email, _ = process.current()
+            self.assertEqual((app, email), (set(), {self.user.id}))
+
+    def test_other_processes_see_unsubscriptions(self):
+        """
+        Test that a process which did not handle an unsubscription sees
+        it without sharing a cache with the one that did
+        """
+        worker = OptOuts()
+        worker.current()
+
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            response = self.client.put(
+                '/api/notifications/subscriptions', {'app': False},
+                HTTP_AUTHORIZATION='Bearer ' + self.token, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        app, _, _ = worker.current()
+        self.assertIn(self.user.id, app)
+
+    def test_changes_of_other_processes_are_loaded(self):
+        """
+        Test that the opt-outs are loaded again once another process
+        replaced their version in the database
+        """
+        opt_outs.current()
+        Subscriptions.objects.filter(user=self.user).update(email=False)
+        OptOutsVersion.objects.update_or_create(
+            id=1, defaults={'version': 'changed elsewhere'})
+
+        with self.assertNumQueries(2):
+            app, email, _ = opt_outs.current()
+        self.assertEqual(email, {self.user.id})
+
+    def test_new_users_do_not_replace_the_version(self):
+        """
+        Test that the default subscriptions of new users leave the
+        loaded opt-outs current
+        """
+        opt_outs.current()
+        version = OptOutsVersion.objects.values_list('version', flat=True)
+        before = list(version)
+
+        User.objects.create(username='newcomer', email='newcomer@email.com')
+
+        self.assertEqual(list(version), before)
@@ -0,0 +1,112 @@
+"""
+Tag catalogue tests
+"""
+from django.core.cache import cache
+from django.test import override_settings
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel, TagModel, TagStatsModel
+
+
+@override_settings(SHARED_CACHE=True)
+class TagCatalogueTestCase(BaseTest):
+    """
+    This class defines the test suite for listing tags with their
+    article counts
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        cache.clear()
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.token = self.login_user_and_get_token()
+
+        self.slugs = [self.post('Article {}'.format(index), tags)
+                      for index, tags in enumerate([
+                          ['python', 'django'], ['python', 'react'],
+                          ['python', 'pytest', 'django']])]
+
+    def post(self, title, tags):
+        """
+        Create an article with the given tags and return its slug
+        """
+        return self.client.post(
+            '/api/articles/',
+            {'title': title, 'description': 'description', 'body': title,
+             'tag_list': tags},
+            HTTP_AUTHORIZATION='Bearer ' + self.token,
+            format='json').data['data']['slug']
+
+    def catalogue(self, query=''):
+        """
+        Return the tag catalogue as [tagname, article count] pairs
+        """
+        response = self.client.get('/api/tags/' + query)
+        self.assertEqual(response.status_code, 200)
+        return [[tag['tagname'], tag['article_count']]
+                for tag in response.data['Tags']]
+
+    def counts(self):
+        """
+        Return the stored article counts of the tags
+        """
+        return dict(TagStatsModel.objects.values_list(
+            'tag__tagname', 'article_count'))
+
+    def test_tags_are_listed_by_usage(self):
+        """
+        Test that tags are listed most used first, paginated
+        """
+        self.assertEqual(self.catalogue(), [
+            ['python', 3], ['django', 2], ['react', 1], ['pytest', 1]])
+
+        response = self.client.get('/api/tags/?limit=2')
+        self.assertEqual(response.data['count'], 4)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(response.data['Tags']), 2)
+
+    def test_prefix_and_top_lookups(self):
+        """
+        Test that tags can be looked up by prefix and the most used
+        ones listed
+        """
+        self.assertEqual(self.catalogue('?prefix=py'),
+                         [['python', 3], ['pytest', 1]])
+        self.assertEqual(self.catalogue('?top=2'),
+                         [['python', 3], ['django', 2]])
+
+    def test_counts_follow_tag_changes(self):
+        """
+        Test that the counts follow updated, untagged and deleted
+        articles, and the cached catalogue with them
+        """
+        self.catalogue()
+
+        self.client.put('/api/articles/{}/'.format(self.slugs[0]),
+                        {'tag_list': ['python', 'react']},
+                        HTTP_AUTHORIZATION='Bearer ' + self.token,
+                        format='json')
+        article = ArticleModel.objects.get(slug=self.slugs[1])
+        article.tag_list.clear()
+        ArticleModel.objects.get(slug=self.slugs[2]).delete()
+
+        self.assertEqual(self.counts(), {
+            'python': 1, 'django': 0, 'react': 1, 'pytest': 0})
+        self.assertEqual(self.catalogue(), [['python', 1], ['react', 1]])
+
+        TagModel.objects.get(tagname='django').articlemodel_set.add(article)
+        self.assertEqual(self.counts()['django'], 1)
+        self.assertEqual(self.catalogue('?prefix=dj'), [['django', 1]])
+
+    def test_catalogue_pages_are_cached(self):
+        """
+        Test that catalogue pages are served from the cache
+        """
+        self.catalogue()
+
+        with self.assertNumQueries(0):
+            self.catalogue()
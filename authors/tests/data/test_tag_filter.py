@@ -0,0 +1,73 @@
+"""
+Multiple tag filter tests
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base_test import BaseTest
+
+
+class TagFilterTestCase(BaseTest):
+    """
+    This class defines the test suite for filtering articles by any or
+    all of several tags
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.token = self.login_user_and_get_token()
+
+        for title, tags in [('Both', ['python', 'django']),
+                            ('Python', ['python']),
+                            ('Django', ['django']),
+                            ('Neither', ['react'])]:
+            self.client.post(
+                '/api/articles/',
+                {'title': title, 'description': 'description',
+                 'body': title, 'tag_list': tags},
+                HTTP_AUTHORIZATION='Bearer ' + self.token, format='json')
+
+    def titles(self, query):
+        """
+        Return the titles of the articles found by a search query
+        """
+        response = self.client.get('/api/article/search/' + query)
+        if response.status_code == 404:
+            return []
+        return [article['title'] for article in response.data['results']]
+
+    def test_any_of_several_tags(self):
+        """
+        Test that articles with any of the tags are found once each,
+        newest first and without DISTINCT
+        """
+        with CaptureQueriesContext(connection) as queries:
+            titles = self.titles('?tag=python,django,unknown')
+
+        self.assertEqual(titles, ['Django', 'Python', 'Both'])
+        for query in queries.captured_queries:
+            self.assertNotIn('DISTINCT', query['sql'])
+
+    def test_all_of_several_tags(self):
+        """
+        Test that only articles with every tag are found in all mode
+        """
+        self.assertEqual(self.titles('?tag=python,django&tag_mode=all'),
+                         ['Both'])
+        self.assertEqual(self.titles('?tag=python&tag_mode=all'),
+                         ['Python', 'Both'])
+        self.assertEqual(
+            self.titles('?tag=python,unknown&tag_mode=all'), [])
+
+    def test_invalid_tag_modes_are_rejected(self):
+        """
+        Test that unknown tag modes are reported
+        """
+        response = self.client.get(
+            '/api/article/search/?tag=python&tag_mode=some')
+        self.assertEqual(response.status_code, 400)
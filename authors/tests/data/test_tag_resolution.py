@@ -0,0 +1,109 @@
+"""
+Bulk tag resolution tests
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel, TagModel
+from ...apps.articles.tags import resolve_tags, tag_cache
+
+
+class TagResolutionTestCase(BaseTest):
+    """
+    This class defines the test suite for resolving and applying the
+    tags of articles in bulk
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.token = self.login_user_and_get_token()
+
+    def post(self, title, tags):
+        """
+        Create an article with the given tags
+        """
+        return self.client.post(
+            '/api/articles/',
+            {'title': title, 'description': 'description', 'body': title,
+             'tag_list': tags},
+            HTTP_AUTHORIZATION='Bearer ' + self.token, format='json')
+
+    def tag_queries(self, queries):
+        """
+        Return the captured statements on the tags table
+        """
+        return [query['sql'].split()[0] for query in queries.captured_queries
+                if '"articles_tagmodel"' in query['sql'] or
+                'articles_tagmodel ' in query['sql']]
+
+    def test_tags_are_resolved_in_bulk(self):
+        """
+        Test that the tags of an article are looked up and created at
+        once, and then served from the cache
+        """
+        TagModel.objects.create(tagname='tag0')
+        tags = ['tag{}'.format(index) for index in range(20)]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('Many tags', tags + ['tag0'])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['tag_list'], tags)
+        self.assertEqual(self.tag_queries(queries)[:2], ['SELECT', 'INSERT'])
+        self.assertEqual(TagModel.objects.count(), 20)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('Same tags', tags)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.tag_queries(queries)[:1], ['WITH'])
+
+    def test_updates_apply_tag_differences(self):
+        """
+        Test that updating the tags of an article only removes and adds
+        the ones that changed
+        """
+        slug = self.post('Tagged', ['one', 'two', 'three']).data['data'][
+            'slug']
+        article = ArticleModel.objects.get(slug=slug)
+        links = list(article.tag_list.through.objects.filter(
+            articlemodel=article, tagmodel__tagname__in=['two', 'three'])
+            .values_list('id', flat=True))
+
+        response = self.client.put(
+            '/api/articles/{}/'.format(slug),
+            {'tag_list': ['two', 'three', 'four']},
+            HTTP_AUTHORIZATION='Bearer ' + self.token, format='json')
+
+        self.assertEqual(sorted(response.data['data']['tag_list']),
+                         ['four', 'three', 'two'])
+        self.assertEqual(sorted(article.tag_list.through.objects.filter(
+            articlemodel=article, tagmodel__tagname__in=['two', 'three'])
+            .values_list('id', flat=True)), sorted(links))
+
+    def test_stale_cached_tags_are_resolved_again(self):
+        """
+        Test that tags whose cached id is gone are created again
+        """
+        resolve_tags(['stale'])
+        TagModel.objects.filter(tagname='stale').delete()
+        tag_cache.set_many({'stale': 0})
+
+        response = self.post('Stale tag', ['stale'])
+
+        self.assertEqual(response.data['data']['tag_list'], ['stale'])
+        self.assertTrue(TagModel.objects.filter(tagname='stale').exists())
+
+    def test_invalid_tags_are_rejected(self):
+        """
+        Test that malformed or overlong tags are rejected
+        """
+        self.assertEqual(self.post('Bad tag', ['-bad']).status_code, 400)
+        self.assertEqual(self.post('Long tag', ['a' * 65]).status_code, 400)
+        self.assertFalse(TagModel.objects.exists())
@@ -0,0 +1,162 @@
+"""
+Atomic vote toggle and write-behind vote counter tests
+"""
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+from vote.models import DOWN, UP, Vote
+
+from .base_test import BaseTest
+from ...apps.articles.models import ArticleModel
+from ...apps.articles.votes import vote_article, vote_buffer
+from ...apps.authentication.models import User
+
+
+class VoteToggleTestCase(BaseTest):
+    """
+    This class defines the test suite for toggling votes in a single
+    statement
+    """
+
+    def setUp(self):
+        """ Define the test client and required test variables. """
+
+        BaseTest.setUp(self)
+        signup = self.signup_user()
+        self.activate_user(uid=signup.data.get('data')['id'],
+                           token=signup.data.get('data')['token'])
+        self.token = self.login_user_and_get_token()
+        self.slug = self.create_article().data['data']['slug']
+
+    def vote(self, action):
+        """
+        Like or dislike the article and return the response
+        """
+        return self.client.post(
+            '/api/articles/{}/{}/'.format(self.slug, action),
+            HTTP_AUTHORIZATION='Bearer ' + self.token).json()
+
+    def counts(self):
+        """
+        Store the buffered vote changes and return the vote counters of
+        the article
+        """
+        vote_buffer.flush()
+        return list(ArticleModel.objects.filter(slug=self.slug).values_list(
+            'num_vote_up', 'num_vote_down', 'vote_score')[0])
+
+    def test_votes_toggle_and_switch(self):
+        """
+        Test that votes are added, switched and removed, with the
+        counters including the change
+        """
+        response = self.vote('like')
+        self.assertEqual([response['liked'], response['num_vote_up'],
+                          response['num_vote_down']], [True, 1, 0])
+        self.assertEqual(self.counts(), [1, 0, 1])
+
+        response = self.vote('dislike')
+        self.assertEqual([response['disliked'], response['num_vote_up'],
+                          response['num_vote_down']], [True, 0, 1])
+        self.assertEqual(self.counts(), [0, 1, -1])
+        self.assertEqual(list(Vote.objects.values_list('action', flat=True)),
+                         [DOWN])
+
+        response = self.vote('dislike')
+        self.assertFalse(response['disliked'])
+        self.assertEqual(self.counts(), [0, 0, 0])
+        self.assertFalse(Vote.objects.exists())
+
+    def test_a_vote_is_one_statement(self):
+        """
+        Test that an article vote takes a single query
+        """
+        user_id = ArticleModel.objects.get(slug=self.slug).author_id
+        vote_article(self.slug, user_id, UP)
+
+        with self.assertNumQueries(1):
+            votes = vote_article(self.slug, user_id, UP)
+
+        self.assertEqual(votes, {'num_vote_up': 0, 'num_vote_down': 0,
+                                 'vote_score': 0, 'voted': False})
+        self.assertIsNone(vote_article('missing', user_id, UP))
+
+    def test_counters_are_written_behind(self):
+        """
+        Test that vote changes are shown at once, but stored in a single
+        update when the buffer is flushed
+        """
+        for user_id in range(1000, 1005):
+            vote_article(self.slug, user_id, UP)
+        vote_article(self.slug, 1005, DOWN)
+
+        stored = ArticleModel.objects.values_list(
+            'num_vote_up', 'num_vote_down').get(slug=self.slug)
+        self.assertEqual(stored, (0, 0))
+
+        response = self.client.get('/api/articles/{}/'.format(self.slug))
+        self.assertEqual([response.json()['data'][key] for key in [
+            'num_vote_up', 'num_vote_down', 'vote_score']], [5, 1, 4])
+
+        with self.assertNumQueries(3):
+            vote_buffer.flush()
+        self.assertEqual(self.counts(), [5, 1, 4])
+
+    def test_comment_votes_are_toggled(self):
+        """
+        Test that comment votes are toggled and counted
+        """
+        comment = self.client.post(
+            '/api/articles/{}/comments/'.format(self.slug),
+            {'comment': 'A comment'},
+            HTTP_AUTHORIZATION='Bearer ' + self.token, format='json').data
+        url = '/api/articles/{}/comments/{}/'.format(self.slug, comment['id'])
+
+        response = self.client.post(
+            url + 'like/', HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.assertEqual(response.json()['message'],
+                         'You have liked this comment')
+        response = self.client.post(
+            url + 'like/', HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.assertEqual(response.json()['message'],
+                         'You have deleted this like')
+
+
+class ConcurrentVoteTestCase(TransactionTestCase):
+    """
+    This class defines the test suite for votes cast at once
+    """
+
+    def test_concurrent_likes_are_all_counted(self):
+        """
+        Test that likes cast at once by many readers are all counted
+        """
+        author = User.objects.create_user(
+            username='voteauthor', email='voteauthor@email.com',
+            password='Admin12345')
+        article = ArticleModel.objects.create(
+            title='Popular', description='description', body='body',
+            author=author)
+        errors = []
+
+        def like(user_id):
+            try:
+                vote_article(article.slug, user_id, UP)
+            except Exception as error:  # pragma: no cover
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=like, args=(user_id,))
+                   for user_id in range(1000, 1012)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        vote_buffer.flush()
+        article.refresh_from_db()
+        self.assertEqual(errors, [])
+        self.assertEqual([article.num_vote_up, article.vote_score], [12, 12])
+        self.assertEqual(Vote.objects.count(), 12)